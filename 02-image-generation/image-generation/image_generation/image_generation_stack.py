@@ -7,7 +7,10 @@ from aws_cdk import (
     aws_sns_subscriptions as subs,
     aws_s3 as s3,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as lambda_event_sources,
     aws_apigateway as apigw,
+    aws_dynamodb as dynamodb,
+    aws_sqs as sqs,
 )
 
 
@@ -21,7 +24,13 @@ class ImageGenerationStack(Stack):
             "ImageSourceBucket",
             bucket_name="amazon-bedrock-image-source-bucket-002",
             removal_policy=RemovalPolicy.DESTROY,
-            auto_delete_objects=True
+            auto_delete_objects=True,
+            # Cache pointers (see lambda/image_cache.py) age out; the images they point to (images/) never expire
+            lifecycle_rules=[
+                s3.LifecycleRule(prefix="cache/", expiration=Duration.days(30)),
+                # Preview images (?mode=preview) are only needed while choosing one
+                s3.LifecycleRule(prefix="previews/", expiration=Duration.days(1))
+            ]
         )
 
         image_generator_function = _lambda.Function(
@@ -80,7 +89,11 @@ class ImageGenerationStack(Stack):
         lambda_integration = apigw.LambdaIntegration(
             image_generator_function,
             proxy=False,
-            request_templates={"application/json": '{"prompt": "$input.params(\'prompt\')"}'},
+            request_templates={"application/json": (
+                '{"prompt": "$input.params(\'prompt\')", '
+                '"mode": "$input.params(\'mode\')", '
+                '"seed": "$input.params(\'seed\')"}'
+            )},
             integration_responses=[
                 apigw.IntegrationResponse(
                     status_code="200",
@@ -95,7 +108,9 @@ class ImageGenerationStack(Stack):
             "GET", 
             lambda_integration,
             request_parameters={
-                "method.request.querystring.prompt": True  # Make prompt query parameter required
+                "method.request.querystring.prompt": True,  # Make prompt query parameter required
+                "method.request.querystring.mode": False,   # "preview" for small previews
+                "method.request.querystring.seed": False    # Finalize a preview at full size
             },
             method_responses=[
                 apigw.MethodResponse(
@@ -105,4 +120,131 @@ class ImageGenerationStack(Stack):
                     }
                 )
             ]
-        )
\ No newline at end of file
+        )
+
+        # ------------------------------------------------------------------
+        # Async job API (lambda/jobs.py) - for generations that can outlast
+        # API Gateway's 29 s integration timeout:
+        #   POST /jobs -> job id (202), SQS-driven worker, GET /jobs/{job_id}
+        # ------------------------------------------------------------------
+        image_jobs_table = dynamodb.Table(
+            self, "ImageJobsTable",
+            partition_key=dynamodb.Attribute(name="job_id", type=dynamodb.AttributeType.STRING),
+            billing_mode=dynamodb.BillingMode.PAY_PER_REQUEST,
+            time_to_live_attribute="expires_at",
+            removal_policy=RemovalPolicy.DESTROY
+        )
+
+        image_jobs_dlq = sqs.Queue(
+            self, "ImageJobsDeadLetterQueue",
+            retention_period=Duration.days(14)
+        )
+
+        jobs_max_receive_count = 3
+        image_jobs_queue = sqs.Queue(
+            self, "ImageJobsQueue",
+            visibility_timeout=Duration.seconds(300),  # Longer than the worker timeout
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=jobs_max_receive_count, queue=image_jobs_dlq)
+        )
+
+        # Batch jobs (many prompts x variants, lambda/batch.py) run much longer
+        batch_max_receive_count = 2
+        image_batch_queue = sqs.Queue(
+            self, "ImageBatchQueue",
+            visibility_timeout=Duration.minutes(16),  # Longer than the batch worker timeout
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=batch_max_receive_count, queue=image_jobs_dlq)
+        )
+
+        jobs_environment = {
+            "IMAGE_SOURCE_BUCKET": image_source_bucket.bucket_name,
+            "IMAGE_JOBS_TABLE": image_jobs_table.table_name,
+            "IMAGE_JOBS_QUEUE_URL": image_jobs_queue.queue_url,
+            "IMAGE_BATCH_QUEUE_URL": image_batch_queue.queue_url,
+            "IMAGE_BATCH_MAX_WORKERS": "4",
+            # Workers mark a job FAILED on its last delivery instead of leaving it RUNNING
+            "IMAGE_JOBS_MAX_RECEIVE_COUNT": str(jobs_max_receive_count),
+            "IMAGE_BATCH_MAX_RECEIVE_COUNT": str(batch_max_receive_count)
+        }
+
+        submit_job_function = _lambda.Function(
+            self, "SubmitImageJobFunction",
+            runtime=_lambda.Runtime.PYTHON_3_13,
+            description="Queues an image generation job and returns its id.",
+            handler="jobs.submit",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.seconds(10),
+            environment=jobs_environment
+        )
+        image_jobs_table.grant_write_data(submit_job_function)
+        image_jobs_queue.grant_send_messages(submit_job_function)
+        image_batch_queue.grant_send_messages(submit_job_function)
+
+        image_job_worker_function = _lambda.Function(
+            self, "ImageJobWorkerFunction",
+            runtime=_lambda.Runtime.PYTHON_3_13,
+            description="Generates images for queued jobs.",
+            handler="jobs.worker",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.seconds(240),
+            environment=jobs_environment
+        )
+        image_job_worker_function.add_event_source(
+            lambda_event_sources.SqsEventSource(image_jobs_queue, batch_size=1)
+        )
+        image_jobs_table.grant_read_write_data(image_job_worker_function)
+        image_source_bucket.grant_read_write(image_job_worker_function)
+        image_job_worker_function.add_to_role_policy(iam.PolicyStatement(
+            actions=["bedrock:InvokeModel"],
+            resources=["*"]
+        ))
+
+        image_batch_worker_function = _lambda.Function(
+            self, "ImageBatchWorkerFunction",
+            runtime=_lambda.Runtime.PYTHON_3_13,
+            description="Generates the images of queued batch jobs with parallel Bedrock calls.",
+            handler="jobs.batch_worker",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.minutes(15),
+            memory_size=1024,
+            environment=jobs_environment
+        )
+        image_batch_worker_function.add_event_source(
+            lambda_event_sources.SqsEventSource(image_batch_queue, batch_size=1)
+        )
+        image_jobs_table.grant_read_write_data(image_batch_worker_function)
+        image_source_bucket.grant_read_write(image_batch_worker_function)
+        image_batch_worker_function.add_to_role_policy(iam.PolicyStatement(
+            actions=["bedrock:InvokeModel"],
+            resources=["*"]
+        ))
+
+        # Jobs whose workers timed out on every attempt end up here - mark them FAILED
+        dead_letter_function = _lambda.Function(
+            self, "ImageJobDeadLetterFunction",
+            runtime=_lambda.Runtime.PYTHON_3_13,
+            description="Marks image jobs FAILED when their messages reach the dead-letter queue.",
+            handler="jobs.dead_letter",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.seconds(30),
+            environment=jobs_environment
+        )
+        dead_letter_function.add_event_source(
+            lambda_event_sources.SqsEventSource(image_jobs_dlq, batch_size=10)
+        )
+        image_jobs_table.grant_read_write_data(dead_letter_function)
+
+        job_status_function = _lambda.Function(
+            self, "ImageJobStatusFunction",
+            runtime=_lambda.Runtime.PYTHON_3_13,
+            description="Returns the status (and image URL) of an image generation job.",
+            handler="jobs.status",
+            code=_lambda.Code.from_asset("lambda"),
+            timeout=Duration.seconds(10),
+            environment=jobs_environment
+        )
+        image_jobs_table.grant_read_data(job_status_function)
+        image_source_bucket.grant_read(job_status_function)
+
+        jobs_resource = api.root.add_resource("jobs")
+        jobs_resource.add_method("POST", apigw.LambdaIntegration(submit_job_function))
+        jobs_resource.add_resource("{job_id}").add_method("GET", apigw.LambdaIntegration(job_status_function))
@@ -0,0 +1,146 @@
+"""
+Batch image generation: many prompts x variants in one job.
+
+Titan returns up to 5 images per call (numberOfImages), so each prompt's
+variants are split into calls of at most 5 images. Every call gets its own
+random seed (distinct within a prompt), so variants never repeat and running
+the same batch again gives new images. The calls run in parallel on a bounded
+thread pool and every image is streamed straight to S3
+(index.generate_images_to_s3).
+
+The images of one call share its seed: an image is reproduced by the same
+prompt, seed and number_of_images, taking the image at image_index in the
+response. The manifest, stored next to the images, records all three:
+
+    batches/<shard>/<batch_id>/manifest.json
+    {"batch_id": "...", "model_id": "...", "variants": 3, "image_count": 6,
+     "prompts": [{"prompt": "...", "images": [{"key": "...", "seed": 1803322571,
+                  "number_of_images": 3, "image_index": 0, "size": 123}], "errors": []}, ...]}
+
+A failed call (e.g. a blocked prompt) is recorded in that prompt's "errors"
+instead of failing the whole batch.
+
+Like single images (image_keys.py), every batch sits under a 2-hex-character
+prefix hashed from its id, so concurrent batches spread over 256 prefixes:
+batches/7f/<batch_id>/000-00.png. Names inside a batch are unique by
+construction (prompt index + variant).
+"""
+import json
+import logging
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from botocore.exceptions import ClientError
+
+import image_keys
+import index
+
+logger = logging.getLogger(__name__)
+
+MAX_IMAGES_PER_CALL = 5  # Titan Image Generator G1 limit for numberOfImages
+MAX_WORKERS = int(os.environ.get('IMAGE_BATCH_MAX_WORKERS', '4'))  # Parallel Bedrock calls per batch
+MAX_PROMPTS = int(os.environ.get('IMAGE_BATCH_MAX_PROMPTS', '50'))
+MAX_VARIANTS = int(os.environ.get('IMAGE_BATCH_MAX_VARIANTS', '10'))
+BATCH_PREFIX = 'batches/'
+
+
+def validate(prompts, variants):
+    """Error message for an invalid batch request, or None."""
+    if not isinstance(prompts, list) or not prompts:
+        return 'prompts must be a non-empty list'
+    if len(prompts) > MAX_PROMPTS:
+        return f'at most {MAX_PROMPTS} prompts per batch'
+    if not all(isinstance(prompt, str) and prompt.strip() for prompt in prompts):
+        return 'every prompt must be a non-empty string'
+    if not isinstance(variants, int) or not 1 <= variants <= MAX_VARIANTS:
+        return f'variants must be between 1 and {MAX_VARIANTS}'
+    return None
+
+
+def plan_calls(prompts, variants):
+    """
+    One entry per Bedrock call: which prompt, which variants and the seed.
+
+    Seeds are random and distinct within a prompt.
+    """
+    calls = []
+    for prompt_index, prompt in enumerate(prompts):
+        first_variants = range(0, variants, MAX_IMAGES_PER_CALL)
+        seeds = random.sample(range(index.MAX_SEED + 1), len(first_variants))
+        for first_variant, seed in zip(first_variants, seeds):
+            calls.append({
+                'prompt_index': prompt_index,
+                'prompt': prompt,
+                'first_variant': first_variant,
+                'count': min(MAX_IMAGES_PER_CALL, variants - first_variant),
+                'seed': seed
+            })
+    return calls
+
+
+def batch_prefix(batch_id):
+    return f"{BATCH_PREFIX}{image_keys.shard(batch_id)}/{batch_id}/"
+
+
+def image_key(batch_id, prompt_index, variant):
+    return f"{batch_prefix(batch_id)}{prompt_index:03d}-{variant:02d}.png"
+
+
+def manifest_key(batch_id):
+    return f"{batch_prefix(batch_id)}manifest.json"
+
+
+def _run_call(batch_id, call, bucket_name, model_id):
+    body = index.build_request_body(call['prompt'], number_of_images=call['count'], seed=call['seed'])
+    keys = [image_key(batch_id, call['prompt_index'], call['first_variant'] + i) for i in range(call['count'])]
+    sizes = index.generate_images_to_s3(model_id, body, bucket_name, keys)
+    return [
+        {'key': key, 'seed': call['seed'], 'number_of_images': call['count'], 'image_index': position, 'size': size}
+        for position, (key, size) in enumerate(zip(keys, sizes))
+    ]
+
+
+def run_batch(batch_id, prompts, variants, bucket_name, model_id=index.MODEL_ID, max_workers=MAX_WORKERS):
+    """
+    Generate every prompt x variant, store the manifest in S3 and return it.
+    """
+    calls = plan_calls(prompts, variants)
+    entries = [{'prompt': prompt, 'images': [], 'errors': []} for prompt in prompts]
+    logger.info("Batch %s: %d prompts x %d variants in %d calls", batch_id, len(prompts), variants, len(calls))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls)))) as pool:
+        futures = {pool.submit(_run_call, batch_id, call, bucket_name, model_id): call for call in calls}
+        for future in as_completed(futures):
+            entry = entries[futures[future]['prompt_index']]
+            try:
+                entry['images'].extend(future.result())
+            except index.ImageError as err:
+                entry['errors'].append(err.message)
+            except ClientError as err:
+                entry['errors'].append(err.response["Error"]["Message"])
+
+    for entry in entries:
+        entry['images'].sort(key=lambda image: image['key'])
+
+    manifest = {
+        'batch_id': batch_id,
+        'model_id': model_id,
+        'variants': variants,
+        'image_count': sum(len(entry['images']) for entry in entries),
+        'prompts': entries
+    }
+    index.client_s3.put_object(
+        Bucket=bucket_name,
+        Key=manifest_key(batch_id),
+        Body=json.dumps(manifest).encode('utf-8'),
+        ContentType='application/json'
+    )
+    logger.info("Batch %s: %d images stored", batch_id, manifest['image_count'])
+    return manifest
+
+
+def load_manifest(bucket_name, batch_id):
+    """The stored manifest of a finished batch."""
+    response = index.client_s3.get_object(Bucket=bucket_name, Key=manifest_key(batch_id))
+    return json.loads(response['Body'].read())
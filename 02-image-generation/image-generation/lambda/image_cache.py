@@ -0,0 +1,104 @@
+"""
+Content-addressed S3 cache for Titan image generation results.
+
+The request body pins every generation parameter (prompt, size, cfgScale and a
+fixed seed), so the same model id + body always produces the same image. The
+image itself is stored like any other result, under a ULID key (image_keys.py)
+that never expires. The cache only holds a small pointer to it, under a key
+derived from a hash of exactly those inputs:
+
+    cache/ab/cd/<sha>.json   {"image_key": "images/7f/01HZX3Q4V6N8J2K5M9P0R1S2T3.png"}
+
+A repeat request reads the pointer and returns the image without invoking
+Bedrock. Pointers expire after 30 days (bucket lifecycle rule); that only
+costs a new generation, never an image a caller still holds a link to.
+
+Hits and misses are written as CloudWatch Embedded Metric Format log lines
+(namespace ImageGeneration, metrics CacheHit / CacheMiss per ModelId), so the
+hit rate can be graphed without extra API calls.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+CACHE_ENABLED = os.environ.get('IMAGE_CACHE_ENABLED', 'true').lower() == 'true'
+CACHE_PREFIX = os.environ.get('IMAGE_CACHE_PREFIX', 'cache/')
+METRICS_NAMESPACE = 'ImageGeneration'
+
+# Per container (a warm Lambda serves many requests)
+_hits = 0
+_misses = 0
+
+
+def canonical_body(body):
+    """Same JSON regardless of key order or whitespace."""
+    return json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+
+
+def cache_key(model_id, body):
+    """Pointer key for a request: sha256 of model id + canonical body, sharded by the first hash bytes."""
+    digest = hashlib.sha256(f"{model_id}\n{canonical_body(body)}".encode('utf-8')).hexdigest()
+    return f"{CACHE_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}.json"
+
+
+def exists(s3_client, bucket_name, key):
+    """True if the cached image is already in the bucket."""
+    try:
+        s3_client.head_object(Bucket=bucket_name, Key=key)
+        return True
+    except ClientError as err:
+        if err.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def lookup(s3_client, bucket_name, key):
+    """S3 key of the cached image, or None if there is no pointer or its image is gone."""
+    try:
+        pointer = json.loads(s3_client.get_object(Bucket=bucket_name, Key=key)['Body'].read())
+    except ClientError as err:
+        if err.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    image_key = pointer.get('image_key')
+    return image_key if image_key and exists(s3_client, bucket_name, image_key) else None
+
+
+def store(s3_client, bucket_name, key, image_key):
+    """Point the cache entry at a freshly generated image."""
+    s3_client.put_object(
+        Bucket=bucket_name,
+        Key=key,
+        Body=json.dumps({'image_key': image_key}).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def record(hit, model_id):
+    """Count a lookup and emit it as an EMF metric line."""
+    global _hits, _misses
+    if hit:
+        _hits += 1
+    else:
+        _misses += 1
+
+    print(json.dumps({
+        "_aws": {
+            "Timestamp": int(time.time() * 1000),
+            "CloudWatchMetrics": [{
+                "Namespace": METRICS_NAMESPACE,
+                "Dimensions": [["ModelId"]],
+                "Metrics": [{"Name": "CacheHit", "Unit": "Count"}, {"Name": "CacheMiss", "Unit": "Count"}],
+            }],
+        },
+        "ModelId": model_id,
+        "CacheHit": 1 if hit else 0,
+        "CacheMiss": 0 if hit else 1,
+    }))
+    logger.info("Image cache %s (container hit rate %d/%d)", "hit" if hit else "miss", _hits, _hits + _misses)
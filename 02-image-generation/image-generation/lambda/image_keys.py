@@ -0,0 +1,43 @@
+"""
+S3 keys for generated images.
+
+Keys used to be 'imageName' + strftime('%Y-%M-%D-%M-%S'): %M is minutes (not
+the month) and %D expands to mm/dd/yy, so two images generated in the same
+second overwrote each other, and every key shared one timestamp-shaped prefix.
+
+Each image now gets a ULID (48-bit millisecond timestamp + 80 random bits,
+Crockford base32, so ids sort by creation time) under a short prefix taken
+from a hash of the id:
+
+    images/7f/01HZX3Q4V6N8J2K5M9P0R1S2T3.png
+
+The hashed prefix spreads writes evenly over 256 prefixes, and S3 request-rate
+limits apply per prefix.
+"""
+import hashlib
+import os
+import time
+
+IMAGE_PREFIX = os.environ.get('IMAGE_KEY_PREFIX', 'images/')
+SHARD_CHARS = 2  # 2 hex chars = 256 prefixes
+
+_CROCKFORD = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+
+
+def new_ulid(timestamp_ms=None):
+    """A 26-character ULID; unique without any coordination between invocations."""
+    if timestamp_ms is None:
+        timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & ((1 << 48) - 1)) << 80 | int.from_bytes(os.urandom(10), 'big')
+    return ''.join(_CROCKFORD[(value >> shift) & 31] for shift in range(125, -1, -5))
+
+
+def shard(image_id):
+    """Hashed prefix for an id (the ULID itself starts with the timestamp, so it would hot-spot)."""
+    return hashlib.sha256(image_id.encode('utf-8')).hexdigest()[:SHARD_CHARS]
+
+
+def new_image_key(extension='png', prefix=IMAGE_PREFIX):
+    """Fresh, collision-free S3 key for a generated image."""
+    image_id = new_ulid()
+    return f"{prefix}{shard(image_id)}/{image_id}.{extension}"
@@ -0,0 +1,169 @@
+"""
+Streaming decoder for Titan image responses.
+
+The response body is JSON: {"images": ["<base64 PNG>", ...], "error": null}.
+Reading it with json.loads keeps several full copies of every image in memory
+(raw body, parsed string, ASCII bytes, decoded bytes). ImageResponseStream
+reads the body in small chunks instead:
+
+- each base64 string in "images" is exposed as a file-like object that decodes
+  on the fly, so it can go straight into s3.upload_fileobj()
+- everything else (a few bytes) is kept with the images replaced by "" and
+  parsed at the end to read the "error" field
+
+    stream = ImageResponseStream(response["body"])
+    for image in stream.images():
+        s3.upload_fileobj(image, bucket, key)
+    stream.check_error()
+"""
+import base64
+import io
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+_IMAGES_ARRAY = re.compile(rb'"images"\s*:\s*\[')
+
+
+class ImageError(Exception):
+    "Error returned by Amazon Titan Image Generator (or a malformed response)"
+
+    def __init__(self, message):
+        self.message = message
+
+
+class ImageResponseStream:
+    """Incremental parser for one invoke_model response body."""
+
+    def __init__(self, body, chunk_size=CHUNK_SIZE):
+        self._body = body
+        self._chunk_size = chunk_size
+        self._buffer = bytearray()      # Raw bytes read but not consumed yet
+        self._skeleton = bytearray()    # The JSON with every image string replaced by ""
+        self._eof = False
+        self._in_array = False
+        self._array_done = False
+        self._current = None
+
+    def _fill(self):
+        """Read the next chunk into the buffer; False at end of body."""
+        if self._eof:
+            return False
+        chunk = self._body.read(self._chunk_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer += chunk
+        return True
+
+    def _open_array(self):
+        """Consume up to and including '"images": [' (False if the response has no images)."""
+        searched = 0
+        while True:
+            match = _IMAGES_ARRAY.search(self._buffer, max(0, searched - 16))
+            if match:
+                self._skeleton += self._buffer[:match.end()]
+                del self._buffer[:match.end()]
+                return True
+            searched = len(self._buffer)
+            if not self._fill():
+                return False
+
+    def images(self):
+        """Yield one file-like object per image; each must be read to the end before the next."""
+        if not self._in_array:
+            self._in_array = True
+            if not self._open_array():
+                self._array_done = True
+                return
+        while not self._array_done:
+            if self._current is not None and not self._current.finished:
+                raise RuntimeError("Read the previous image to the end first")
+            # Copy separators (whitespace, commas) until the next string or the end of the array
+            while True:
+                if not self._buffer and not self._fill():
+                    raise ImageError("Truncated response: images array not closed")
+                char = self._buffer[:1]
+                if char == b'"':
+                    del self._buffer[:1]
+                    self._skeleton += b'""'
+                    self._current = _Base64Image(self)
+                    break
+                del self._buffer[:1]
+                self._skeleton += char
+                if char == b']':
+                    self._array_done = True
+                    return
+            yield self._current
+
+    def finish(self):
+        """Read the rest of the body; returns the response JSON (images as empty strings)."""
+        if self._current is not None:
+            self._current.skip()
+        for image in self.images():
+            image.skip()
+        while self._fill():
+            pass
+        self._skeleton += self._buffer
+        self._buffer.clear()
+        try:
+            return json.loads(bytes(self._skeleton))
+        except json.JSONDecodeError as e:
+            raise ImageError(f"Failed to parse response: {e}")
+
+    def check_error(self):
+        """Raise ImageError if the response reports an error."""
+        response = self.finish()
+        if response.get("error") is not None:
+            raise ImageError(f"Image generation error. Error is {response['error']}")
+        return response
+
+
+class _Base64Image(io.RawIOBase):
+    """Decoded bytes of one base64 string, produced as they are read."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._pending = b""             # Base64 characters not yet a multiple of 4
+        self._decoded = bytearray()
+        self.finished = False           # Closing quote reached
+        self.size = 0
+
+    def readable(self):
+        return True
+
+    def _decode_more(self):
+        stream = self._stream
+        if not stream._buffer and not stream._fill():
+            raise ImageError("Truncated response inside an image")
+        end = stream._buffer.find(b'"')
+        part = bytes(stream._buffer[:end if end >= 0 else len(stream._buffer)])
+        del stream._buffer[:end + 1 if end >= 0 else len(stream._buffer)]
+
+        # JSON may escape "/" as "\/"; base64 never contains a backslash
+        data = self._pending + part.replace(b"\\", b"")
+        if end >= 0:
+            self.finished = True
+            usable = len(data)
+        else:
+            usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        if usable:
+            decoded = base64.b64decode(data[:usable])
+            self._decoded += decoded
+            self.size += len(decoded)
+
+    def readinto(self, target):
+        while not self._decoded and not self.finished:
+            self._decode_more()
+        count = min(len(target), len(self._decoded))
+        target[:count] = self._decoded[:count]
+        del self._decoded[:count]
+        return count
+
+    def skip(self):
+        """Discard the rest of this image."""
+        while not self.finished:
+            self._decode_more()
+            self._decoded.clear()
+        self._decoded.clear()
@@ -1,121 +1,258 @@
 """
 Shows how to generate an image from a text prompt with the Amazon Titan Image Generator G1 model (on demand).
 """
-import base64
-import io
 import json
 import logging
 import boto3
 import os
+import random
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 from botocore.exceptions import ClientError
 client_s3 = boto3.client('s3')
-import datetime
+bedrock = boto3.client(service_name='bedrock-runtime')
 
-class ImageError(Exception):
-    "Custom exception for errors returned by Amazon Titan Image Generator G1"
-
-    def __init__(self, message):
-        self.message = message
+import image_cache
+import image_keys
+from image_stream import ImageError, ImageResponseStream
 
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def generate_image(model_id, body):
+def invoke_model(model_id, body):
+    """
+    Call Titan and return the (unread) streaming response body.
+    """
+    response = bedrock.invoke_model(
+        body=body, modelId=model_id, accept="application/json", contentType="application/json"
+    )
+    return response["body"]
+
+
+def generate_images_to_s3(model_id, body, bucket_name, image_names):
     """
-    Generate an image using Amazon Titan Image Generator G1 model on demand.
+    Generate images using Amazon Titan Image Generator G1 model on demand and
+    upload them to S3 while the response is still being read.
+
+    Each base64 image is decoded chunk by chunk straight into upload_fileobj()
+    (image_stream.py), so the Lambda never holds the whole JSON response, the
+    base64 string and the decoded image at the same time.
     Args:
         model_id (str): The model ID to use.
         body (str) : The request body to use.
+        bucket_name (str): Destination bucket.
+        image_names (list): Destination keys, one per requested image.
     Returns:
-        image_bytes (bytes): The image generated by the model.
+        sizes (list): Size of each stored PNG in bytes.
     """
 
     logger.info(
         "Generating image with Amazon Titan Image Generator G1 model %s", model_id)
 
-    bedrock = boto3.client(service_name='bedrock-runtime')
+    stream = ImageResponseStream(invoke_model(model_id, body))
+    sizes = []
+    for image_name, image in zip(image_names, stream.images()):
+        client_s3.upload_fileobj(image, bucket_name, image_name, ExtraArgs={'ContentType': 'image/png'})
+        sizes.append(image.size)
 
-    accept = "application/json"
-    content_type = "application/json"
+    try:
+        stream.check_error()
+        if not sizes:
+            raise ImageError("No images returned in response")
+    except ImageError:
+        for image_name in image_names[:len(sizes)]:
+            client_s3.delete_object(Bucket=bucket_name, Key=image_name)
+        raise
 
-    response = bedrock.invoke_model(
-        body=body, modelId=model_id, accept=accept, contentType=content_type
-    )
-    response_body = json.loads(response.get("body").read())
+    logger.info(
+        "Successfully generated %d image(s) with Amazon Titan Image Generator G1 model %s (%d bytes)",
+        len(sizes), model_id, sum(sizes))
 
-    base64_image = response_body.get("images")[0]
-    base64_bytes = base64_image.encode('ascii')
-    image_bytes = base64.b64decode(base64_bytes)
+    return sizes
 
-    finish_reason = response_body.get("error")
 
-    if finish_reason is not None:
-        raise ImageError(f"Image generation error. Error is {finish_reason}")
+def generate_image_to_s3(model_id, body, bucket_name, image_name):
+    """
+    Single-image generate_images_to_s3(); returns the size of the stored PNG.
+    """
+    return generate_images_to_s3(model_id, body, bucket_name, [image_name])[0]
 
-    logger.info(
-        "Successfully generated image with Amazon Titan Image Generator G1 model %s", model_id)
 
-    return image_bytes
+def log_invocation_stats(started):
+    """Duration and peak memory of this invocation (ru_maxrss is in KB on Linux)."""
+    logger.info("Invocation took %.2fs, peak memory %.1f MB",
+                time.perf_counter() - started,
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
 
 
-def index(event, context):
+MODEL_ID = 'amazon.titan-image-generator-v1'
+
+
+# Preview mode: small, standard-quality images with random seeds to iterate on a prompt;
+# the chosen one is then regenerated at full size with the same prompt and seed
+PREVIEW_SIZE = 512  # Smallest square size Titan G1 supports (billed at the lower resolution tier)
+PREVIEW_COUNT = max(1, int(os.environ.get('IMAGE_PREVIEW_COUNT', '1')))  # At least one preview
+PREVIEW_PREFIX = 'previews/'
+MAX_SEED = 2147483646
+
+
+def parse_seed(value):
     """
-    Entrypoint for Amazon Titan Image Generator G1 example.
+    Seed from a request parameter ("" or missing = 0).
+    Returns None unless it is an integer between 0 and MAX_SEED.
     """
+    if value is None or value == '':
+        return 0
+    try:
+        seed = int(value)
+    except (TypeError, ValueError):
+        return None
+    return seed if 0 <= seed <= MAX_SEED else None
 
-    logging.basicConfig(level=logging.INFO,
-                        format="%(levelname)s: %(message)s")
 
-    model_id = 'amazon.titan-image-generator-v1'
+def build_request_body(prompt, number_of_images=1, seed=0, size=1024, quality=None):
+    """
+    Titan text-to-image request for one prompt (square, fixed cfgScale).
+    A fixed seed makes the result reproducible (and cacheable).
+    """
+    config = {
+        "numberOfImages": number_of_images,
+        "height": size,
+        "width": size,
+        "cfgScale": 8.0,
+        "seed": seed
+    }
+    if quality:
+        config["quality"] = quality
+    return json.dumps({
+        "taskType": "TEXT_IMAGE",
+        "textToImageParams": {
+            "text": prompt
+        },
+        "imageGenerationConfig": config
+    })
+
 
-    prompt=event['prompt']
+def generate_and_store(prompt, bucket_name, model_id=MODEL_ID, seed=0):
+    """
+    Generate the image for a prompt (or find it in the cache) and store it in S3.
+    Used by the synchronous API and by the async job worker (jobs.py).
+    Finalizing a preview passes the preview's seed.
+    Returns:
+        image_name (str): S3 key of the image.
+    """
+    body = build_request_body(prompt, seed=seed)
 
+    # Same model + body = same image, so a cached copy is returned without calling Bedrock
+    image_name = None
+    if image_cache.CACHE_ENABLED:
+        pointer_key = image_cache.cache_key(model_id, body)
+        image_name = image_cache.lookup(client_s3, bucket_name, pointer_key)
+        image_cache.record(image_name is not None, model_id)
+
+    if image_name is None:
+        # Results always get a fresh, non-expiring key; the cache only points at them
+        image_name = image_keys.new_image_key()
+        generate_image_to_s3(model_id, body, bucket_name, image_name)
+        if image_cache.CACHE_ENABLED:
+            image_cache.store(client_s3, bucket_name, pointer_key, image_name)
+        print("Image generated successfully.")
+
+    return image_name
+
+
+def generate_previews(prompt, bucket_name, model_id=MODEL_ID, count=PREVIEW_COUNT):
+    """
+    Generate a few small previews, each with its own random seed (one call per
+    preview, in parallel, so every preview can be reproduced from its seed).
+    Raises:
+        ValueError: count is less than 1.
+    Returns:
+        previews (list): [{"seed": int, "image_name": str}]
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    seeds = random.sample(range(MAX_SEED + 1), count)
+
+    def generate(seed):
+        body = build_request_body(prompt, seed=seed, size=PREVIEW_SIZE, quality="standard")
+        image_name = image_keys.new_image_key(prefix=PREVIEW_PREFIX)
+        generate_image_to_s3(model_id, body, bucket_name, image_name)
+        return {"seed": seed, "image_name": image_name}
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(generate, seeds))
+
+
+def presigned_url(bucket_name, image_name):
+    """Temporary (1 hour) download link for a stored image."""
+    return client_s3.generate_presigned_url(
+            'get_object', 
+            Params={
+                    'Bucket':bucket_name,
+                    'Key':image_name
+                },
+            ExpiresIn=3600
+        )
+
+
+def get_bucket_name():
     # Get bucket name from environment variable
     bucket_name = os.environ.get('IMAGE_SOURCE_BUCKET')
     if not bucket_name:
         raise ValueError("IMAGE_SOURCE_BUCKET environment variable not set")
+    return bucket_name
 
-    #prompt = """A photograph of a cup of coffee from the side."""
 
-    body = json.dumps({
-        "taskType": "TEXT_IMAGE",
-        "textToImageParams": {
-            "text": prompt
-        },
-        "imageGenerationConfig": {
-            "numberOfImages": 1,
-            "height": 1024,
-            "width": 1024,
-            "cfgScale": 8.0,
-            "seed": 0
+def index(event, context):
+    """
+    Entrypoint for Amazon Titan Image Generator G1 example (synchronous API).
+    Generations that may take longer than API Gateway's 29 s limit should use
+    the job API instead (jobs.py: POST /jobs, GET /jobs/{job_id}).
+
+    ?mode=preview returns small previews as [{"seed", "url"}]; passing one of
+    those seeds (?seed=...) generates the final full-size image.
+    """
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(levelname)s: %(message)s")
+    started = time.perf_counter()
+
+    model_id = MODEL_ID
+
+    prompt=event['prompt']
+
+    bucket_name = get_bucket_name()
+
+    seed = parse_seed(event.get('seed'))
+    if seed is None:
+        return {
+            'statusCode': 400,
+            'body': f'seed must be an integer between 0 and {MAX_SEED}'
         }
-    })
+
+    #prompt = """A photograph of a cup of coffee from the side."""
 
     try:
-        image_bytes = generate_image(model_id=model_id,
-                                     body=body)
-        print("Image generated successfully.")
-        print("Image bytes:", image_bytes)
-
-        image_name = 'imageName'+ datetime.datetime.today().strftime('%Y-%M-%D-%M-%S') + '.png'
-    
-        response_s3=client_s3.put_object(
-            Bucket=bucket_name,
-            Body=image_bytes,
-            Key=image_name)
-
-        generate_presigned_url = client_s3.generate_presigned_url(
-                'get_object', 
-                Params={
-                        'Bucket':bucket_name,
-                        'Key':image_name
-                    },
-                ExpiresIn=3600
-            )
-        print(generate_presigned_url)
+        if event.get('mode') == 'preview':
+            previews = generate_previews(prompt, bucket_name, model_id=model_id)
+            log_invocation_stats(started)
+            return {
+                'statusCode': 200,
+                'body': json.dumps([
+                    {'seed': preview['seed'], 'url': presigned_url(bucket_name, preview['image_name'])}
+                    for preview in previews
+                ])
+            }
+
+        image_name = generate_and_store(prompt, bucket_name, model_id=model_id, seed=seed)
+
+        generate_presigned_url = presigned_url(bucket_name, image_name)
+        log_invocation_stats(started)
         return {
             'statusCode': 200,
             'body': generate_presigned_url
@@ -0,0 +1,284 @@
+"""
+Asynchronous job API for image generation (escapes API Gateway's 29 s integration timeout).
+
+    POST /jobs            {"prompt": "...", "seed": 0}  -> 202 {"job_id": "...", "status": "QUEUED"}
+    POST /jobs            {"prompts": ["...", ...], "variants": 3}   (batch)
+    GET  /jobs/{job_id}                      -> {"job_id", "status", "image_url" | "manifest" | "error"}
+
+submit() records the job in DynamoDB and queues it in SQS. worker() is driven by
+the queue, generates the image with the same code as the synchronous API
+(index.generate_and_store) and stores the result on the job. Batch jobs go to
+their own queue, consumed by batch_worker() (batch.py fans the prompts out over
+parallel Bedrock calls). status() is for polling; a finished job gets fresh
+presigned URLs on every poll. dead_letter() drains the dead-letter queue, so a
+job whose every attempt crashed or timed out still ends FAILED.
+
+Job states: QUEUED -> RUNNING -> SUCCEEDED | FAILED
+"""
+import json
+import logging
+import os
+import time
+import uuid
+
+import boto3
+from botocore.exceptions import ClientError
+
+import batch
+import index
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+JOB_TTL_SECONDS = int(os.environ.get('IMAGE_JOB_TTL_SECONDS', str(7 * 24 * 3600)))  # Job records expire after a week
+# Deliveries before SQS moves a message to the dead-letter queue (must match the queues' redrive policies)
+JOBS_MAX_RECEIVE_COUNT = int(os.environ.get('IMAGE_JOBS_MAX_RECEIVE_COUNT', '3'))
+BATCH_MAX_RECEIVE_COUNT = int(os.environ.get('IMAGE_BATCH_MAX_RECEIVE_COUNT', '2'))
+# Bedrock errors that fail the same way on every retry
+PERMANENT_ERROR_CODES = {'ValidationException', 'AccessDeniedException', 'ResourceNotFoundException'}
+FINISHED_STATES = {'SUCCEEDED', 'FAILED'}
+
+dynamodb = boto3.resource('dynamodb')
+sqs = boto3.client('sqs')
+
+
+def jobs_table():
+    return dynamodb.Table(os.environ['IMAGE_JOBS_TABLE'])
+
+
+def api_response(status_code, body):
+    """API Gateway proxy integration response."""
+    return {
+        'statusCode': status_code,
+        'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(body)
+    }
+
+
+def update_job(table, job_id, status, **fields):
+    """Set a job's status (plus any extra attributes)."""
+    fields['status'] = status
+    table.update_item(
+        Key={'job_id': job_id},
+        UpdateExpression='SET ' + ', '.join(f'#{name} = :{name}' for name in fields),
+        ExpressionAttributeNames={f'#{name}': name for name in fields},
+        ExpressionAttributeValues={f':{name}': value for name, value in fields.items()}
+    )
+
+
+def is_final_attempt(err, record, max_receive_count):
+    """True if retrying err is pointless: a permanent Bedrock error, or SQS won't redeliver."""
+    if isinstance(err, ClientError) and err.response['Error']['Code'] in PERMANENT_ERROR_CODES:
+        return True
+    return int(record.get('attributes', {}).get('ApproximateReceiveCount', '1')) >= max_receive_count
+
+
+def error_message(err):
+    if isinstance(err, ClientError):
+        return err.response['Error']['Message']
+    return str(err) or type(err).__name__
+
+
+def submit(event, context):
+    """
+    POST /jobs - queue a generation (or a batch) and return its job id right away.
+    """
+    try:
+        request = json.loads(event.get('body') or '{}')
+    except json.JSONDecodeError:
+        return api_response(400, {'error': 'Body must be JSON: {"prompt": "..."}'})
+
+    if 'prompts' in request:
+        return submit_batch(request)
+
+    prompt = (request.get('prompt') or '').strip()
+    if not prompt:
+        return api_response(400, {'error': 'prompt is required'})
+    # Finalizing a preview (index.generate_previews) passes the preview's seed
+    seed = request.get('seed', 0)
+    if not isinstance(seed, int) or not 0 <= seed <= index.MAX_SEED:
+        return api_response(400, {'error': f'seed must be an integer between 0 and {index.MAX_SEED}'})
+
+    job_id = uuid.uuid4().hex
+    now = int(time.time())
+    jobs_table().put_item(Item={
+        'job_id': job_id,
+        'status': 'QUEUED',
+        'prompt': prompt,
+        'seed': seed,
+        'created_at': now,
+        'expires_at': now + JOB_TTL_SECONDS
+    })
+    sqs.send_message(
+        QueueUrl=os.environ['IMAGE_JOBS_QUEUE_URL'],
+        MessageBody=json.dumps({'job_id': job_id, 'prompt': prompt, 'seed': seed})
+    )
+    logger.info("Queued image job %s", job_id)
+
+    return api_response(202, {'job_id': job_id, 'status': 'QUEUED'})
+
+
+def submit_batch(request):
+    """
+    Batch request: {"prompts": [...], "variants": n} - queued for batch_worker().
+    """
+    prompts = request.get('prompts')
+    variants = request.get('variants', 1)
+    error = batch.validate(prompts, variants)
+    if error:
+        return api_response(400, {'error': error})
+
+    prompts = [prompt.strip() for prompt in prompts]
+    job_id = uuid.uuid4().hex
+    now = int(time.time())
+    jobs_table().put_item(Item={
+        'job_id': job_id,
+        'kind': 'batch',
+        'status': 'QUEUED',
+        'prompts': prompts,
+        'variants': variants,
+        'created_at': now,
+        'expires_at': now + JOB_TTL_SECONDS
+    })
+    sqs.send_message(
+        QueueUrl=os.environ['IMAGE_BATCH_QUEUE_URL'],
+        MessageBody=json.dumps({'job_id': job_id, 'prompts': prompts, 'variants': variants})
+    )
+    logger.info("Queued batch job %s (%d prompts x %d variants)", job_id, len(prompts), variants)
+
+    return api_response(202, {'job_id': job_id, 'status': 'QUEUED',
+                              'image_count': len(prompts) * variants})
+
+
+def worker(event, context):
+    """
+    SQS consumer - generates the image for each queued job.
+
+    Permanent failures (the prompt was blocked, a non-retryable Bedrock error)
+    and failures on the last delivery mark the job FAILED. Anything else is
+    raised so SQS retries the message.
+    """
+    table = jobs_table()
+    bucket_name = index.get_bucket_name()
+
+    for record in event['Records']:
+        job = json.loads(record['body'])
+        job_id = job['job_id']
+
+        # SQS delivers at least once - don't regenerate a finished job
+        current = table.get_item(Key={'job_id': job_id}).get('Item', {})
+        if current.get('status') in FINISHED_STATES:
+            logger.info("Image job %s already finished, skipping", job_id)
+            continue
+
+        update_job(table, job_id, 'RUNNING', started_at=int(time.time()))
+
+        started = time.perf_counter()
+        try:
+            image_name = index.generate_and_store(job['prompt'], bucket_name, seed=job.get('seed', 0))
+        except index.ImageError as err:
+            logger.error("Image job %s failed: %s", job_id, err.message)
+            update_job(table, job_id, 'FAILED', error=err.message, finished_at=int(time.time()))
+            continue
+        except Exception as err:
+            if not is_final_attempt(err, record, JOBS_MAX_RECEIVE_COUNT):
+                raise
+            logger.exception("Image job %s failed, not retrying", job_id)
+            update_job(table, job_id, 'FAILED', error=error_message(err), finished_at=int(time.time()))
+            continue
+
+        update_job(table, job_id, 'SUCCEEDED', image_key=image_name, finished_at=int(time.time()))
+        logger.info("Image job %s finished", job_id)
+        index.log_invocation_stats(started)
+
+
+def batch_worker(event, context):
+    """
+    SQS consumer for batch jobs - runs batch.run_batch() and records the manifest.
+
+    Failed prompts are listed in the manifest; the job only FAILS when no image
+    at all could be generated, or when the batch itself fails on its last delivery.
+    """
+    table = jobs_table()
+    bucket_name = index.get_bucket_name()
+
+    for record in event['Records']:
+        job = json.loads(record['body'])
+        job_id = job['job_id']
+
+        current = table.get_item(Key={'job_id': job_id}).get('Item', {})
+        if current.get('status') in FINISHED_STATES:
+            logger.info("Batch job %s already finished, skipping", job_id)
+            continue
+
+        update_job(table, job_id, 'RUNNING', started_at=int(time.time()))
+
+        started = time.perf_counter()
+        try:
+            manifest = batch.run_batch(job_id, job['prompts'], job['variants'], bucket_name)
+        except Exception as err:
+            if not is_final_attempt(err, record, BATCH_MAX_RECEIVE_COUNT):
+                raise
+            logger.exception("Batch job %s failed, not retrying", job_id)
+            update_job(table, job_id, 'FAILED', error=error_message(err), finished_at=int(time.time()))
+            continue
+        if manifest['image_count'] == 0:
+            errors = [error for entry in manifest['prompts'] for error in entry['errors']]
+            update_job(table, job_id, 'FAILED', error=errors[0] if errors else 'No images generated',
+                       finished_at=int(time.time()))
+            continue
+
+        update_job(table, job_id, 'SUCCEEDED', manifest_key=batch.manifest_key(job_id),
+                   image_count=manifest['image_count'], finished_at=int(time.time()))
+        logger.info("Batch job %s finished with %d images", job_id, manifest['image_count'])
+        index.log_invocation_stats(started)
+
+
+def dead_letter(event, context):
+    """
+    Dead-letter queue consumer - fails jobs whose attempts all crashed or timed out.
+
+    A worker that hits its Lambda timeout never gets to record the failure, so
+    without this the job would stay RUNNING until it expires.
+    """
+    table = jobs_table()
+
+    for record in event['Records']:
+        job_id = json.loads(record['body'])['job_id']
+        current = table.get_item(Key={'job_id': job_id}).get('Item')
+        if not current or current['status'] in FINISHED_STATES:
+            continue
+        logger.error("Job %s gave up after its last attempt (status %s)", job_id, current['status'])
+        update_job(table, job_id, 'FAILED', error='Generation did not finish (timed out or crashed on every attempt)',
+                   finished_at=int(time.time()))
+
+
+def status(event, context):
+    """
+    GET /jobs/{job_id} - poll a job.
+    """
+    job_id = (event.get('pathParameters') or {}).get('job_id')
+    item = jobs_table().get_item(Key={'job_id': job_id}).get('Item') if job_id else None
+    if not item:
+        return api_response(404, {'error': 'job not found'})
+
+    if item.get('kind') == 'batch':
+        body = {'job_id': job_id, 'status': item['status'], 'prompts': item['prompts'],
+                'variants': int(item['variants'])}
+    else:
+        body = {'job_id': job_id, 'status': item['status'], 'prompt': item['prompt']}
+
+    if item['status'] == 'SUCCEEDED' and 'manifest_key' in item:
+        bucket_name = index.get_bucket_name()
+        manifest = batch.load_manifest(bucket_name, job_id)
+        for entry in manifest['prompts']:
+            for image in entry['images']:
+                image['url'] = index.presigned_url(bucket_name, image['key'])
+        body['manifest'] = manifest
+        body['manifest_url'] = index.presigned_url(bucket_name, item['manifest_key'])
+    elif item['status'] == 'SUCCEEDED':
+        body['image_key'] = item['image_key']
+        body['image_url'] = index.presigned_url(index.get_bucket_name(), item['image_key'])
+    elif item['status'] == 'FAILED':
+        body['error'] = item.get('error')
+    return api_response(200, body)
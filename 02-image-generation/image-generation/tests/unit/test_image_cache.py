@@ -0,0 +1,73 @@
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket="img-bucket")
+        import index
+        importlib.reload(index)
+        monkeypatch.setattr(index.image_cache, "CACHE_ENABLED", True)
+
+        calls = []
+
+        def fake_titan(model_id, body):
+            calls.append(body)
+            image = base64.b64encode(b"png").decode()
+            return io.BytesIO(json.dumps({"images": [image], "error": None}).encode())
+
+        monkeypatch.setattr(index, "invoke_model", fake_titan)
+        index.calls = calls
+        yield index
+
+
+def stored_keys():
+    return sorted(obj["Key"] for obj in boto3.client("s3").list_objects_v2(Bucket="img-bucket")["Contents"])
+
+
+def test_results_live_under_image_keys_and_the_cache_only_points_at_them(index):
+    image_key = index.generate_and_store("a lighthouse", "img-bucket")
+    pointer_key = index.image_cache.cache_key(index.MODEL_ID, index.build_request_body("a lighthouse"))
+
+    assert image_key.startswith(index.image_keys.IMAGE_PREFIX)
+    assert pointer_key.startswith(index.image_cache.CACHE_PREFIX) and pointer_key.endswith(".json")
+    assert stored_keys() == sorted([image_key, pointer_key])
+    pointer = boto3.client("s3").get_object(Bucket="img-bucket", Key=pointer_key)["Body"].read()
+    assert json.loads(pointer) == {"image_key": image_key}
+
+
+def test_repeat_request_is_served_from_the_cache(index):
+    first = index.generate_and_store("a lighthouse", "img-bucket")
+    second = index.generate_and_store("a lighthouse", "img-bucket")
+
+    assert first == second
+    assert len(index.calls) == 1
+
+
+def test_expired_or_missing_image_is_generated_again(index):
+    first = index.generate_and_store("a lighthouse", "img-bucket")
+    boto3.client("s3").delete_object(Bucket="img-bucket", Key=first)
+
+    second = index.generate_and_store("a lighthouse", "img-bucket")
+
+    assert second != first
+    assert len(index.calls) == 2
+    assert index.image_cache.lookup(
+        index.client_s3, "img-bucket",
+        index.image_cache.cache_key(index.MODEL_ID, index.build_request_body("a lighthouse"))
+    ) == second
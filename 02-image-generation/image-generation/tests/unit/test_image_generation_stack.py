@@ -19,3 +19,41 @@ def test_sns_topic_created():
     template = assertions.Template.from_stack(stack)
 
     template.resource_count_is("AWS::SNS::Topic", 1)
+
+
+def test_image_jobs_table_created():
+    app = core.App()
+    stack = ImageGenerationStack(app, "image-generation")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::DynamoDB::Table", {
+        "KeySchema": [{"AttributeName": "job_id", "KeyType": "HASH"}],
+        "TimeToLiveSpecification": {"AttributeName": "expires_at", "Enabled": True}
+    })
+
+
+def test_image_job_worker_reads_queue():
+    app = core.App()
+    stack = ImageGenerationStack(app, "image-generation")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::Lambda::Function", {"Handler": "jobs.worker"})
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {"BatchSize": 1})
+
+
+def test_image_batch_worker_created():
+    app = core.App()
+    stack = ImageGenerationStack(app, "image-generation")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::Lambda::Function", {"Handler": "jobs.batch_worker", "Timeout": 900})
+    template.has_resource_properties("AWS::SQS::Queue", {"VisibilityTimeout": 960})
+
+
+def test_dead_letter_queue_is_drained():
+    app = core.App()
+    stack = ImageGenerationStack(app, "image-generation")
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties("AWS::Lambda::Function", {"Handler": "jobs.dead_letter"})
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {"BatchSize": 10})
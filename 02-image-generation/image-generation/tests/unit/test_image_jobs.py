@@ -0,0 +1,265 @@
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("IMAGE_SOURCE_BUCKET", "image-source-bucket")
+    monkeypatch.setenv("IMAGE_JOBS_TABLE", "image-jobs")
+
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket="image-source-bucket")
+        boto3.client("dynamodb").create_table(
+            TableName="image-jobs",
+            KeySchema=[{"AttributeName": "job_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "job_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        queue_url = boto3.client("sqs").create_queue(QueueName="image-jobs")["QueueUrl"]
+        monkeypatch.setenv("IMAGE_JOBS_QUEUE_URL", queue_url)
+        batch_queue_url = boto3.client("sqs").create_queue(QueueName="image-batches")["QueueUrl"]
+        monkeypatch.setenv("IMAGE_BATCH_QUEUE_URL", batch_queue_url)
+
+        # Clients are created at import time, so import inside the mock
+        import batch
+        import index
+        import jobs
+        importlib.reload(index)
+        importlib.reload(batch)
+        importlib.reload(jobs)
+        yield jobs
+
+
+def titan_response(image_bytes):
+    """What invoke_model returns for one image: a streaming JSON body."""
+    body = json.dumps({"images": [base64.b64encode(image_bytes).decode()], "error": None})
+    return lambda model_id, body_: io.BytesIO(body.encode())
+
+
+def receive_as_sqs_event(queue_url):
+    messages = boto3.client("sqs").receive_message(
+        QueueUrl=queue_url, MaxNumberOfMessages=10, AttributeNames=["ApproximateReceiveCount"]
+    )["Messages"]
+    return {"Records": [{"body": message["Body"], "attributes": message["Attributes"]} for message in messages]}
+
+
+def delivery(event, receive_count):
+    """The same SQS event, as the receive_count-th delivery of its messages."""
+    return {"Records": [{**record, "attributes": {"ApproximateReceiveCount": str(receive_count)}}
+                        for record in event["Records"]]}
+
+
+def bedrock_error(code):
+    def invoke_model(model_id, body):
+        raise ClientError({"Error": {"Code": code, "Message": f"{code} from Bedrock"}}, "InvokeModel")
+    return invoke_model
+
+
+def poll(jobs, job_id):
+    response = jobs.status({"pathParameters": {"job_id": job_id}}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_job_runs_through_queue(jobs, monkeypatch):
+    monkeypatch.setattr(jobs.index, "invoke_model", titan_response(b"\x89PNG image"))
+
+    response = jobs.submit({"body": json.dumps({"prompt": "a red bicycle"})}, None)
+    assert response["statusCode"] == 202
+    job_id = json.loads(response["body"])["job_id"]
+    assert poll(jobs, job_id)[1]["status"] == "QUEUED"
+
+    jobs.worker(receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"]), None)
+
+    status_code, body = poll(jobs, job_id)
+    assert status_code == 200
+    assert body["status"] == "SUCCEEDED"
+    assert body["image_url"].startswith("https://")
+    image = boto3.client("s3").get_object(Bucket="image-source-bucket", Key=body["image_key"])
+    assert image["Body"].read() == b"\x89PNG image"
+
+
+def test_blocked_prompt_marks_job_failed(jobs, monkeypatch):
+    def blocked(model_id, body):
+        raise jobs.index.ImageError("blocked by content filters")
+    monkeypatch.setattr(jobs.index, "invoke_model", blocked)
+
+    job_id = json.loads(jobs.submit({"body": json.dumps({"prompt": "something"})}, None)["body"])["job_id"]
+    jobs.worker(receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"]), None)
+
+    _, body = poll(jobs, job_id)
+    assert body["status"] == "FAILED"
+    assert body["error"] == "blocked by content filters"
+
+
+def test_submit_requires_prompt(jobs):
+    assert jobs.submit({"body": json.dumps({"prompt": "  "})}, None)["statusCode"] == 400
+    assert jobs.submit({"body": "not json"}, None)["statusCode"] == 400
+
+
+def test_unknown_job_is_404(jobs):
+    assert poll(jobs, "does-not-exist")[0] == 404
+
+
+def test_error_after_image_removes_upload(jobs, monkeypatch):
+    body = json.dumps({"images": [base64.b64encode(b"partial").decode()], "error": "filtered"})
+    monkeypatch.setattr(jobs.index, "invoke_model", lambda model_id, body_: io.BytesIO(body.encode()))
+
+    job_id = json.loads(jobs.submit({"body": json.dumps({"prompt": "something"})}, None)["body"])["job_id"]
+    jobs.worker(receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"]), None)
+
+    _, status = poll(jobs, job_id)
+    assert status["status"] == "FAILED"
+    assert "Contents" not in boto3.client("s3").list_objects_v2(Bucket="image-source-bucket")
+
+
+def fake_titan(model_id, body):
+    """One distinct image per requested variant (prompt + seed + position)."""
+    request = json.loads(body)
+    config = request["imageGenerationConfig"]
+    if "blocked" in request["textToImageParams"]["text"]:
+        return io.BytesIO(json.dumps({"images": [], "error": "blocked by content filters"}).encode())
+    images = [
+        base64.b64encode(f"{request['textToImageParams']['text']}|{config['seed'] + i}".encode()).decode()
+        for i in range(config["numberOfImages"])
+    ]
+    return io.BytesIO(json.dumps({"images": images, "error": None}).encode())
+
+
+def test_batch_job_returns_manifest(jobs, monkeypatch):
+    monkeypatch.setattr(jobs.index, "invoke_model", fake_titan)
+
+    response = jobs.submit({"body": json.dumps({"prompts": ["a red mug", "a blue mug", "blocked"],
+                                                "variants": 7})}, None)
+    assert response["statusCode"] == 202
+    job_id = json.loads(response["body"])["job_id"]
+
+    jobs.batch_worker(receive_as_sqs_event(os.environ["IMAGE_BATCH_QUEUE_URL"]), None)
+
+    _, body = poll(jobs, job_id)
+    assert body["status"] == "SUCCEEDED"
+    red, blue, blocked = body["manifest"]["prompts"]
+    assert blocked["images"] == [] and blocked["errors"]
+    s3 = boto3.client("s3")
+    for entry in (red, blue):
+        assert len(entry["images"]) == 7
+        stored = {s3.get_object(Bucket="image-source-bucket", Key=image["key"])["Body"].read()
+                  for image in entry["images"]}
+        assert len(stored) == 7
+        # Each image is reproducible from its call's seed, number_of_images and its index in the response
+        assert stored == {f"{entry['prompt']}|{image['seed'] + image['image_index']}".encode()
+                          for image in entry["images"]}
+        assert sorted((image["number_of_images"], image["image_index"]) for image in entry["images"]) == [
+            (2, 0), (2, 1), (5, 0), (5, 1), (5, 2), (5, 3), (5, 4)]
+        assert all(image["url"].startswith("https://") for image in entry["images"])
+    assert body["manifest"]["image_count"] == 14
+    shard = jobs.batch.image_keys.shard(job_id)
+    assert red["images"][0]["key"] == f"batches/{shard}/{job_id}/000-00.png"
+    assert jobs.batch.manifest_key(job_id) == f"batches/{shard}/{job_id}/manifest.json"
+
+
+def test_batch_requires_prompts(jobs):
+    assert jobs.submit({"body": json.dumps({"prompts": []})}, None)["statusCode"] == 400
+    assert jobs.submit({"body": json.dumps({"prompts": ["ok", " "]})}, None)["statusCode"] == 400
+    assert jobs.submit({"body": json.dumps({"prompts": ["ok"], "variants": 50})}, None)["statusCode"] == 400
+
+
+def test_batch_splits_variants_into_titan_calls(jobs):
+    calls = jobs.batch.plan_calls(["a", "b"], 7)
+    assert [(call["prompt_index"], call["first_variant"], call["count"]) for call in calls] == [
+        (0, 0, 5), (0, 5, 2), (1, 0, 5), (1, 5, 2)]
+    assert calls[0]["seed"] != calls[1]["seed"] and calls[2]["seed"] != calls[3]["seed"]
+    assert all(0 <= call["seed"] <= jobs.index.MAX_SEED for call in calls)
+
+
+def test_batch_seeds_are_random(jobs):
+    seeds = {tuple(call["seed"] for call in jobs.batch.plan_calls(["a"], 10)) for _ in range(5)}
+    assert len(seeds) > 1
+
+
+def test_job_finalizes_preview_seed(jobs, monkeypatch):
+    requests = []
+
+    def titan(model_id, body):
+        requests.append(json.loads(body)["imageGenerationConfig"]["seed"])
+        return titan_response(b"png")(model_id, body)
+    monkeypatch.setattr(jobs.index, "invoke_model", titan)
+
+    assert jobs.submit({"body": json.dumps({"prompt": "a lighthouse", "seed": "x"})}, None)["statusCode"] == 400
+    jobs.submit({"body": json.dumps({"prompt": "a lighthouse", "seed": 1234})}, None)
+    jobs.worker(receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"]), None)
+
+    assert requests == [1234]
+
+
+def test_non_retryable_bedrock_error_fails_job_at_once(jobs, monkeypatch):
+    monkeypatch.setattr(jobs.index, "invoke_model", bedrock_error("ValidationException"))
+
+    job_id = json.loads(jobs.submit({"body": json.dumps({"prompt": "something"})}, None)["body"])["job_id"]
+    jobs.worker(receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"]), None)
+
+    _, body = poll(jobs, job_id)
+    assert body["status"] == "FAILED"
+    assert body["error"] == "ValidationException from Bedrock"
+
+
+def test_retryable_error_is_retried_then_fails_on_last_delivery(jobs, monkeypatch):
+    monkeypatch.setattr(jobs.index, "invoke_model", bedrock_error("ThrottlingException"))
+
+    job_id = json.loads(jobs.submit({"body": json.dumps({"prompt": "something"})}, None)["body"])["job_id"]
+    event = receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"])
+
+    with pytest.raises(ClientError):
+        jobs.worker(event, None)
+    assert poll(jobs, job_id)[1]["status"] == "RUNNING"
+
+    jobs.worker(delivery(event, jobs.JOBS_MAX_RECEIVE_COUNT), None)
+    _, body = poll(jobs, job_id)
+    assert body["status"] == "FAILED"
+    assert body["error"] == "ThrottlingException from Bedrock"
+
+
+def test_batch_failing_on_last_delivery_marks_job_failed(jobs, monkeypatch):
+    def crash(*args, **kwargs):
+        raise RuntimeError("S3 unavailable")
+    monkeypatch.setattr(jobs.batch, "run_batch", crash)
+
+    job_id = json.loads(jobs.submit({"body": json.dumps({"prompts": ["a mug"]})}, None)["body"])["job_id"]
+    event = receive_as_sqs_event(os.environ["IMAGE_BATCH_QUEUE_URL"])
+
+    with pytest.raises(RuntimeError):
+        jobs.batch_worker(event, None)
+    jobs.batch_worker(delivery(event, jobs.BATCH_MAX_RECEIVE_COUNT), None)
+
+    _, body = poll(jobs, job_id)
+    assert body["status"] == "FAILED"
+    assert body["error"] == "S3 unavailable"
+
+
+def test_dead_letter_fails_unfinished_jobs_only(jobs, monkeypatch):
+    monkeypatch.setattr(jobs.index, "invoke_model", titan_response(b"png"))
+    finished = json.loads(jobs.submit({"body": json.dumps({"prompt": "done"})}, None)["body"])["job_id"]
+    jobs.worker(receive_as_sqs_event(os.environ["IMAGE_JOBS_QUEUE_URL"]), None)
+    # A worker that timed out: RUNNING, and its message was moved to the dead-letter queue
+    stuck = json.loads(jobs.submit({"body": json.dumps({"prompt": "slow"})}, None)["body"])["job_id"]
+    jobs.update_job(jobs.jobs_table(), stuck, "RUNNING")
+
+    jobs.dead_letter({"Records": [{"body": json.dumps({"job_id": job_id})} for job_id in (finished, stuck)]}, None)
+
+    assert poll(jobs, finished)[1]["status"] == "SUCCEEDED"
+    _, body = poll(jobs, stuck)
+    assert body["status"] == "FAILED"
+    assert "timed out" in body["error"]
@@ -0,0 +1,63 @@
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+import image_keys  # noqa: E402
+
+
+def test_keys_are_unique_under_concurrency():
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        keys = list(pool.map(lambda _: image_keys.new_image_key(), range(20000)))
+
+    assert len(set(keys)) == len(keys)
+    # Hashed prefixes spread the keys over (nearly) all 256 shards
+    assert len({key.split("/")[1] for key in keys}) > 250
+
+
+def test_key_layout():
+    key = image_keys.new_image_key()
+    prefix, shard, name = key.split("/")
+    image_id = name[:-len(".png")]
+
+    assert prefix + "/" == image_keys.IMAGE_PREFIX
+    assert len(image_id) == 26 and set(image_id) <= set(image_keys._CROCKFORD)
+    assert shard == image_keys.shard(image_id)
+
+
+def test_ulids_sort_by_time():
+    older = image_keys.new_ulid(timestamp_ms=1_700_000_000_000)
+    newer = image_keys.new_ulid(timestamp_ms=1_700_000_000_001)
+    assert older < newer
+    assert older[:10] == image_keys.new_ulid(timestamp_ms=1_700_000_000_000)[:10]
+
+
+def test_concurrent_uncached_generations_never_overwrite(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket="img-bucket")
+        import index
+        importlib.reload(index)
+        monkeypatch.setattr(index.image_cache, "CACHE_ENABLED", False)
+
+        # Same prompt every time: only the key scheme keeps the images apart
+        body = json.dumps({"images": [base64.b64encode(b"png").decode()], "error": None}).encode()
+        monkeypatch.setattr(index, "invoke_model", lambda model_id, request: io.BytesIO(body))
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            keys = list(pool.map(lambda _: index.generate_and_store("same prompt", "img-bucket"), range(64)))
+
+        stored = boto3.client("s3").list_objects_v2(Bucket="img-bucket")["Contents"]
+        assert len(set(keys)) == 64
+        assert sorted(obj["Key"] for obj in stored) == sorted(keys)
@@ -0,0 +1,99 @@
+import base64
+import importlib
+import io
+import json
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+
+@pytest.fixture
+def index(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("IMAGE_SOURCE_BUCKET", "image-source-bucket")
+
+    with mock_aws():
+        boto3.client("s3").create_bucket(Bucket="image-source-bucket")
+        import index
+        importlib.reload(index)
+
+        requests = []
+
+        def fake_titan(model_id, body):
+            requests.append(json.loads(body)["imageGenerationConfig"])
+            image = base64.b64encode(body.encode()).decode()
+            return io.BytesIO(json.dumps({"images": [image], "error": None}).encode())
+
+        monkeypatch.setattr(index, "invoke_model", fake_titan)
+        index.requests = requests
+        yield index
+
+
+def test_preview_generates_small_images_with_distinct_seeds(index):
+    previews = index.generate_previews("a lighthouse", "image-source-bucket", count=4)
+
+    assert len(previews) == 4
+    assert len({preview["seed"] for preview in previews}) == 4
+    assert all(config["width"] == config["height"] == index.PREVIEW_SIZE for config in index.requests)
+    assert all(config["quality"] == "standard" for config in index.requests)
+
+    keys = [obj["Key"] for obj in boto3.client("s3").list_objects_v2(Bucket="image-source-bucket")["Contents"]]
+    assert sorted(keys) == sorted(preview["image_name"] for preview in previews)
+    assert all(key.startswith(index.PREVIEW_PREFIX) for key in keys)
+
+
+def test_preview_mode_returns_urls(index):
+    response = index.index({"prompt": "a lighthouse", "mode": "preview", "seed": ""}, None)
+
+    previews = json.loads(response["body"])
+    assert len(previews) == index.PREVIEW_COUNT
+    assert all(preview["url"].startswith("https://") for preview in previews)
+    assert all(config["width"] == config["height"] == index.PREVIEW_SIZE for config in index.requests)
+    assert all(config["quality"] == "standard" for config in index.requests)
+
+
+@pytest.mark.parametrize("count", [0, -1])
+def test_preview_count_below_one_is_rejected(index, count):
+    with pytest.raises(ValueError):
+        index.generate_previews("a lighthouse", "image-source-bucket", count=count)
+    assert index.requests == []
+
+
+def test_preview_count_setting_is_at_least_one(index, monkeypatch):
+    monkeypatch.setenv("IMAGE_PREVIEW_COUNT", "0")
+    importlib.reload(index)
+    assert index.PREVIEW_COUNT == 1
+
+
+def test_finalize_reuses_preview_seed_at_full_size(index):
+    seed = json.loads(index.index({"prompt": "a lighthouse", "mode": "preview"}, None)["body"])[0]["seed"]
+    index.requests.clear()
+
+    response = index.index({"prompt": "a lighthouse", "mode": "", "seed": str(seed)}, None)
+
+    assert response["statusCode"] == 200
+    assert index.requests == [{"numberOfImages": 1, "height": 1024, "width": 1024, "cfgScale": 8.0, "seed": seed}]
+
+
+def test_default_request_is_unchanged(index):
+    # No mode/seed: same body (and cache key) as before previews existed
+    assert index.build_request_body("a lighthouse") == json.dumps({
+        "taskType": "TEXT_IMAGE",
+        "textToImageParams": {"text": "a lighthouse"},
+        "imageGenerationConfig": {"numberOfImages": 1, "height": 1024, "width": 1024, "cfgScale": 8.0, "seed": 0}
+    })
+
+
+@pytest.mark.parametrize("seed", ["abc", "1.5", "-1", str(2147483647)])
+def test_invalid_seed_is_rejected_before_calling_bedrock(index, seed):
+    response = index.index({"prompt": "a lighthouse", "mode": "", "seed": seed}, None)
+
+    assert response["statusCode"] == 400
+    assert index.requests == []
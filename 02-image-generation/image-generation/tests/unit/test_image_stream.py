@@ -0,0 +1,56 @@
+import base64
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "lambda"))
+
+from image_stream import ImageError, ImageResponseStream  # noqa: E402
+
+PNG = bytes(range(256)) * 40 + b"\x89PNG tail"
+
+
+def response_body(images, error=None, escape_slashes=False, error_first=False):
+    encoded = [base64.b64encode(image).decode() for image in images]
+    payload = {"error": error, "images": encoded} if error_first else {"images": encoded, "error": error}
+    text = json.dumps(payload, indent=1)
+    if escape_slashes:
+        text = text.replace("/", "\\/")
+    return io.BytesIO(text.encode())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64 * 1024])
+def test_decodes_images_across_chunk_boundaries(chunk_size):
+    stream = ImageResponseStream(response_body([PNG, b"second"]), chunk_size=chunk_size)
+    assert [image.read() for image in stream.images()] == [PNG, b"second"]
+    assert stream.check_error()["images"] == ["", ""]
+
+
+def test_escaped_slashes_are_ignored():
+    stream = ImageResponseStream(response_body([PNG], escape_slashes=True), chunk_size=5)
+    image = next(stream.images())
+    assert image.read() == PNG
+    assert image.size == len(PNG)
+
+
+@pytest.mark.parametrize("error_first", [True, False])
+def test_error_field_is_reported(error_first):
+    stream = ImageResponseStream(response_body([], error="blocked", error_first=error_first))
+    assert list(stream.images()) == []
+    with pytest.raises(ImageError, match="blocked"):
+        stream.check_error()
+
+
+def test_unread_images_are_skipped_by_check_error():
+    stream = ImageResponseStream(response_body([PNG, PNG]), chunk_size=11)
+    assert stream.check_error()["error"] is None
+
+
+def test_truncated_response_raises():
+    body = response_body([PNG]).read()[:200]
+    stream = ImageResponseStream(io.BytesIO(body), chunk_size=16)
+    with pytest.raises(ImageError):
+        next(stream.images()).read()
@@ -0,0 +1,96 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import answer_cache as answer_cache_module  # noqa: E402
+import token_counter  # noqa: E402
+from answer_cache import AnswerCache, fingerprint, is_deterministic  # noqa: E402
+from stub_llm import StubChatModel  # noqa: E402
+
+MEMORY_STATE = {"summary": "", "messages": []}
+
+
+def test_expired_answers_are_misses(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(max_entries=8, ttl_seconds=60, enabled=True)
+
+    cache.put("key", "answer")
+    now[0] += 59
+    assert cache.get("key") == "answer"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 1}
+
+
+def test_least_recently_used_answer_is_evicted():
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, enabled=True)
+    cache.put("first", "1")
+    cache.put("second", "2")
+    cache.get("first")
+
+    cache.put("third", "3")
+
+    assert cache.get("second") is None
+    assert cache.get("first") == "1"
+    assert cache.get("third") == "3"
+
+
+def test_only_temperature_zero_is_cacheable():
+    assert is_deterministic(0)
+    assert is_deterministic(0.0)
+    assert not is_deterministic(0.1)
+    assert not is_deterministic(None)
+
+
+def test_fingerprint_normalizes_the_question_but_not_the_context():
+    key = fingerprint("model", 0, MEMORY_STATE, "What can you do?")
+
+    assert fingerprint("model", 0, MEMORY_STATE, "  what can   you do ") == key
+    assert fingerprint("model", 0.5, MEMORY_STATE, "What can you do?") != key
+    assert fingerprint("other-model", 0, MEMORY_STATE, "What can you do?") != key
+    assert fingerprint("model", 0, {"summary": "earlier turns", "messages": []}, "What can you do?") != key
+
+
+class CountingStub(StubChatModel):
+    temperature: float = 0.0
+    calls: int = 0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls += 1
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setenv("CHATBOT_SPILL_PATH", "")
+    monkeypatch.setenv("CHATBOT_BACKGROUND_SUMMARY", "false")
+    monkeypatch.setattr(token_counter, "_encoding", None)
+    monkeypatch.setattr(token_counter, "_encoding_loaded", True)
+    import chatbot_backend
+    importlib.reload(chatbot_backend)
+    monkeypatch.setattr(chatbot_backend, "answer_cache", AnswerCache(max_entries=8, ttl_seconds=60, enabled=True))
+    return chatbot_backend
+
+
+@pytest.mark.parametrize("temperature, model_calls", [(0.0, 1), (0.1, 2)])
+def test_opening_question_is_answered_from_the_cache_only_at_temperature_zero(backend, monkeypatch,
+                                                                               temperature, model_calls):
+    stub = CountingStub(temperature=temperature)
+    monkeypatch.setattr(backend, "get_bedrock_client", lambda model_id=None: stub)
+
+    answers = []
+    for session in ("first", "second"):
+        chat_memory = backend.create_chat_memory()
+        answers.append(backend.get_ai_response("What can you do?", chat_memory, session_id=session))
+
+    assert answers[0] == answers[1] == stub.reply
+    assert stub.calls == model_calls
+
+
+def test_answer_cache_sets_a_deterministic_default_temperature(backend):
+    assert backend.DEFAULT_TEMPERATURE == "0"
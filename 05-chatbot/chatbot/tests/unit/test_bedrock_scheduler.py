@@ -0,0 +1,95 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+from bedrock_scheduler import BedrockScheduler, SchedulerBusy  # noqa: E402
+
+MODEL = "amazon.nova-lite-v1:0"
+
+
+def make_scheduler(**kwargs):
+    limits = {"max_concurrency": 1, "requests_per_minute": 60000, "max_queue": 8, "queue_timeout": 5}
+    return BedrockScheduler(**{**limits, **kwargs}, model_limits={})
+
+
+def queue_call(scheduler, session_id, order):
+    """Start a call that waits for its slot; returns once it is queued"""
+    queued = scheduler.snapshot()[MODEL]["queued"]
+
+    def call():
+        with scheduler.slot(MODEL, session_id):
+            order.append(session_id)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    while scheduler.snapshot()[MODEL]["queued"] == queued:
+        time.sleep(0.001)
+    return thread
+
+
+def test_waiting_sessions_are_served_round_robin():
+    scheduler = make_scheduler()
+    order = []
+    scheduler.acquire(MODEL, "holder")
+
+    threads = [queue_call(scheduler, session_id, order) for session_id in ["chatty", "chatty", "chatty", "quiet"]]
+    scheduler.release(MODEL)
+    for thread in threads:
+        thread.join()
+
+    assert order == ["chatty", "quiet", "chatty", "chatty"]
+    assert scheduler.snapshot()[MODEL] == {
+        "active": 0, "queued": 0, "max_concurrency": 1, "requests_per_minute": 60000,
+    }
+
+
+def test_full_queue_raises_scheduler_busy():
+    scheduler = make_scheduler(max_queue=1)
+    scheduler.acquire(MODEL, "holder")
+    waiter = queue_call(scheduler, "first", [])
+
+    with pytest.raises(SchedulerBusy):
+        scheduler.acquire(MODEL, "second")
+
+    scheduler.release(MODEL)
+    waiter.join()
+
+
+def test_queue_timeout_raises_scheduler_busy_and_leaves_the_queue():
+    scheduler = make_scheduler(queue_timeout=0.05)
+    scheduler.acquire(MODEL, "holder")
+
+    with pytest.raises(SchedulerBusy):
+        scheduler.acquire(MODEL, "late")
+
+    assert scheduler.snapshot()[MODEL]["queued"] == 0
+    assert scheduler.snapshot()[MODEL]["active"] == 1
+
+
+def test_slot_is_released_when_the_call_fails():
+    scheduler = make_scheduler()
+
+    with pytest.raises(RuntimeError):
+        with scheduler.slot(MODEL, "session"):
+            raise RuntimeError("Bedrock error")
+
+    assert scheduler.snapshot()[MODEL]["active"] == 0
+    assert scheduler.session_stats("session")["calls"] == 1
+
+
+def test_token_bucket_spaces_calls_beyond_the_burst():
+    scheduler = make_scheduler(requests_per_minute=600)   # One call per 0.1 s after the burst of 1
+    with scheduler.slot(MODEL, "session"):
+        pass
+
+    started = time.monotonic()
+    with scheduler.slot(MODEL, "session"):
+        pass
+
+    assert time.monotonic() - started >= 0.05
+    assert scheduler.session_stats("session")["last_wait_seconds"] >= 0.05
@@ -0,0 +1,161 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import token_counter  # noqa: E402
+from chat_memory import BackgroundSummaryBufferMemory  # noqa: E402
+from stub_llm import StubChatModel  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # characters / 4 - no tokenizer download, exact counts below
+    monkeypatch.setattr(token_counter, "_encoding", None)
+    monkeypatch.setattr(token_counter, "_encoding_loaded", True)
+
+
+class DeferredExecutor:
+    """Runs submitted summaries only when told to"""
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.calls.append((future, fn, args))
+        return future
+
+    def run_all(self):
+        while self.calls:
+            future, fn, args = self.calls.pop(0)
+            future.set_result(fn(*args))
+
+
+def make_memory(max_token_limit=20, summary_executor=None):
+    return BackgroundSummaryBufferMemory(
+        llm=StubChatModel(reply="SUMMARY"), max_token_limit=max_token_limit, summary_executor=summary_executor
+    )
+
+
+def save_turn(memory, number):
+    memory.save_context({"input": f"question {number:02d}"}, {"output": f"answer {number:02d}"})
+
+
+def test_inline_summary_replaces_oldest_turns():
+    memory = make_memory()
+    for number in range(3):
+        save_turn(memory, number)
+
+    assert memory.summary_count == 1
+    assert memory.moving_summary_buffer == "SUMMARY"
+    assert memory.buffer_tokens <= memory.max_token_limit
+    assert memory.chat_memory.messages[-1].content == "answer 02"
+    assert "question 00" not in [message.content for message in memory.chat_memory.messages]
+
+
+def test_under_limit_nothing_is_summarized():
+    memory = make_memory(max_token_limit=1000)
+    save_turn(memory, 0)
+
+    assert memory.summary_count == 0
+    assert memory.buffer_tokens == token_counter.count_tokens("Human: question 00") + \
+        token_counter.count_tokens("AI: answer 00")
+
+
+def test_background_summary_matches_inline_once_finished():
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        memory = make_memory(summary_executor=executor)
+        for number in range(3):
+            save_turn(memory, number)
+        memory.wait_for_summary()
+
+    inline = make_memory()
+    for number in range(3):
+        save_turn(inline, number)
+    assert memory.export_state() == inline.export_state()
+
+
+def make_memory_with(state):
+    memory = make_memory(max_token_limit=1000)
+    memory.import_state(state)
+    return memory
+
+
+def test_export_import_round_trip():
+    memory = make_memory()
+    for number in range(3):
+        save_turn(memory, number)
+
+    restored = make_memory_with(memory.export_state())
+
+    assert restored.export_state() == memory.export_state()
+    assert restored.load_memory_variables({}) == memory.load_memory_variables({})
+
+
+def test_summary_of_a_cleared_buffer_is_discarded():
+    executor = DeferredExecutor()
+    memory = make_memory(summary_executor=executor)
+    for number in range(3):
+        save_turn(memory, number)
+    assert executor.calls
+
+    memory.clear()
+    save_turn(memory, 5)
+    executor.run_all()
+
+    assert [message.content for message in memory.chat_memory.messages] == ["question 05", "answer 05"]
+    assert memory.moving_summary_buffer == ""
+    assert memory.summary_count == 0
+    fresh = make_memory()
+    save_turn(fresh, 5)
+    assert memory.buffer_tokens == fresh.buffer_tokens
+
+
+def test_async_save_context_summarizes_in_the_background():
+    executor = DeferredExecutor()
+    memory = make_memory(summary_executor=executor)
+
+    async def chat():
+        for number in range(3):
+            await memory.asave_context({"input": f"question {number:02d}"}, {"output": f"answer {number:02d}"})
+    asyncio.run(chat())
+
+    assert memory.summary_count == 0
+    executor.run_all()
+    assert memory.summary_count == 1
+
+
+def test_clear_and_import_reset_token_counts():
+    # Same number of messages, different text: cached counts must not be reused
+    long_turns = make_memory(max_token_limit=1000)
+    long_turns.save_context({"input": "q" * 200}, {"output": "a" * 200})
+
+    memory = make_memory(max_token_limit=1000)
+    save_turn(memory, 0)
+    memory.import_state(long_turns.export_state())
+    assert memory.buffer_tokens == long_turns.buffer_tokens
+
+    memory.clear()
+    long_turns.clear()
+    save_turn(memory, 1)
+    save_turn(long_turns, 1)
+    assert memory.buffer_tokens == long_turns.buffer_tokens
+
+
+def test_token_counts_are_cached_per_message(monkeypatch):
+    counted = []
+    real_count = token_counter.count_tokens
+    monkeypatch.setattr("chat_memory.count_tokens", lambda text: counted.append(text) or real_count(text))
+    memory = make_memory(max_token_limit=1000)
+
+    save_turn(memory, 0)
+    memory.buffer_tokens
+    save_turn(memory, 1)
+    memory.buffer_tokens
+
+    assert counted == ["Human: question 00", "AI: answer 00", "Human: question 01", "AI: answer 01"]
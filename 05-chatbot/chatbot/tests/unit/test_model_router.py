@@ -0,0 +1,83 @@
+import os
+import sys
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import model_router  # noqa: E402
+from model_router import RouteStats, UsageCollector, choose_route  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def router_enabled(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTER_ENABLED", True)
+
+
+def test_short_simple_turn_goes_to_the_fast_model():
+    route, model_id, reason = choose_route("Hi, what is your name?")
+    assert (route, model_id, reason) == ("fast", model_router.FAST_MODEL_ID, "short and simple")
+
+
+@pytest.mark.parametrize("user_input, reason", [
+    (" ".join(["word"] * 21), "long input"),
+    ("Is it open? Is it free?", "several questions"),
+    ("```print(1)```", "code block"),
+    ("Why is the sky blue", "keyword 'why'"),
+    ("Go STEP BY STEP please", "keyword 'step by step'"),
+])
+def test_escalation_rules_pick_the_large_model(user_input, reason):
+    assert choose_route(user_input) == ("large", model_router.LARGE_MODEL_ID, reason)
+
+
+def test_keywords_only_match_whole_words():
+    # "however" contains "how" but must not escalate
+    assert choose_route("Fine, however you like")[0] == "fast"
+
+
+def test_disabled_router_always_uses_the_large_model(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTER_ENABLED", False)
+    assert choose_route("Hi") == ("large", model_router.LARGE_MODEL_ID, "router disabled")
+
+
+def test_usage_collector_sums_usage_and_cache_details():
+    usage = UsageCollector()
+    message = AIMessage(content="ok", usage_metadata={
+        "input_tokens": 10, "output_tokens": 5, "total_tokens": 15,
+        "input_token_details": {"cache_read": 7, "cache_creation": 3},
+    })
+    result = LLMResult(generations=[[ChatGeneration(message=message)], [ChatGeneration(message=AIMessage(content="no usage"))]])
+
+    usage.on_llm_end(result)
+    usage.on_llm_end(result)
+
+    assert (usage.input_tokens, usage.output_tokens) == (20, 10)
+    assert (usage.cache_read_tokens, usage.cache_write_tokens) == (14, 6)
+
+
+def test_route_stats_totals_and_averages():
+    stats = RouteStats()
+    for latency, tokens in ((1.0, 100), (3.0, 300)):
+        usage = UsageCollector()
+        usage.add({"input_tokens": tokens, "output_tokens": tokens // 10})
+        stats.record("large", "model-a", latency, usage, reason="long input")
+
+    snapshot = stats.snapshot()
+    assert set(snapshot) == {"large"}
+    large = snapshot["large"]
+    assert large["model_id"] == "model-a"
+    assert large["turns"] == 2
+    assert large["max_latency_seconds"] == 3.0
+    assert large["avg_latency_seconds"] == 2.0
+    assert large["avg_input_tokens"] == 200
+    assert large["avg_output_tokens"] == 20
+
+
+def test_only_the_first_turn_is_logged_as_first(caplog):
+    stats = RouteStats()
+    with caplog.at_level("INFO", logger="model_router"):
+        stats.record("fast", "model-b", 0.5, UsageCollector())
+        stats.record("fast", "model-b", 0.2, UsageCollector())
+    assert sum("First turn" in record.getMessage() for record in caplog.records) == 1
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+from langchain_aws import ChatBedrockConverse
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import token_counter  # noqa: E402
+from prompt_cache import (CACHE_POINT, CachedPrefixChatPrompt,  # noqa: E402
+                          CachingChatBedrockConverse, strip_cache_points,
+                          supports_prompt_cache)
+from stub_llm import StubChatModel  # noqa: E402
+
+HISTORY = [HumanMessage(content="hi"), AIMessage(content="hello!")]
+LONG_SUMMARY = "The user and the AI discussed travel plans. " * 150    # ~1.6K tokens
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    monkeypatch.setattr(token_counter, "_encoding", None)
+    monkeypatch.setattr(token_counter, "_encoding_loaded", True)
+
+
+def format_turn(summary, user_input):
+    history = ([SystemMessage(content=summary)] if summary else []) + HISTORY
+    return CachedPrefixChatPrompt().format_messages(history=history, input=user_input)
+
+
+def cache_usage(model, messages):
+    return model.invoke(messages).usage_metadata["input_token_details"]
+
+
+def test_summary_goes_before_the_cache_point():
+    messages = format_turn("The user said hi.", "how are you?")
+
+    system_text, cache_point = messages[0].content
+    assert system_text["text"].endswith("Summary of the conversation so far:\nThe user said hi.")
+    assert cache_point == CACHE_POINT
+    assert messages[1:] == [*HISTORY, HumanMessage(content="how are you?")]
+
+
+def test_prefix_is_served_from_the_cache_until_the_summary_changes():
+    model = StubChatModel()
+
+    assert cache_usage(model, format_turn("Summary one.", "first"))["cache_read"] == 0
+    assert cache_usage(model, format_turn("Summary one.", "second"))["cache_read"] > 0
+
+    changed = cache_usage(model, format_turn("Summary two.", "third"))
+    assert changed["cache_read"] == 0
+    assert changed["cache_creation"] > 0
+
+
+def test_cache_points_are_stripped_for_unsupported_models():
+    stripped = strip_cache_points(format_turn("Summary.", "hi"))
+
+    assert stripped[0].content == [{"type": "text", "text": stripped[0].content[0]["text"]}]
+    assert cache_usage(StubChatModel(), stripped) == {"cache_read": 0, "cache_creation": 0}
+    assert supports_prompt_cache("us.amazon.nova-pro-v1:0")
+    assert not supports_prompt_cache("mistral.mistral-large-2402-v1:0")
+
+
+@pytest.mark.parametrize("model_id, summary, keeps_cache_point", [
+    ("amazon.nova-pro-v1:0", LONG_SUMMARY, True),
+    ("amazon.nova-pro-v1:0", "Summary.", False),                        # Prefix below Bedrock's minimum
+    ("anthropic.claude-3-5-haiku-20241022-v1:0", LONG_SUMMARY, False),  # Needs 2K tokens
+    ("mistral.mistral-large-2402-v1:0", LONG_SUMMARY, False),           # No prompt caching
+])
+def test_converse_client_only_sends_usable_cache_points(monkeypatch, model_id, summary, keeps_cache_point):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    sent = []
+
+    def fake_converse(self, messages, stop=None, run_manager=None, **kwargs):
+        sent.append(messages)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="ok"))])
+
+    monkeypatch.setattr(ChatBedrockConverse, "_generate", fake_converse)
+    model = CachingChatBedrockConverse(region_name="us-east-1", model=model_id)
+
+    model.invoke(format_turn(summary, "hi"))
+
+    assert (CACHE_POINT in sent[0][0].content) is keeps_cache_point
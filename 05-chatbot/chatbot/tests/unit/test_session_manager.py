@@ -0,0 +1,147 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+from session_manager import (SessionManager, new_session_id, persisted_state,  # noqa: E402
+                             session_id_from_token, session_token)
+
+
+class FakeMemory:
+    def __init__(self, text=""):
+        self.text = text
+
+    def export_state(self):
+        return {"summary": "", "messages": [{"type": "human", "data": {"content": self.text}}]}
+
+
+class FakeBackend:
+    """load/spill callbacks that record what the manager asked for"""
+
+    def __init__(self, text="x" * 100):
+        self.text = text
+        self.loaded = []
+        self.spilled = []
+
+    def load(self, session_id):
+        self.loaded.append(session_id)
+        return FakeMemory(self.text), []
+
+    def spill(self, session):
+        self.spilled.append(session.session_id)
+
+
+def make_manager(backend, **kwargs):
+    return SessionManager(backend.load, lambda chat_memory: "conversation", backend.spill, **kwargs)
+
+
+def test_open_loads_once_and_reuses_the_live_session():
+    backend = FakeBackend()
+    manager = make_manager(backend)
+
+    first = manager.open("a")
+    manager.release(first)
+    again = manager.open("a")
+
+    assert again is first
+    assert again.conversation == "conversation"
+    assert backend.loaded == ["a"]
+
+
+def test_idle_sessions_are_spilled():
+    backend = FakeBackend()
+    manager = make_manager(backend, idle_seconds=60)
+    session = manager.open("a")
+    manager.release(session)
+    session.last_active -= 120
+
+    manager.release(manager.open("b"))
+
+    assert backend.spilled == ["a"]
+    assert manager.stats()["evictions"] == 1
+
+
+def test_least_recently_active_session_is_spilled_over_budget():
+    backend = FakeBackend()
+    manager = make_manager(backend, budget_bytes=10 ** 6)
+    for session_id in ("old", "new"):
+        manager.release(manager.open(session_id))
+    manager.budget_bytes = manager.stats()["bytes"]     # Room for two sessions
+
+    manager.release(manager.open("current"))
+
+    assert backend.spilled == ["old"]
+    assert manager.stats()["sessions"] == 2
+
+
+def test_in_flight_session_is_never_spilled():
+    backend = FakeBackend()
+    manager = make_manager(backend, budget_bytes=1)
+
+    busy = manager.open("busy")
+    manager.release(manager.open("other"))
+
+    assert "busy" not in backend.spilled
+    manager.touch(busy)
+    manager.release(manager.open("third"))
+    assert "busy" in backend.spilled
+
+
+def test_spill_runs_outside_the_manager_lock():
+    backend = FakeBackend()
+    manager = make_manager(backend, idle_seconds=60)
+    idle = manager.open("idle")
+    manager.release(idle)
+    idle.last_active -= 120
+    spill_started, finish_spill = threading.Event(), threading.Event()
+
+    def slow_spill(session):
+        spill_started.set()
+        finish_spill.wait(5)
+    manager.spill = slow_spill
+    evicting = threading.Thread(target=manager.open, args=("other",))
+    evicting.start()
+    assert spill_started.wait(5)
+
+    # open() elsewhere doesn't wait for the store; the spilling session is taken back, not reloaded
+    opened = []
+    opener = threading.Thread(target=lambda: opened.append(manager.open("idle")))
+    opener.start()
+    opener.join(1)
+    finish_spill.set()
+    evicting.join(5)
+
+    assert opened == [idle]
+    assert backend.loaded == ["idle", "other"]
+
+
+def test_size_is_measured_on_the_persisted_form():
+    backend = FakeBackend()
+    manager = make_manager(backend)
+    session = manager.open("a")
+    session.chat_history.append({"role": "user", "text": "hi", "display": "<p>hi</p>" * 1000})
+
+    manager.touch(session)
+
+    persisted = persisted_state(session.chat_memory, session.chat_history)
+    assert persisted["chat_history"] == [{"role": "user", "text": "hi"}]
+    assert session.approx_bytes < 1000
+
+
+def test_resume_tokens_need_the_secret():
+    session_id = new_session_id()
+    assert session_id != new_session_id()
+
+    token = session_token(session_id, secret="s3cret")
+    assert session_id_from_token(token, secret="s3cret") == session_id
+    assert session_id_from_token(token, secret="other") is None
+    assert session_id_from_token(session_id, secret="s3cret") is None          # Unsigned id from the URL
+    assert session_id_from_token("chosen-id." + "0" * 64, secret="s3cret") is None
+    assert session_id_from_token(None, secret="s3cret") is None
+
+
+def test_resume_links_are_off_without_a_secret():
+    session_id = new_session_id()
+    assert session_token(session_id, secret="") is None
+    assert session_id_from_token(session_token(session_id, secret="s3cret"), secret="") is None
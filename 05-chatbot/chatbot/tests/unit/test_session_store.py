@@ -0,0 +1,87 @@
+import json
+import os
+import sys
+
+import fakeredis
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+from session_store import (RedisSessionStore, SessionStore,  # noqa: E402
+                           SQLiteSessionStore, create_session_store, encode_state)
+
+STATE = {
+    "summary": "The user is planning a trip to Japan.",
+    "messages": [{"type": "human", "data": {"content": "How do I get to Kyoto?"}}],
+    "chat_history": [{"role": "user", "text": "How do I get to Kyoto?"}],
+}
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60)
+    return RedisSessionStore(fakeredis.FakeRedis(), ttl_seconds=60)
+
+
+def test_save_load_delete_round_trip(store):
+    assert store.load("abc") is None
+
+    store.save("abc", STATE)
+    assert store.load("abc") == STATE
+
+    store.delete("abc")
+    assert store.load("abc") is None
+
+
+def test_sqlite_expired_sessions_are_not_loaded_and_purged(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=0)
+    store.save("abc", STATE)
+
+    assert store.load("abc") is None
+    assert store.purge_expired() == 1
+
+
+def test_redis_save_sets_and_extends_ttl():
+    client = fakeredis.FakeRedis()
+    store = RedisSessionStore(client, ttl_seconds=60)
+
+    store.save("abc", STATE)
+    client.expire("chatbot:session:abc", 5)
+    store.save("abc", STATE)
+
+    assert 55 < client.ttl("chatbot:session:abc") <= 60
+
+
+def test_encode_state_trims_history_then_messages_but_keeps_summary():
+    state = {
+        "summary": "summary",
+        "messages": [{"type": "human", "data": {"content": "m" * 100}}] * 3,
+        "chat_history": [{"role": "user", "text": "h" * 100}] * 3,
+    }
+    without_history = len(json.dumps({**state, "chat_history": []}))
+
+    trimmed = json.loads(encode_state(state, without_history))
+    assert trimmed["chat_history"] == []
+    assert len(trimmed["messages"]) == 3
+
+    trimmed = json.loads(encode_state(state, 10))
+    assert trimmed == {"summary": "summary", "messages": [], "chat_history": []}
+
+
+def test_create_session_store_from_url(tmp_path):
+    assert create_session_store("") is None
+    assert isinstance(create_session_store(f"sqlite:///{tmp_path}/sessions.db"), SQLiteSessionStore)
+    with pytest.raises(ValueError):
+        create_session_store("memcached://localhost")
+
+
+def test_session_store_is_abstract():
+    class LoadOnlyStore(SessionStore):
+        def load(self, session_id):
+            return None
+
+    with pytest.raises(TypeError):
+        SessionStore()
+    with pytest.raises(TypeError):
+        LoadOnlyStore()
@@ -0,0 +1,75 @@
+"""
+Answer cache for repeated questions asked in the same conversation context
+
+Opening questions ("what can you do?") recur constantly and each one used to be
+a full model call. A cached answer is only reused when everything the model
+would see is identical: model id, temperature, running summary, buffered turns
+and the (normalized) question. With temperature > 0 the model would not give the
+same answer twice, so the cache switches itself off.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+ANSWER_CACHE_ENABLED = os.getenv('CHATBOT_ANSWER_CACHE', 'true').lower() == 'true'
+ANSWER_CACHE_SIZE = int(os.getenv('CHATBOT_ANSWER_CACHE_SIZE', '512'))         # Entries (LRU beyond this)
+ANSWER_CACHE_TTL = float(os.getenv('CHATBOT_ANSWER_CACHE_TTL', '3600'))        # Seconds an answer stays valid
+
+def normalize_question(text):
+    """Case, whitespace and trailing punctuation don't change the question"""
+    return re.sub(r'\s+', ' ', text).strip().rstrip('?!. ').lower()
+
+def is_deterministic(temperature):
+    return temperature is not None and temperature == 0
+
+def fingerprint(model_id, temperature, memory_state, user_input):
+    """Key for one turn: model settings + exact conversation context + normalized question"""
+    key = json.dumps({
+        "model": model_id,
+        "temperature": temperature,
+        "summary": memory_state.get("summary", ""),
+        "messages": memory_state.get("messages", []),
+        "input": normalize_question(user_input),
+    }, sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+class AnswerCache:
+    """Thread-safe LRU cache with a TTL per entry"""
+
+    def __init__(self, max_entries=ANSWER_CACHE_SIZE, ttl_seconds=ANSWER_CACHE_TTL, enabled=ANSWER_CACHE_ENABLED):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, answer)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, answer):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+answer_cache = AnswerCache()
@@ -0,0 +1,194 @@
+"""
+Process-wide Bedrock scheduler shared by every chat session in this task
+
+Every Streamlit session used to call Bedrock on its own, so a burst of users
+became a burst of ThrottlingExceptions and SDK retries. Here each model gets
+a lane with:
+  - a concurrency cap (calls in flight, streams count until the last chunk)
+  - a requests-per-minute token bucket
+  - a bounded queue served round-robin by session, so one chatty session
+    cannot starve the others
+
+Calls wait in the queue instead of failing; when the queue is full or the wait
+is too long, SchedulerBusy is raised so the UI can say "busy, try again".
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from langchain_aws import ChatBedrockConverse
+
+logger = logging.getLogger(__name__)
+
+# Default limits per model (override per model with BEDROCK_MODEL_LIMITS, a JSON object keyed by model id)
+MAX_CONCURRENCY = int(os.getenv('BEDROCK_MAX_CONCURRENCY', '4'))    # Calls in flight per model
+REQUESTS_PER_MINUTE = int(os.getenv('BEDROCK_RPM', '60'))           # Token bucket refill rate per model
+MAX_QUEUE = int(os.getenv('BEDROCK_MAX_QUEUE', '32'))               # Waiting calls per model
+QUEUE_TIMEOUT = float(os.getenv('BEDROCK_QUEUE_TIMEOUT', '60'))     # Seconds a call may wait for a slot
+MODEL_LIMITS = json.loads(os.getenv('BEDROCK_MODEL_LIMITS', '{}'))  # e.g. {"amazon.nova-lite-v1:0": {"rpm": 200}}
+
+# Session the current call belongs to (background work such as summaries has none)
+current_session = contextvars.ContextVar('bedrock_session', default='background')
+
+class SchedulerBusy(Exception):
+    """The model's queue is full, or a call waited longer than the queue timeout"""
+
+class _ModelLane:
+    """Limits and wait queue for one model id"""
+
+    def __init__(self, max_concurrency, requests_per_minute, max_queue):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_queue = max_queue
+        self.active = 0
+        self.queued = 0
+        self.tokens = float(max_concurrency)    # Burst allowance: one full set of concurrent calls
+        self.refilled_at = time.monotonic()
+        self.sessions = OrderedDict()           # session id -> deque of waiting tickets, in round-robin order
+
+    def refill(self, now):
+        rate = self.requests_per_minute / 60.0
+        self.tokens = min(float(self.max_concurrency), self.tokens + (now - self.refilled_at) * rate)
+        self.refilled_at = now
+
+    def next_ticket(self):
+        """Oldest ticket of the session whose turn it is"""
+        for tickets in self.sessions.values():
+            return tickets[0]
+        return None
+
+    def seconds_until_token(self):
+        return max(0.0, (1 - self.tokens) * 60.0 / self.requests_per_minute)
+
+class BedrockScheduler:
+    """Per-model concurrency caps + RPM token bucket + bounded fair queue"""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE,
+                 max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT, model_limits=None):
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.model_limits = model_limits if model_limits is not None else MODEL_LIMITS
+        self._condition = threading.Condition()
+        self._lanes = {}
+        self._session_waits = {}
+
+    def _lane(self, model_id):
+        if model_id not in self._lanes:
+            limits = self.model_limits.get(model_id, {})
+            self._lanes[model_id] = _ModelLane(
+                limits.get('max_concurrency', self.max_concurrency),
+                limits.get('rpm', self.requests_per_minute),
+                limits.get('max_queue', self.max_queue),
+            )
+        return self._lanes[model_id]
+
+    @contextmanager
+    def slot(self, model_id, session_id=None):
+        """Hold one call's slot on model_id; waits (fairly) until it is available"""
+        self.acquire(model_id, session_id)
+        try:
+            yield
+        finally:
+            self.release(model_id)
+
+    def acquire(self, model_id, session_id=None):
+        session_id = session_id or current_session.get()
+        ticket = object()
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+
+        with self._condition:
+            lane = self._lane(model_id)
+            if lane.queued >= lane.max_queue:
+                raise SchedulerBusy(f"{model_id}: {lane.queued} calls already waiting")
+            lane.sessions.setdefault(session_id, deque()).append(ticket)
+            lane.queued += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    lane.refill(now)
+                    is_next = lane.next_ticket() is ticket
+                    if is_next and lane.active < lane.max_concurrency and lane.tokens >= 1:
+                        break
+                    if now >= deadline:
+                        raise SchedulerBusy(f"{model_id}: no slot after {self.queue_timeout:.0f}s")
+                    # Wake up on release, or when the bucket has refilled
+                    wait = deadline - now
+                    if is_next and lane.active < lane.max_concurrency:
+                        wait = min(wait, lane.seconds_until_token())
+                    self._condition.wait(wait)
+            finally:
+                tickets = lane.sessions[session_id]
+                tickets.remove(ticket)
+                if tickets:
+                    lane.sessions.move_to_end(session_id)   # Other sessions go first next time
+                else:
+                    del lane.sessions[session_id]
+                lane.queued -= 1
+                self._condition.notify_all()
+
+            lane.active += 1
+            lane.tokens -= 1
+            waited = time.monotonic() - start
+            stats = self._session_waits.setdefault(session_id, {"calls": 0, "total_wait_seconds": 0.0})
+            stats["calls"] += 1
+            stats["total_wait_seconds"] += waited
+            stats["last_wait_seconds"] = waited
+
+        if waited >= 1:
+            logger.info("session=%s model=%s waited %.2fs for a Bedrock slot", session_id, model_id, waited)
+
+    def release(self, model_id):
+        with self._condition:
+            self._lanes[model_id].active -= 1
+            self._condition.notify_all()
+
+    def session_stats(self, session_id):
+        """Calls and time spent waiting for a slot, for one session"""
+        with self._condition:
+            return dict(self._session_waits.get(session_id, {"calls": 0, "total_wait_seconds": 0.0}))
+
+    def forget_session(self, session_id):
+        with self._condition:
+            self._session_waits.pop(session_id, None)
+
+    def snapshot(self):
+        """Active and queued calls per model"""
+        with self._condition:
+            return {
+                model_id: {
+                    "active": lane.active, "queued": lane.queued,
+                    "max_concurrency": lane.max_concurrency, "requests_per_minute": lane.requests_per_minute,
+                }
+                for model_id, lane in self._lanes.items()
+            }
+
+scheduler = BedrockScheduler()
+
+@contextmanager
+def session_scope(session_id):
+    """Attribute the Bedrock calls made inside this block to session_id"""
+    token = current_session.set(session_id)
+    try:
+        yield
+    finally:
+        current_session.reset(token)
+
+class ScheduledChatBedrockConverse(ChatBedrockConverse):
+    """ChatBedrockConverse whose calls go through the shared scheduler"""
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with scheduler.slot(self.model_id):
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        # The slot is held until the last chunk: a stream is a call in flight
+        with scheduler.slot(self.model_id):
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
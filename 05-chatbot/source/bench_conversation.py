@@ -0,0 +1,63 @@
+"""
+Microbenchmark: per-turn overhead of the conversation chain (model latency excluded)
+
+Compares the old behaviour (new verbose ConversationChain every message) with
+one chain per session reused every turn. The model is a zero-latency stub, so
+the numbers are pure LangChain/logging overhead.
+
+Usage:
+    python bench_conversation.py --turns 200
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import time
+
+from langchain.chains import ConversationChain
+from langchain.memory import ConversationSummaryBufferMemory
+
+import chatbot_backend as backend
+from stub_llm import StubChatModel
+
+def run_turns(turns, rebuild_chain, verbose):
+    """Returns per-turn wall time in microseconds"""
+    stub = StubChatModel()
+    chat_memory = ConversationSummaryBufferMemory(llm=stub, max_token_limit=2000)
+    conversation = None
+    timings = []
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for turn in range(turns):
+            start = time.perf_counter()
+            if rebuild_chain or conversation is None:
+                conversation = ConversationChain(llm=stub, memory=chat_memory, verbose=verbose)
+            conversation.invoke(f"Question number {turn}: what else can you tell me?")['response']
+            timings.append((time.perf_counter() - start) * 1e6)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-turn conversation overhead benchmark")
+    parser.add_argument('--turns', type=int, default=200)
+    args = parser.parse_args()
+
+    # Same code path the app uses, with the stub model plugged in
+    stub = StubChatModel()
+    backend.get_bedrock_client = lambda model_id=None: stub
+    chat_memory = ConversationSummaryBufferMemory(llm=stub, max_token_limit=2000)
+    conversation = backend.create_conversation(chat_memory)
+    backend.get_ai_response("warm up", chat_memory, conversation)
+
+    variants = [
+        ("rebuild chain + verbose (old)", True, True),
+        ("rebuild chain, quiet", True, False),
+        ("reuse chain, quiet (new)", False, False),
+    ]
+    print(f"{'variant':<32} {'mean us':>9} {'p50 us':>9} {'p95 us':>9}")
+    for name, rebuild_chain, verbose in variants:
+        timings = sorted(run_turns(args.turns, rebuild_chain, verbose))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:<32} {statistics.mean(timings):>9.0f} {statistics.median(timings):>9.0f} {p95:>9.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""Conversation memory that summarizes old turns off the critical path"""
+import asyncio
+import logging
+import threading
+from typing import Any
+
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain_core.messages import get_buffer_string, messages_from_dict, messages_to_dict
+from pydantic import Field, PrivateAttr
+
+from token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+class BackgroundSummaryBufferMemory(ConversationSummaryBufferMemory):
+    """
+    ConversationSummaryBufferMemory whose summarization runs after the reply is sent
+
+    The stock memory calls the LLM to summarize old turns inside save_context(),
+    i.e. before the user sees the reply. Here save_context() only hands the old
+    turns to `summary_executor`; they stay in the buffer (so no context is lost)
+    until the new summary is ready, then both are swapped in one step. The next
+    turn uses the newest summary that is available at that moment.
+
+    With summary_executor=None summarization runs inline (deterministic for tests).
+    The async methods (asave_context, ...) run the same code, so they don't
+    summarize inline either. A summary whose turns were cleared or replaced
+    meanwhile is discarded.
+
+    Token counts are cached per message: only new messages are tokenized on
+    append and pruned counts are dropped, instead of re-tokenizing the whole
+    buffer through the LLM's tokenizer every turn.
+    """
+
+    summary_executor: Any = Field(default=None, exclude=True)
+    summary_count: int = 0
+
+    _lock: Any = PrivateAttr(default_factory=threading.RLock)
+    _compacting: bool = PrivateAttr(default=False)
+    _pending: Any = PrivateAttr(default=None)
+    _token_counts: list = PrivateAttr(default_factory=list)
+    _token_total: int = PrivateAttr(default=0)
+
+    @property
+    def buffer_tokens(self):
+        """Tokens currently in the message buffer (summary excluded)"""
+        with self._lock:
+            self._sync_token_counts()
+            return self._token_total
+
+    def load_memory_variables(self, inputs):
+        # Never read a half-applied compaction (messages dropped, summary not yet updated)
+        with self._lock:
+            return super().load_memory_variables(inputs)
+
+    def save_context(self, inputs, outputs):
+        # Append the turn (BaseChatMemory), then prune without holding the lock
+        with self._lock:
+            super(ConversationSummaryBufferMemory, self).save_context(inputs, outputs)
+        self.prune()
+
+    def prune(self):
+        """Start summarizing old turns if the buffer is over max_token_limit"""
+        with self._lock:
+            if self._compacting:
+                return  # The running compaction re-checks the limit when it finishes
+            prunable = self._prunable_messages()
+            if not prunable:
+                return
+            self._compacting = True
+            args = (prunable, self.moving_summary_buffer)
+            if self.summary_executor is not None:
+                self._pending = self.summary_executor.submit(self._compact, *args)
+                return
+        self._compact(*args)
+
+    # LangChain's async variants would summarize inline and bypass the lock
+    async def asave_context(self, inputs, outputs):
+        await asyncio.to_thread(self.save_context, inputs, outputs)
+
+    async def aprune(self):
+        await asyncio.to_thread(self.prune)
+
+    async def aload_memory_variables(self, inputs):
+        return self.load_memory_variables(inputs)
+
+    async def aclear(self):
+        self.clear()
+
+    def wait_for_summary(self, timeout=None):
+        """Block until the current background summarization (if any) has finished"""
+        while True:
+            with self._lock:
+                pending = self._pending
+            if pending is None:
+                return
+            pending.result(timeout=timeout)
+            with self._lock:
+                # A finished compaction may have started a follow-up one
+                if self._pending is pending:
+                    self._pending = None
+                    return
+
+    def export_state(self):
+        """Consistent snapshot of summary + buffered messages (JSON-serializable)"""
+        with self._lock:
+            return {
+                "summary": self.moving_summary_buffer,
+                "messages": messages_to_dict(self.chat_memory.messages),
+            }
+
+    def import_state(self, state):
+        """Restore a snapshot created by export_state()"""
+        with self._lock:
+            self.chat_memory.clear()
+            self._reset_token_counts()
+            self.chat_memory.add_messages(messages_from_dict(state.get("messages", [])))
+            self.moving_summary_buffer = state.get("summary", "")
+
+    def clear(self):
+        with self._lock:
+            super().clear()
+            self._reset_token_counts()
+
+    def _reset_token_counts(self):
+        """Forget cached counts whenever the buffer is replaced (lengths alone can't tell)"""
+        self._token_counts = []
+        self._token_total = 0
+
+    def _sync_token_counts(self):
+        """Count only messages appended since the last call"""
+        messages = self.chat_memory.messages
+        if len(self._token_counts) > len(messages):
+            # Buffer was changed from outside (e.g. cleared) - start over
+            self._reset_token_counts()
+        for message in messages[len(self._token_counts):]:
+            tokens = count_tokens(get_buffer_string(
+                [message], human_prefix=self.human_prefix, ai_prefix=self.ai_prefix
+            ))
+            self._token_counts.append(tokens)
+            self._token_total += tokens
+
+    def _prunable_messages(self):
+        """Oldest messages that must go to get back under max_token_limit"""
+        self._sync_token_counts()
+        buffer = self.chat_memory.messages
+        token_count = self._token_total
+        prune_count = 0
+        while token_count > self.max_token_limit and prune_count < len(buffer):
+            token_count -= self._token_counts[prune_count]
+            prune_count += 1
+        return list(buffer[:prune_count])
+
+    def _compact(self, pruned_messages, previous_summary):
+        try:
+            new_summary = self.predict_new_summary(pruned_messages, previous_summary)
+        except Exception:
+            logger.exception("Conversation summarization failed, keeping the full buffer")
+            with self._lock:
+                self._compacting = False
+            return
+
+        with self._lock:
+            head = self.chat_memory.messages[:len(pruned_messages)]
+            if len(head) == len(pruned_messages) and all(a is b for a, b in zip(head, pruned_messages)):
+                del self.chat_memory.messages[:len(pruned_messages)]
+                self._token_total -= sum(self._token_counts[:len(pruned_messages)])
+                del self._token_counts[:len(pruned_messages)]
+                self.moving_summary_buffer = new_summary
+                self.summary_count += 1
+            else:
+                # Cleared or replaced (import_state) while summarizing - the summary is of another buffer
+                logger.info("Conversation buffer changed during summarization, discarding the summary")
+            self._compacting = False
+
+        # Turns saved while we were summarizing may have pushed the buffer over the limit again
+        self.prune()
@@ -1,39 +1,168 @@
 import os
-from langchain.memory import ConversationSummaryBufferMemory
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from langchain.chains import ConversationChain
-from langchain_aws import ChatBedrockConverse
+import bedrock_scheduler
+from bedrock_scheduler import session_scope
+from prompt_cache import CachedPrefixChatPrompt, CachingChatBedrockConverse
+from chat_memory import BackgroundSummaryBufferMemory
+from session_store import SQLiteSessionStore, create_session_store
+from session_manager import SessionManager, persisted_state
+import model_router
+from answer_cache import answer_cache, fingerprint, is_deterministic
 
-# Shared AI connection
-_bedrock_llm = None
+# Shared AI connections, one per model id
+_bedrock_llms = {}
 
-def get_bedrock_client():
-    """Create AWS Bedrock AI connection"""
-    global _bedrock_llm
-    if _bedrock_llm is None:
-        model_id = os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0')
-        _bedrock_llm = ChatBedrockConverse(
+# Optional external session store (CHATBOT_SESSION_STORE=sqlite:///... or redis://...)
+_session_store = create_session_store()
+
+# Where evicted sessions go without an external store (CHATBOT_SPILL_PATH= to drop them instead)
+_spill_path = os.getenv('CHATBOT_SPILL_PATH', '/tmp/chatbot-sessions.db')
+_spill_store = _session_store or (SQLiteSessionStore(_spill_path) if _spill_path else None)
+
+# Summarizes old turns after the reply is sent (CHATBOT_BACKGROUND_SUMMARY=false to summarize inline)
+_summary_executor = None
+if os.getenv('CHATBOT_BACKGROUND_SUMMARY', 'true').lower() == 'true':
+    _summary_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+# The answer cache only serves deterministic (temperature 0) replies, so it sets the default
+DEFAULT_TEMPERATURE = '0' if answer_cache.enabled else '0.1'
+
+def get_bedrock_client(model_id=None):
+    """Create AWS Bedrock AI connection (default: BEDROCK_MODEL_ID)"""
+    model_id = model_id or os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0')
+    if model_id not in _bedrock_llms:
+        # Calls queue in the shared scheduler instead of piling up SDK retries on throttling
+        _bedrock_llms[model_id] = CachingChatBedrockConverse(
             region_name=os.getenv('AWS_REGION', 'us-east-1'),
             model=model_id,
-            temperature=0.1,
-            max_tokens=1000
+            temperature=float(os.getenv('BEDROCK_TEMPERATURE', DEFAULT_TEMPERATURE)),   # > 0 turns the answer cache off
+            max_tokens=1000,
+            config=Config(retries={"max_attempts": 2, "mode": "standard"})
         )
-    return _bedrock_llm
+    return _bedrock_llms[model_id]
 
-def create_chat_memory():
-    """Create conversation memory"""
-    return ConversationSummaryBufferMemory(
+def create_chat_memory(saved_state=None):
+    """Create conversation memory (optionally restored from a saved session)"""
+    chat_memory = BackgroundSummaryBufferMemory(
         llm=get_bedrock_client(), 
-        max_token_limit=2000
+        max_token_limit=2000,
+        return_messages=True,   # Summary + turns as messages, for the cached-prefix prompt
+        summary_executor=_summary_executor
     )
+    if saved_state:
+        chat_memory.import_state(saved_state)
+    return chat_memory
 
-def get_ai_response(user_input, chat_memory):
-    """Get AI response with memory"""
-    conversation_chain = ConversationChain(
+def load_session(session_id):
+    """Restore (chat_memory, chat_history) from the session store, or start a new session"""
+    saved_state = _spill_store.load(session_id) if _spill_store else None
+    chat_history = list(saved_state.get("chat_history", [])) if saved_state else []
+    return create_chat_memory(saved_state), chat_history
+
+def save_session(session_id, chat_memory, chat_history):
+    """Write the session to the session store (no-op without one)"""
+    if _session_store:
+        _session_store.save(session_id, persisted_state(chat_memory, chat_history))
+
+def _spill_session(session):
+    """Persist an evicted session so its next request can reload it"""
+    if _spill_store:
+        _spill_store.save(session.session_id, persisted_state(session.chat_memory, session.chat_history))
+    bedrock_scheduler.scheduler.forget_session(session.session_id)
+
+def create_conversation(chat_memory):
+    """Create the conversation chain for one session (build once, reuse every turn)"""
+    return ConversationChain(
         llm=get_bedrock_client(), 
         memory=chat_memory, 
-        verbose=True
+        prompt=CachedPrefixChatPrompt(),   # Instructions + summary are served from the prompt cache
+        verbose=os.getenv('CHATBOT_VERBOSE', 'false').lower() == 'true'
+    )
+
+def _route_turn(user_input, conversation):
+    """Point the session's conversation at the model chosen for this turn"""
+    route, model_id, reason = model_router.choose_route(user_input)
+    conversation.llm = get_bedrock_client(model_id)
+    return route, model_id, reason
+
+def _answer_cache_key(conversation, model_id, user_input):
+    """Cache key for this turn, or None when the answer cache can't be used"""
+    temperature = getattr(conversation.llm, 'temperature', None)
+    if not answer_cache.enabled or not is_deterministic(temperature):
+        return None
+    return fingerprint(model_id, temperature, conversation.memory.export_state(), user_input)
+
+def _cached_answer(conversation, cache_key, model_id, user_input):
+    """Cached answer for this turn (saved to memory like a model reply), or None"""
+    answer = answer_cache.get(cache_key) if cache_key else None
+    if answer is not None:
+        inputs = conversation.prep_inputs({conversation.input_key: user_input})
+        conversation.prep_outputs(inputs, {conversation.output_key: answer})
+        model_router.route_stats.record("cache", model_id, 0.0, model_router.UsageCollector(), "answer cache hit")
+    return answer
+
+def get_ai_response(user_input, chat_memory, conversation=None, session_id=None):
+    """Get AI response with memory (routed to the fast or the large model)"""
+    if conversation is None:
+        conversation = create_conversation(chat_memory)
+    route, model_id, reason = _route_turn(user_input, conversation)
+    cache_key = _answer_cache_key(conversation, model_id, user_input)
+    cached = _cached_answer(conversation, cache_key, model_id, user_input)
+    if cached is not None:
+        return cached
+
+    usage = model_router.UsageCollector()
+    start = time.perf_counter()
+    with session_scope(session_id):
+        response = conversation.invoke(user_input, config={"callbacks": [usage]})['response']
+    model_router.route_stats.record(route, model_id, time.perf_counter() - start, usage, reason)
+    if cache_key:
+        answer_cache.put(cache_key, response)
+    return response
+
+def _chunk_text(content):
+    """Text of one streamed chunk (Converse streams a list of content blocks)"""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        block.get("text", "") for block in content
+        if isinstance(block, dict) and block.get("type", "text") == "text"
     )
-    return conversation_chain.invoke(user_input)['response']
 
+def stream_ai_response(user_input, chat_memory, conversation=None, session_id=None):
+    """Stream AI response token by token (ConverseStream), then save the full reply to memory"""
+    if conversation is None:
+        conversation = create_conversation(chat_memory)
+    route, model_id, reason = _route_turn(user_input, conversation)
+    cache_key = _answer_cache_key(conversation, model_id, user_input)
+    cached = _cached_answer(conversation, cache_key, model_id, user_input)
+    if cached is not None:
+        yield cached
+        return
+
+    inputs = conversation.prep_inputs({conversation.input_key: user_input})
+    prompt = conversation.prompt.format_prompt(**inputs)
+
+    usage = model_router.UsageCollector()
+    start = time.perf_counter()
+    response_parts = []
+    with session_scope(session_id):
+        for chunk in conversation.llm.stream(prompt.to_messages()):
+            usage.add(chunk.usage_metadata)
+            text = _chunk_text(chunk.content)
+            if text:
+                response_parts.append(text)
+                yield text
+    model_router.route_stats.record(route, model_id, time.perf_counter() - start, usage, reason)
 
+    # Same memory update ConversationChain does after a normal (non-streaming) call
+    response = "".join(response_parts)
+    conversation.prep_outputs(inputs, {conversation.output_key: response})
+    if cache_key:
+        answer_cache.put(cache_key, response)
 
+# Live sessions of this process (idle or over-budget sessions are spilled and reloaded on demand)
+session_manager = SessionManager(load_session, create_conversation, _spill_session)
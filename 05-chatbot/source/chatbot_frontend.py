@@ -1,33 +1,118 @@
+import os
 import streamlit as st 
 import chatbot_backend as backend
+from session_manager import new_session_id, session_id_from_token, session_token
+
+# Stream replies token by token (set CHATBOT_STREAMING=false to wait for the full reply)
+STREAMING = os.getenv('CHATBOT_STREAMING', 'true').lower() == 'true'
+
+# Messages drawn per rerun (older ones appear with "Load earlier messages")
+HISTORY_WINDOW = int(os.getenv('CHATBOT_HISTORY_WINDOW', '20'))
+
+# How long a turn waits for another tab's turn in the same session before giving up
+TURN_WAIT_SECONDS = float(os.getenv('CHATBOT_TURN_WAIT_SECONDS', '60'))
 
 st.title("Amazon Bedrock Chatbot 🤖")
 
-# Initialize chat memory
-if 'chat_memory' not in st.session_state: 
-    st.session_state.chat_memory = backend.create_chat_memory()
+# Session ids are generated server-side. With CHATBOT_SESSION_SECRET set, the URL carries a signed resume token,
+# so a reload (or a different task behind the ALB) finds the same conversation; unsigned ids are ignored
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = session_id_from_token(st.query_params.get("session")) or new_session_id()
+    token = session_token(st.session_state.session_id)
+    if token:
+        st.query_params["session"] = token
+    else:
+        st.query_params.pop("session", None)
+
+# Chat memory, history and conversation live in the backend's session manager, not in session_state,
+# so abandoned tabs can be spilled to disk (restored from the session store when the tab comes back)
+session = backend.session_manager.open(st.session_state.session_id)
+
+# Display chat history - only the most recent window, so reruns stay fast in long sessions
+if 'history_window' not in st.session_state:
+    st.session_state.history_window = HISTORY_WINDOW
 
-# Initialize chat history
-if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+hidden_messages = max(0, len(session.chat_history) - st.session_state.history_window)
+if hidden_messages and st.button(f"⬆️ Load earlier messages ({hidden_messages} hidden)"):
+    st.session_state.history_window += HISTORY_WINDOW
+    st.rerun()
 
-# Display chat history
-for message in st.session_state.chat_history: 
+for message in session.chat_history[hidden_messages:]: 
     with st.chat_message(message["role"]): 
         st.markdown(message["text"]) 
 
+# Model routing stats (process-wide) for tuning the fast/large thresholds
+with st.sidebar.expander("⚡ Model routing"):
+    route_stats = backend.model_router.route_stats.snapshot()
+    if not route_stats:
+        st.caption("No turns yet")
+    for route, stats in route_stats.items():
+        st.markdown(
+            f"**{route}** · `{stats['model_id']}`  \n"
+            f"{stats['turns']} turns · avg {stats['avg_latency_seconds']:.2f}s · "
+            f"avg {stats['avg_input_tokens']:.0f} in / {stats['avg_output_tokens']:.0f} out tokens · "
+            f"{stats['cache_read_tokens']} cached prompt tokens read"
+        )
+
+# Live sessions held by this task and their approximate memory footprint
+session_stats = backend.session_manager.stats()
+st.sidebar.caption(
+    f"🧠 {session_stats['sessions']} live sessions · {session_stats['bytes'] / 1024 / 1024:.1f} MB "
+    f"of {session_stats['budget_bytes'] / 1024 / 1024:.0f} MB · {session_stats['evictions']} spilled"
+)
+
+# Time this session spent queued for Bedrock (calls are shared fairly across all sessions in the task)
+with st.sidebar.expander("⏳ Bedrock queue"):
+    wait_stats = backend.bedrock_scheduler.scheduler.session_stats(st.session_state.session_id)
+    if wait_stats["calls"]:
+        st.markdown(
+            f"Last wait: {wait_stats['last_wait_seconds']:.2f}s · "
+            f"avg {wait_stats['total_wait_seconds'] / wait_stats['calls']:.2f}s over {wait_stats['calls']} calls"
+        )
+    for model_id, lane in backend.bedrock_scheduler.scheduler.snapshot().items():
+        st.caption(f"`{model_id}`: {lane['active']}/{lane['max_concurrency']} in flight, {lane['queued']} waiting")
+
 # Chat input
 user_input = st.chat_input("Ask me anything...")
 if user_input: 
-    # Display user message
-    with st.chat_message("user"): 
-        st.markdown(user_input) 
-    st.session_state.chat_history.append({"role":"user", "text":user_input}) 
-
-    # Get AI response
-    ai_response = backend.get_ai_response(user_input, st.session_state.chat_memory)
-    
-    # Display AI response
-    with st.chat_message("assistant"): 
-        st.markdown(ai_response) 
-    st.session_state.chat_history.append({"role":"assistant", "text":ai_response}) 
\ No newline at end of file
+    try:
+        # One turn at a time per session - a second tab on the same link waits for the current answer
+        if not session.turn_lock.acquire(timeout=TURN_WAIT_SECONDS):
+            st.warning("⏳ Another tab is still answering in this conversation, please try again in a moment.")
+            st.stop()
+        try:
+            # Display user message
+            session.chat_history.append({"role": "user", "text": user_input})
+            with st.chat_message("user"): 
+                st.markdown(user_input) 
+
+            # Get AI response and display it
+            with st.chat_message("assistant"): 
+                try:
+                    if STREAMING:
+                        # Tokens appear as they arrive; write_stream returns the complete text
+                        ai_response = st.write_stream(backend.stream_ai_response(
+                            user_input, session.chat_memory, session.conversation,
+                            session_id=st.session_state.session_id
+                        ))
+                    else:
+                        ai_response = backend.get_ai_response(
+                            user_input, session.chat_memory, session.conversation,
+                            session_id=st.session_state.session_id
+                        )
+                        st.markdown(ai_response) 
+                except backend.bedrock_scheduler.SchedulerBusy:
+                    st.warning("⏳ The assistant is busy right now, please try again in a moment.")
+                    session.chat_history.pop()   # Drop the unanswered question
+                    st.stop()
+            session.chat_history.append({"role": "assistant", "text": ai_response})
+
+            # Persist the turn so any task can continue this conversation
+            backend.save_session(session.session_id, session.chat_memory, session.chat_history)
+        finally:
+            session.turn_lock.release()
+    finally:
+        # Ends the rerun (also on st.stop() or an error), so the session can be spilled again
+        backend.session_manager.touch(session)
+else:
+    backend.session_manager.release(session)
\ No newline at end of file
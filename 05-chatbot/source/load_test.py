@@ -0,0 +1,194 @@
+"""
+Load test: N concurrent chat sessions against a stub model with realistic latency
+
+Drives chatbot_backend.get_ai_response() the way the Streamlit app does (one
+thread, memory and conversation chain per session) to see how many concurrent
+conversations one task can carry. Bedrock is replaced by ScheduledStubChatModel,
+so the numbers are the task's own overhead: threads, memory, summarization,
+tokenizing and the shared Bedrock scheduler. The scheduler's concurrency and
+RPM limits are lifted for the stub; --production-limits keeps BEDROCK_MAX_CONCURRENCY,
+BEDROCK_RPM, ... to see how the real quotas queue (and reject) turns instead.
+
+Reports turns/s, turn latency percentiles, failed turns, how often old turns
+were summarized and how much each session's memory grows.
+
+Usage:
+    python load_test.py --sessions 50 --turns 20 --latency 1.5
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import threading
+import time
+
+import chatbot_backend as backend
+from stub_llm import ScheduledStubChatModel
+
+# Multi-turn scripts - sessions cycle through them, longer runs repeat with follow-ups
+SCRIPTS = [
+    [
+        "Hi! I'm planning a trip to Japan in April.",
+        "What cities should I visit in two weeks?",
+        "How do I get from Tokyo to Kyoto?",
+        "Is the JR Pass worth it for that route?",
+        "What should I pack for the weather in April?",
+        "Can you suggest a day-by-day plan for Kyoto?",
+    ],
+    [
+        "Explain the difference between a list and a tuple in Python.",
+        "When would I use a tuple instead?",
+        "Can you write an example of a named tuple?",
+        "How does that compare to a dataclass?",
+        "Which one is faster to create?",
+    ],
+    [
+        "hello",
+        "what can you do?",
+        "tell me a joke",
+        "another one",
+        "thanks!",
+    ],
+    [
+        "I need to write a cover letter for a data analyst job at a retail company.",
+        "My background is five years in finance, mostly Excel and some SQL.",
+        "Make the opening paragraph more confident.",
+        "Now shorten the whole letter to under 250 words.",
+        "Give me three interview questions they might ask.",
+    ],
+]
+
+def max_rss_mb():
+    """Peak resident memory of this process (Linux reports KB)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def state_bytes(chat_memory, chat_history):
+    """Approximate per-session footprint: what the session store would persist"""
+    return len(json.dumps({**chat_memory.export_state(), "chat_history": chat_history}).encode("utf-8"))
+
+def run_session(session_index, args, results):
+    script = SCRIPTS[session_index % len(SCRIPTS)]
+    chat_memory = backend.create_chat_memory()
+    conversation = backend.create_conversation(chat_memory)
+    chat_history = []
+    latencies = []
+    sizes = []
+    failures = {"busy": 0, "errors": 0, "first_error": None}
+
+    for turn in range(args.turns):
+        user_input = script[turn % len(script)]
+        if turn >= len(script):
+            user_input += f" (follow-up {turn // len(script)})"
+        start = time.perf_counter()
+        try:
+            ai_response = backend.get_ai_response(
+                user_input, chat_memory, conversation, session_id=f"load-{session_index}"
+            )
+        except backend.bedrock_scheduler.SchedulerBusy:
+            failures["busy"] += 1   # What the UI shows as "busy, try again"
+            continue
+        except Exception as e:
+            failures["errors"] += 1
+            failures["first_error"] = failures["first_error"] or f"{type(e).__name__}: {e}"
+            continue
+        latencies.append(time.perf_counter() - start)
+        chat_history += [{"role": "user", "text": user_input}, {"role": "assistant", "text": ai_response}]
+        sizes.append(state_bytes(chat_memory, chat_history))
+        if args.think_time:
+            time.sleep(args.think_time)
+
+    chat_memory.wait_for_summary()
+    results[session_index] = {
+        "queue_wait": backend.bedrock_scheduler.scheduler.session_stats(f"load-{session_index}"),
+        "latencies": latencies,
+        "sizes": sizes,
+        "failures": failures,
+        "summaries": chat_memory.summary_count,
+        "buffer_tokens": chat_memory.buffer_tokens,
+    }
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent chat session load test (stub model)")
+    parser.add_argument('--sessions', type=int, default=20, help="Concurrent sessions")
+    parser.add_argument('--turns', type=int, default=15, help="Turns per session")
+    parser.add_argument('--latency', type=float, default=1.0, help="Stub model latency per call (seconds)")
+    parser.add_argument('--reply-words', type=int, default=120, help="Words per stub reply")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Pause between a session's turns (seconds)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="Seconds over which sessions are started")
+    parser.add_argument('--production-limits', action='store_true',
+                        help="Keep the scheduler's BEDROCK_* concurrency/RPM limits (default: lifted for the stub)")
+    args = parser.parse_args()
+
+    if not args.production_limits:
+        # Bedrock quotas would only measure the queue, not the task - give every call a slot right away
+        scheduler = backend.bedrock_scheduler.scheduler
+        scheduler.max_concurrency = scheduler.max_queue = args.sessions * 2   # A turn + its summary
+        scheduler.requests_per_minute = 10 ** 9
+        scheduler.model_limits = {}
+
+    # One stub per model id (fast, large, summarizer), each queueing in its own scheduler lane
+    stubs = {}
+    def get_stub_client(model_id=None):
+        model_id = model_id or os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0')
+        if model_id not in stubs:
+            stubs[model_id] = ScheduledStubChatModel(
+                model_id=model_id, latency=args.latency, reply=" ".join(["word"] * args.reply_words)
+            )
+        return stubs[model_id]
+    backend.get_bedrock_client = get_stub_client
+
+    rss_before = max_rss_mb()
+    results = {}
+    threads = [
+        threading.Thread(target=run_session, args=(index, args, results), name=f"session-{index}")
+        for index in range(args.sessions)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        if args.ramp:
+            time.sleep(args.ramp / args.sessions)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(latency for result in results.values() for latency in result["latencies"])
+    summaries = sum(result["summaries"] for result in results.values())
+    first_sizes = [result["sizes"][0] for result in results.values() if result["sizes"]]
+    last_sizes = [result["sizes"][-1] for result in results.values() if result["sizes"]]
+    turns = len(latencies)
+    busy = sum(result["failures"]["busy"] for result in results.values())
+    errors = sum(result["failures"]["errors"] for result in results.values())
+    first_error = next((result["failures"]["first_error"] for result in results.values()
+                        if result["failures"]["first_error"]), None)
+    overhead = [latency - args.latency for latency in latencies]
+    queue_calls = sum(result["queue_wait"]["calls"] for result in results.values())
+    queue_wait = sum(result["queue_wait"]["total_wait_seconds"] for result in results.values())
+
+    limits = "production" if args.production_limits else "lifted"
+    print(f"sessions={args.sessions} turns/session={args.turns} stub latency={args.latency}s "
+          f"scheduler limits={limits}")
+    print(f"failed turns      {busy + errors} of {args.sessions * args.turns} "
+          f"({busy} scheduler busy, {errors} errors{f'; first: {first_error}' if first_error else ''})")
+    if not turns:
+        return
+    print(f"throughput        {turns / elapsed:8.1f} turns/s ({turns} turns in {elapsed:.1f}s)")
+    print(f"turn latency      p50 {percentile(latencies, 0.5):.3f}s  p95 {percentile(latencies, 0.95):.3f}s  "
+          f"p99 {percentile(latencies, 0.99):.3f}s  max {latencies[-1]:.3f}s")
+    print(f"overhead vs model p50 {statistics.median(overhead) * 1000:.1f}ms  "
+          f"p95 {percentile(sorted(overhead), 0.95) * 1000:.1f}ms")
+    print(f"bedrock queue     {queue_calls} calls, avg wait {queue_wait / max(1, queue_calls) * 1000:.1f}ms")
+    print(f"summarizations    {summaries} ({summaries / turns:.2f} per turn, "
+          f"{summaries / args.sessions:.1f} per session)")
+    print(f"session state     first turn {statistics.mean(first_sizes) / 1024:.1f} KB -> "
+          f"last turn {statistics.mean(last_sizes) / 1024:.1f} KB "
+          f"(+{(statistics.mean(last_sizes) - statistics.mean(first_sizes)) / max(1, args.turns - 1):.0f} B/turn)")
+    print(f"process peak RSS  {max_rss_mb():.0f} MB "
+          f"(+{(max_rss_mb() - rss_before) / args.sessions:.2f} MB per session)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Latency-aware model routing: short/simple turns go to a fast model, the rest to the large one"""
+import logging
+import os
+import re
+import threading
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger(__name__)
+
+ROUTER_ENABLED = os.getenv('CHATBOT_ROUTER', 'true').lower() == 'true'
+LARGE_MODEL_ID = os.getenv('BEDROCK_MODEL_ID', 'amazon.nova-pro-v1:0')
+FAST_MODEL_ID = os.getenv('BEDROCK_FAST_MODEL_ID', 'amazon.nova-lite-v1:0')
+
+# Escalation rules - a turn goes to the large model if ANY of them matches
+MAX_FAST_WORDS = int(os.getenv('ROUTER_MAX_FAST_WORDS', '20'))          # Longer inputs need the large model
+MAX_FAST_QUESTIONS = int(os.getenv('ROUTER_MAX_FAST_QUESTIONS', '1'))   # Several questions in one turn
+ESCALATE_KEYWORDS = [
+    keyword.strip() for keyword in os.getenv(
+        'ROUTER_ESCALATE_KEYWORDS',
+        'explain,why,how,compare,analyze,analyse,code,write,summarize,plan,design,debug,calculate,step by step'
+    ).split(',') if keyword.strip()
+]
+_escalate_pattern = re.compile(
+    r'\b(' + '|'.join(re.escape(keyword) for keyword in ESCALATE_KEYWORDS) + r')\b', re.IGNORECASE
+) if ESCALATE_KEYWORDS else None
+
+def choose_route(user_input):
+    """
+    Pick a route for one turn
+
+    Returns:
+        (route, model_id, reason) - route is "fast" or "large"
+    """
+    if not ROUTER_ENABLED:
+        return "large", LARGE_MODEL_ID, "router disabled"
+    if len(user_input.split()) > MAX_FAST_WORDS:
+        return "large", LARGE_MODEL_ID, "long input"
+    if user_input.count('?') > MAX_FAST_QUESTIONS:
+        return "large", LARGE_MODEL_ID, "several questions"
+    if '```' in user_input:
+        return "large", LARGE_MODEL_ID, "code block"
+    if _escalate_pattern is not None:
+        match = _escalate_pattern.search(user_input)
+        if match:
+            return "large", LARGE_MODEL_ID, f"keyword '{match.group(0).lower()}'"
+    return "fast", FAST_MODEL_ID, "short and simple"
+
+class UsageCollector(BaseCallbackHandler):
+    """Collects token usage reported by the model for one turn"""
+
+    def __init__(self):
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+
+    def add(self, usage_metadata):
+        if usage_metadata:
+            self.input_tokens += usage_metadata.get('input_tokens', 0)
+            self.output_tokens += usage_metadata.get('output_tokens', 0)
+            details = usage_metadata.get('input_token_details') or {}
+            self.cache_read_tokens += details.get('cache_read', 0)
+            self.cache_write_tokens += details.get('cache_creation', 0)
+
+    def on_llm_end(self, response, **kwargs):
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, 'message', None)
+                self.add(getattr(message, 'usage_metadata', None))
+
+class RouteStats:
+    """Per-route latency and token usage (process-wide) for tuning the routing thresholds"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._first_turn = True
+
+    def record(self, route, model_id, latency_seconds, usage, reason=""):
+        """Add one turn; usage is the turn's UsageCollector"""
+        with self._lock:
+            first_turn, self._first_turn = self._first_turn, False
+            stats = self._routes.setdefault(route, {
+                "model_id": model_id, "turns": 0, "total_latency_seconds": 0.0,
+                "max_latency_seconds": 0.0, "input_tokens": 0, "output_tokens": 0,
+                "cache_read_tokens": 0, "cache_write_tokens": 0,
+            })
+            stats["model_id"] = model_id
+            stats["turns"] += 1
+            stats["total_latency_seconds"] += latency_seconds
+            stats["max_latency_seconds"] = max(stats["max_latency_seconds"], latency_seconds)
+            stats["input_tokens"] += usage.input_tokens
+            stats["output_tokens"] += usage.output_tokens
+            stats["cache_read_tokens"] += usage.cache_read_tokens
+            stats["cache_write_tokens"] += usage.cache_write_tokens
+        logger.info(
+            "route=%s model=%s reason=%s latency=%.2fs input_tokens=%d output_tokens=%d "
+            "cache_read_tokens=%d cache_write_tokens=%d",
+            route, model_id, reason, latency_seconds, usage.input_tokens, usage.output_tokens,
+            usage.cache_read_tokens, usage.cache_write_tokens
+        )
+        if first_turn:
+            # Compare with later turns to see what the start-up warm-up saved
+            logger.info("First turn in this process took %.2fs (%s)", latency_seconds, model_id)
+
+    def snapshot(self):
+        """Totals plus averages per route"""
+        with self._lock:
+            result = {}
+            for route, stats in self._routes.items():
+                turns = stats["turns"] or 1
+                result[route] = {
+                    **stats,
+                    "avg_latency_seconds": stats["total_latency_seconds"] / turns,
+                    "avg_input_tokens": stats["input_tokens"] / turns,
+                    "avg_output_tokens": stats["output_tokens"] / turns,
+                }
+            return result
+
+route_stats = RouteStats()
@@ -0,0 +1,134 @@
+"""
+Bedrock prompt caching for the stable prefix of every chat turn
+
+The default ConversationChain prompt is one big string (instructions + summary +
+recent turns + new input), so the model reprocesses all of it every turn. Here
+the prompt is split into chat messages:
+
+    system:  instructions + running summary  [cachePoint]
+    history: buffered turns
+    human:   new input
+
+Everything before the cache point only changes when a new summary is swapped
+in, so Bedrock serves it from the prompt cache on the other turns. The cache
+is keyed by the exact prefix, which makes a summary change the only thing that
+invalidates it.
+
+Bedrock ignores cache points after a prefix shorter than the model's minimum
+(about 1K tokens; the instructions alone are ~50), so the client only sends the
+cache point once instructions + summary reach that size.
+"""
+import os
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts.chat import BaseChatPromptTemplate
+
+from bedrock_scheduler import ScheduledChatBedrockConverse
+from token_counter import count_tokens
+
+PROMPT_CACHE_ENABLED = os.getenv('CHATBOT_PROMPT_CACHE', 'true').lower() == 'true'
+
+# Model ids (or inference profile ids containing them) that accept Converse cache points
+PROMPT_CACHE_MODELS = [
+    model.strip() for model in os.getenv(
+        'PROMPT_CACHE_MODELS',
+        'amazon.nova-micro,amazon.nova-lite,amazon.nova-pro,amazon.nova-premier,'
+        'anthropic.claude-3-5-haiku,anthropic.claude-3-7-sonnet,anthropic.claude-sonnet-4,anthropic.claude-opus-4'
+    ).split(',') if model.strip()
+]
+
+# Smallest prefix (tokens) Bedrock caches; models missing here use PROMPT_CACHE_MIN_TOKENS
+PROMPT_CACHE_MIN_TOKENS = int(os.getenv('PROMPT_CACHE_MIN_TOKENS', '1024'))
+MODEL_MIN_CACHE_TOKENS = {
+    'anthropic.claude-3-5-haiku': 2048,
+    'amazon.nova': 1000,
+}
+
+# Same instructions as LangChain's default ConversationChain prompt
+SYSTEM_TEXT = (
+    "The following is a friendly conversation between a human and an AI. The AI is talkative and "
+    "provides lots of specific details from its context. If the AI does not know the answer to a "
+    "question, it truthfully says it does not know."
+)
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+def supports_prompt_cache(model_id):
+    return PROMPT_CACHE_ENABLED and any(model in model_id for model in PROMPT_CACHE_MODELS)
+
+def min_cache_tokens(model_id):
+    for model, tokens in MODEL_MIN_CACHE_TOKENS.items():
+        if model in model_id:
+            return tokens
+    return PROMPT_CACHE_MIN_TOKENS
+
+def prefix_tokens(messages):
+    """Tokens of the text before the last cache point (0 without one)"""
+    texts, prefix = [], None
+    for message in messages:
+        blocks = message.content if isinstance(message.content, list) else [message.content]
+        for block in blocks:
+            if is_cache_point(block):
+                prefix = list(texts)
+            else:
+                texts.append(block.get("text", "") if isinstance(block, dict) else block)
+    return count_tokens("".join(prefix)) if prefix else 0
+
+def is_cache_point(block):
+    return isinstance(block, dict) and "cachePoint" in block
+
+def strip_cache_points(messages):
+    """Same messages without cache points (for models that reject them)"""
+    stripped = []
+    for message in messages:
+        if isinstance(message.content, list) and any(is_cache_point(block) for block in message.content):
+            content = [block for block in message.content if not is_cache_point(block)]
+            message = message.model_copy(update={"content": content})
+        stripped.append(message)
+    return stripped
+
+class CachedPrefixChatPrompt(BaseChatPromptTemplate):
+    """Conversation prompt: [instructions + summary, cache point] + buffered turns + new input
+
+    Needs memory with return_messages=True (the summary arrives as a leading SystemMessage).
+    The cache point is always added here; CachingChatBedrockConverse drops it while
+    the prefix is shorter than the model's minimum cacheable length.
+    """
+
+    input_variables: list = ["history", "input"]
+    system_text: str = SYSTEM_TEXT
+
+    def format_messages(self, **kwargs):
+        history = list(kwargs["history"])
+        prefix = self.system_text
+        if history and isinstance(history[0], SystemMessage):
+            prefix += f"\n\nSummary of the conversation so far:\n{history.pop(0).content}"
+        return [
+            SystemMessage(content=[{"type": "text", "text": prefix}, CACHE_POINT]),
+            *history,
+            HumanMessage(content=kwargs["input"]),
+        ]
+
+    @property
+    def _prompt_type(self):
+        return "cached-prefix-chat"
+
+class CachingChatBedrockConverse(ScheduledChatBedrockConverse):
+    """
+    Scheduled Converse client that only sends cache points Bedrock can use
+
+    They are dropped for models without prompt caching, and while the prefix is
+    below the model's minimum cacheable length.
+    """
+
+    def _cacheable(self, messages):
+        if not supports_prompt_cache(self.model_id) or prefix_tokens(messages) < min_cache_tokens(self.model_id):
+            return strip_cache_points(messages)
+        return messages
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        messages = self._cacheable(messages)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        messages = self._cacheable(messages)
+        yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
@@ -0,0 +1,177 @@
+"""
+In-process registry of live chat sessions with idle eviction and a memory budget
+
+Streamlit keeps a tab's session_state until the browser session dies, so
+abandoned tabs used to pin their memory on the task forever. Sessions now live
+here instead (st.session_state only keeps the session id). The manager tracks
+each session's last activity and approximate size, and spills sessions to the
+session store (or drops them, without one) when they have been idle too long
+or the total goes over budget. A spilled session is reloaded on its next use.
+
+Session ids are generated here, never taken from the client. A conversation can
+only be resumed from a URL when CHATBOT_SESSION_SECRET is set: the link then
+carries the id signed with that secret, so ids cannot be chosen or guessed.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IDLE_SECONDS = int(os.getenv('CHATBOT_SESSION_IDLE_SECONDS', '1800'))          # Spill sessions idle this long
+MEMORY_BUDGET_BYTES = int(os.getenv('CHATBOT_MEMORY_BUDGET_MB', '256')) * 1024 * 1024  # All live sessions
+SESSION_SECRET = os.getenv('CHATBOT_SESSION_SECRET', '')    # Empty = sessions can't be resumed from a link
+
+def new_session_id():
+    """Random, server-generated session id"""
+    return secrets.token_hex(16)
+
+def session_token(session_id, secret=SESSION_SECRET):
+    """Resume token for the URL: the session id plus its HMAC, or None when links are disabled"""
+    if not secret:
+        return None
+    signature = hmac.new(secret.encode("utf-8"), session_id.encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"{session_id}.{signature}"
+
+def session_id_from_token(token, secret=SESSION_SECRET):
+    """Session id from a resume token, or None if links are disabled or the signature doesn't match"""
+    if not secret or not token or "." not in token:
+        return None
+    session_id = token.rsplit(".", 1)[0]
+    expected = session_token(session_id, secret)
+    return session_id if hmac.compare_digest(expected, token) else None
+
+def persisted_state(chat_memory, chat_history):
+    """What the session store keeps for a session: summary, buffered messages and role + text history"""
+    stored_history = [{"role": message["role"], "text": message["text"]} for message in chat_history]
+    return {**chat_memory.export_state(), "chat_history": stored_history}
+
+class ChatSession:
+    """One conversation: memory, chain and UI history"""
+
+    def __init__(self, session_id, chat_memory, chat_history, conversation):
+        self.session_id = session_id
+        self.chat_memory = chat_memory
+        self.chat_history = chat_history
+        self.conversation = conversation
+        self.last_active = time.monotonic()
+        self.approx_bytes = 0
+        self.in_flight = 0      # Reruns between open() and release()/touch() - never evicted meanwhile
+        self.spill_lock = threading.Lock()  # Spills of one session are written in order
+        self.turn_lock = threading.Lock()   # One turn at a time (two tabs on one link would interleave memory)
+
+    def measure(self):
+        """Approximate footprint: the persisted form (Python objects are larger, but proportional)"""
+        state = persisted_state(self.chat_memory, self.chat_history)
+        self.approx_bytes = len(json.dumps(state).encode("utf-8"))
+        return self.approx_bytes
+
+class SessionManager:
+    """
+    Live sessions for this process
+
+    open() every rerun, then touch() after a turn or release() when the rerun
+    had no turn. In between the session is in flight and is not evicted, so a
+    turn never writes to a session object that was already spilled.
+    """
+
+    def __init__(self, load, create_conversation, spill, idle_seconds=IDLE_SECONDS,
+                 budget_bytes=MEMORY_BUDGET_BYTES):
+        self.load = load                                # session_id -> (chat_memory, chat_history)
+        self.create_conversation = create_conversation  # chat_memory -> conversation chain
+        self.spill = spill                              # ChatSession -> None (persist before eviction)
+        self.idle_seconds = idle_seconds
+        self.budget_bytes = budget_bytes
+        self._lock = threading.RLock()
+        self._sessions = {}
+        self._spilling = {}     # session_id -> (session, ticket) while its spill is being written
+        self.evictions = 0
+
+    def open(self, session_id):
+        """Live session for session_id, reloaded (or started) if it is not in memory"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and session_id in self._spilling:
+                # Evicted but still being written - take the object back instead of loading an older copy
+                session = self._spilling.pop(session_id)[0]
+                self._sessions[session_id] = session
+            if session is None:
+                chat_memory, chat_history = self.load(session_id)
+                session = ChatSession(session_id, chat_memory, chat_history, self.create_conversation(chat_memory))
+                session.measure()
+                self._sessions[session_id] = session
+            session.last_active = time.monotonic()
+            session.in_flight += 1
+        self.enforce(keep=session_id)
+        return session
+
+    def release(self, session):
+        """End a rerun started by open()"""
+        with self._lock:
+            session.in_flight = max(0, session.in_flight - 1)
+            session.last_active = time.monotonic()
+        self.enforce(keep=session.session_id)
+
+    def touch(self, session):
+        """Record the new size after a turn and end the rerun"""
+        session.measure()
+        self.release(session)
+
+    def enforce(self, keep=None):
+        """
+        Spill idle sessions, then least recently active ones until under budget
+
+        Victims are picked under the lock, but written to the store outside it,
+        so other sessions' open() calls don't wait for the store.
+        """
+        with self._lock:
+            now = time.monotonic()
+            by_age = sorted(self._sessions.values(), key=lambda session: session.last_active)
+            total = sum(session.approx_bytes for session in by_age)
+            victims = []
+            for session in by_age:
+                if session.session_id == keep:
+                    continue
+                if session.in_flight and now - session.last_active < self.idle_seconds:
+                    continue    # Mid-turn (a pin older than idle_seconds is from a rerun that died)
+                if now - session.last_active >= self.idle_seconds:
+                    victims.append((session, "idle"))
+                elif total > self.budget_bytes:
+                    victims.append((session, "over budget"))
+                else:
+                    continue
+                total -= session.approx_bytes
+            spills = []
+            for session, reason in victims:
+                del self._sessions[session.session_id]
+                ticket = object()
+                self._spilling[session.session_id] = (session, ticket)
+                spills.append((session, reason, ticket))
+            self.evictions += len(victims)
+
+        for session, reason, ticket in spills:
+            try:
+                with session.spill_lock:
+                    self.spill(session)
+            except Exception:
+                logger.exception("Could not spill session %s, dropping it", session.session_id)
+            finally:
+                with self._lock:
+                    if self._spilling.get(session.session_id, (None, None))[1] is ticket:
+                        del self._spilling[session.session_id]
+            logger.info("Evicted session %s (%s, %d bytes)", session.session_id, reason, session.approx_bytes)
+
+    def stats(self):
+        """Live session count and total approximate footprint"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": sum(session.approx_bytes for session in self._sessions.values()),
+                "budget_bytes": self.budget_bytes,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,151 @@
+"""External session store for chat memory + history (lets the chatbot scale past one task)"""
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Bounds for server-side session data
+SESSION_TTL_SECONDS = int(os.getenv('CHATBOT_SESSION_TTL_SECONDS', '86400'))      # Idle sessions expire after 1 day
+SESSION_MAX_BYTES = int(os.getenv('CHATBOT_SESSION_MAX_BYTES', str(256 * 1024)))  # Per-session size cap
+
+def encode_state(state, max_bytes):
+    """
+    Serialize a session state, trimming the oldest entries until it fits max_bytes
+
+    UI history goes first (the memory summary already covers old turns), then the
+    oldest buffered memory messages. The running summary is always kept.
+    """
+    state = {
+        "summary": state.get("summary", ""),
+        "messages": list(state.get("messages", [])),
+        "chat_history": list(state.get("chat_history", [])),
+    }
+    data = json.dumps(state)
+    while len(data.encode("utf-8")) > max_bytes and (state["chat_history"] or state["messages"]):
+        if state["chat_history"]:
+            state["chat_history"].pop(0)
+        else:
+            state["messages"].pop(0)
+        data = json.dumps(state)
+    return data
+
+class SessionStore(ABC):
+    """Base class: load/save/delete one session's state (a JSON-serializable dict)"""
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_bytes=SESSION_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+    @abstractmethod
+    def load(self, session_id):
+        """Stored state for session_id, or None if it is missing or expired"""
+
+    @abstractmethod
+    def save(self, session_id, state):
+        """Store state (trimmed to max_bytes) and restart the session's TTL"""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Forget session_id"""
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions in a local SQLite file (survives restarts; shared by processes on one host)"""
+
+    PURGE_EVERY = 100   # Saves between sweeps of expired sessions
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._lock = threading.Lock()
+        self._saves = 0
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                "session_id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            with connection:    # Commits on success, rolls back on error
+                yield connection
+        finally:
+            connection.close()
+
+    def load(self, session_id):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT state FROM chat_sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id, state):
+        data = encode_state(state, self.max_bytes)
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, state, expires_at) VALUES (?, ?, ?)",
+                (session_id, data, time.time() + self.ttl_seconds)
+            )
+        with self._lock:
+            self._saves += 1
+            purge = self._saves % self.PURGE_EVERY == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, session_id):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+    def purge_expired(self):
+        """Delete sessions past their TTL; returns how many were removed"""
+        with self._connect() as connection:
+            return connection.execute(
+                "DELETE FROM chat_sessions WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+class RedisSessionStore(SessionStore):
+    """Sessions in Redis (or any Redis-protocol server) - shared by every chatbot task"""
+
+    def __init__(self, client, key_prefix="chatbot:session:", **kwargs):
+        super().__init__(**kwargs)
+        self.client = client
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def load(self, session_id):
+        data = self.client.get(self.key_prefix + session_id)
+        return json.loads(data) if data else None
+
+    def save(self, session_id, state):
+        # Redis expires idle sessions on its own; every save extends the TTL
+        self.client.set(self.key_prefix + session_id, encode_state(state, self.max_bytes), ex=self.ttl_seconds)
+
+    def delete(self, session_id):
+        self.client.delete(self.key_prefix + session_id)
+
+def create_session_store(url=None):
+    """
+    Build a session store from a URL (default: CHATBOT_SESSION_STORE)
+
+        sqlite:///data/sessions.db    -> SQLiteSessionStore
+        redis://host:6379/0           -> RedisSessionStore
+        (unset)                       -> None (sessions only live in Streamlit memory)
+    """
+    url = url if url is not None else os.getenv('CHATBOT_SESSION_STORE', '')
+    if not url:
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteSessionStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisSessionStore.from_url(url)
+    raise ValueError(f"Unsupported CHATBOT_SESSION_STORE: {url}")
@@ -0,0 +1,88 @@
+"""Stub chat model for benchmarks and load tests (no Bedrock calls)"""
+import threading
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from bedrock_scheduler import scheduler
+
+CHARS_PER_TOKEN = 4
+
+class StubChatModel(BaseChatModel):
+    """
+    Answers instantly (or after `latency` seconds) with a fixed reply
+
+    Emulates Bedrock prompt caching: the text before a cachePoint block is
+    reported as cache_creation the first time it is seen and as cache_read
+    afterwards (and, like Converse, is not counted in input_tokens).
+    """
+
+    latency: float = 0.0
+    reply: str = "This is a stub answer from the benchmark model."
+
+    _cached_prefixes: set = PrivateAttr(default_factory=set)
+    _cache_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self):
+        return "stub-chat"
+
+    def get_num_tokens(self, text):
+        # Cheap estimate - keeps the stub free of tokenizer downloads
+        return len(text) // CHARS_PER_TOKEN
+
+    def _usage(self, messages):
+        prefix, rest = [], []
+        for message in messages:
+            blocks = message.content if isinstance(message.content, list) else [message.content]
+            for block in blocks:
+                if isinstance(block, dict) and "cachePoint" in block:
+                    prefix, rest = prefix + rest, []
+                else:
+                    rest.append(block.get("text", "") if isinstance(block, dict) else block)
+
+        prefix_text = "".join(prefix)
+        cache_read = cache_creation = 0
+        if prefix_text:
+            with self._cache_lock:
+                if prefix_text in self._cached_prefixes:
+                    cache_read = self.get_num_tokens(prefix_text)
+                else:
+                    self._cached_prefixes.add(prefix_text)
+                    cache_creation = self.get_num_tokens(prefix_text)
+
+        input_tokens = self.get_num_tokens("".join(rest))
+        output_tokens = self.get_num_tokens(self.reply)
+        return {"input_tokens": input_tokens, "output_tokens": output_tokens,
+                "total_tokens": input_tokens + cache_read + cache_creation + output_tokens,
+                "input_token_details": {"cache_read": cache_read, "cache_creation": cache_creation}}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        message = AIMessage(content=self.reply, usage_metadata=self._usage(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        for index, word in enumerate(self.reply.split(" ")):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if index == 0 else " " + word))
+        # Like ConverseStream: usage arrives in a final, empty chunk
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=self._usage(messages)))
+
+class ScheduledStubChatModel(StubChatModel):
+    """StubChatModel that queues in the shared Bedrock scheduler like ScheduledChatBedrockConverse"""
+
+    model_id: str = "stub"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with scheduler.slot(self.model_id):
+            return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        with scheduler.slot(self.model_id):
+            yield from super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs)
@@ -0,0 +1,37 @@
+"""Lightweight token counting for chat memory (tokenizer loaded on first use)"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# tiktoken = real BPE tokenizer (small, no transformers/torch), estimate = characters / 4
+TOKENIZER = os.getenv('CHATBOT_TOKENIZER', 'tiktoken')
+TIKTOKEN_ENCODING = 'cl100k_base'
+CHARS_PER_TOKEN = 4
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    """Load the tokenizer once, the first time a token count is needed"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                if TOKENIZER == 'tiktoken':
+                    try:
+                        import tiktoken
+                        _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+                    except Exception as e:
+                        logger.warning("tiktoken unavailable (%s), estimating tokens from characters", e)
+                _encoding_loaded = True
+    return _encoding
+
+def count_tokens(text):
+    """Number of tokens in text (approximate for non-OpenAI models, which is all pruning needs)"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
@@ -0,0 +1,53 @@
+"""
+Container start warm-up - runs before Streamlit starts answering health checks
+
+Without it the first user after a deployment pays for boto3 client creation,
+endpoint resolution, credential lookup, the TLS handshake to bedrock-runtime
+and loading the tokenizer. warm_up() builds the Bedrock client of every routed
+model and makes one 1-token Converse call with each, so their connection pools
+are open when the first real turn arrives. Used by serve.py.
+
+Set WARMUP_ENABLED=false to skip it (e.g. for local development without AWS).
+"""
+import logging
+import os
+import time
+
+import chatbot_backend as backend
+import model_router
+from token_counter import count_tokens
+
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+
+logger = logging.getLogger(__name__)
+
+def ping_model(model_id):
+    """Smallest authenticated call: one Converse request that generates a single token"""
+    backend.get_bedrock_client(model_id).client.converse(
+        modelId=model_id,
+        messages=[{"role": "user", "content": [{"text": "ping"}]}],
+        inferenceConfig={"maxTokens": 1},
+    )
+
+def warm_up():
+    """Load the tokenizer and open Bedrock connections; failures are logged, never fatal"""
+    if not WARMUP_ENABLED:
+        logger.info("Warm-up skipped (WARMUP_ENABLED=false)")
+        return
+
+    model_ids = [model_router.LARGE_MODEL_ID]
+    if model_router.ROUTER_ENABLED and model_router.FAST_MODEL_ID not in model_ids:
+        model_ids.append(model_router.FAST_MODEL_ID)
+
+    started = time.perf_counter()
+    steps = [("tokenizer", lambda: count_tokens("warm up"))]
+    steps += [(f"model {model_id}", lambda model_id=model_id: ping_model(model_id)) for model_id in model_ids]
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+            logger.info("Warm-up: %s ready in %.2fs", name, time.perf_counter() - step_started)
+        except Exception as e:
+            # Still start the app - the first turn will retry (and show the real error to the user)
+            logger.warning("Warm-up: %s failed after %.2fs: %s", name, time.perf_counter() - step_started, e)
+    logger.info("Warm-up finished in %.2fs", time.perf_counter() - started)
@@ -112,6 +112,12 @@ class RagEcsStack(Stack):
                     container_port=8501, 
                     protocol=ecs.Protocol.TCP,
                     name="streamlit-port"
+                ),
+                # Headless HTTP/JSON API (rag_api.py)
+                ecs.PortMapping(
+                    container_port=8000,
+                    protocol=ecs.Protocol.TCP,
+                    name="api-port"
                 )
             ],
             # Health check (Streamlit-specific)
@@ -149,6 +155,13 @@ class RagEcsStack(Stack):
             "Allow HTTP traffic from internet"
         )
 
+        # Allow API traffic to ALB
+        alb_security_group.add_ingress_rule(
+            ec2.Peer.any_ipv4(),
+            ec2.Port.tcp(8000),
+            "Allow RAG API traffic from internet"
+        )
+
         # Allow ALB to communicate with ECS service on port 8501
         ecs_security_group.add_ingress_rule(
             alb_security_group,
@@ -156,6 +169,13 @@ class RagEcsStack(Stack):
             "Allow traffic from ALB to Streamlit"
         )
 
+        # Allow ALB to communicate with ECS service on port 8000
+        ecs_security_group.add_ingress_rule(
+            alb_security_group,
+            ec2.Port.tcp(8000),
+            "Allow traffic from ALB to RAG API"
+        )
+
         # Application Load Balancer
         alb = elbv2.ApplicationLoadBalancer(
             self, "RagAlb",
@@ -192,6 +212,33 @@ class RagEcsStack(Stack):
             default_target_groups=[target_group]
         )
 
+        # Target Group for the RAG API
+        api_target_group = elbv2.ApplicationTargetGroup(
+            self, "RagApiTargetGroup",
+            vpc=vpc,
+            port=8000,
+            protocol=elbv2.ApplicationProtocol.HTTP,
+            target_type=elbv2.TargetType.IP,
+            health_check=elbv2.HealthCheck(
+                enabled=True,
+                path="/health",  # rag_api.py health endpoint
+                protocol=elbv2.Protocol.HTTP,
+                port="8000",
+                healthy_threshold_count=2,
+                unhealthy_threshold_count=3,
+                timeout=Duration.seconds(10),
+                interval=Duration.seconds(30)
+            )
+        )
+
+        # ALB Listener for the RAG API
+        api_listener = alb.add_listener(
+            "RagApiListener",
+            port=8000,
+            protocol=elbv2.ApplicationProtocol.HTTP,
+            default_target_groups=[api_target_group]
+        )
+
         # ECS Service
         service = ecs.FargateService(
             self, "RagEcsService", 
@@ -209,6 +256,14 @@ class RagEcsStack(Stack):
         # Attach service to target group
         service.attach_to_application_target_group(target_group)
 
+        # Attach the API port of the same containers to the API target group
+        api_target_group.add_target(
+            service.load_balancer_target(
+                container_name="RagEcsContainer",
+                container_port=8000
+            )
+        )
+
         # Outputs
         aws_cdk.CfnOutput(
             self, "LoadBalancerDNS",
@@ -220,4 +275,10 @@ class RagEcsStack(Stack):
             self, "StreamlitURL",
             value=f"http://{alb.load_balancer_dns_name}",
             description="URL to access the Streamlit application"
+        )
+
+        aws_cdk.CfnOutput(
+            self, "RagApiURL",
+            value=f"http://{alb.load_balancer_dns_name}:8000",
+            description="URL of the headless RAG HTTP/JSON API"
         )
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import pickle
+import sys
+
+import pytest
+from langchain_core.documents import Document
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import compressed_docstore  # noqa: E402
+from compressed_docstore import CHUNKS_PER_BLOCK, CompressedDocstore  # noqa: E402
+
+
+def make_documents(count, start=0):
+    return {
+        f"chunk-{number}": Document(page_content=f"Chunk number {number}", metadata={"page": number})
+        for number in range(start, start + count)
+    }
+
+
+@pytest.fixture
+def docstore(tmp_path):
+    return CompressedDocstore.create(str(tmp_path / "chunks.zst"), make_documents(CHUNKS_PER_BLOCK * 2 + 3))
+
+
+def test_chunks_round_trip_with_metadata(docstore):
+    document = docstore.search("chunk-17")
+    assert document.page_content == "Chunk number 17"
+    assert document.metadata == {"page": 17}
+    assert docstore.search("missing") == "ID missing not found."
+
+
+def test_offsets_follow_block_boundaries(docstore):
+    blocks = {}
+    for chunk_id, (block_offset, block_length, position) in docstore.offsets.items():
+        blocks.setdefault((block_offset, block_length), []).append(position)
+
+    # 35 chunks -> blocks of 16, 16 and 3, written back to back
+    assert sorted(len(positions) for positions in blocks.values()) == [3, CHUNKS_PER_BLOCK, CHUNKS_PER_BLOCK]
+    assert all(sorted(positions) == list(range(len(positions))) for positions in blocks.values())
+    ends = sorted(offset + length for offset, length in blocks)
+    assert sorted(offset for offset, _ in blocks) == [0] + ends[:-1]
+    assert ends[-1] == os.path.getsize(docstore.path)
+    assert docstore.offsets["chunk-0"][2] == 0
+    assert docstore.offsets[f"chunk-{CHUNKS_PER_BLOCK}"][:2] != docstore.offsets["chunk-0"][:2]
+
+
+def test_appends_keep_existing_offsets(docstore):
+    before = dict(docstore.offsets)
+    docstore.add(make_documents(2, start=100))
+
+    assert {chunk_id: docstore.offsets[chunk_id] for chunk_id in before} == before
+    assert docstore.search("chunk-101").page_content == "Chunk number 101"
+    with pytest.raises(ValueError):
+        docstore.add(make_documents(1, start=100))
+
+
+def test_delete_forgets_chunks(docstore):
+    docstore.delete(["chunk-3"])
+    assert docstore.search("chunk-3") == "ID chunk-3 not found."
+    with pytest.raises(ValueError):
+        docstore.delete(["chunk-3"])
+
+
+def test_pickle_keeps_only_path_and_offsets(docstore):
+    assert set(docstore.__getstate__()) == {"path", "offsets"}
+    restored = pickle.loads(pickle.dumps(docstore))
+    assert restored.search("chunk-20").page_content == "Chunk number 20"
+    restored.close()
+    restored.close()    # Safe to call twice
+
+
+def test_block_cache_is_lru(docstore, monkeypatch):
+    monkeypatch.setattr(compressed_docstore, "BLOCK_CACHE_SIZE", 2)
+    reads = []
+    real_pread = os.pread
+
+    def counting_pread(fd, length, offset):
+        reads.append(offset)
+        return real_pread(fd, length, offset)
+
+    monkeypatch.setattr(compressed_docstore.os, "pread", counting_pread)
+    first, second, third = (f"chunk-{block * CHUNKS_PER_BLOCK}" for block in range(3))
+    block_of = {chunk_id: docstore.offsets[chunk_id][0] for chunk_id in (first, second, third)}
+
+    docstore.search(first)
+    docstore.search("chunk-1")      # Same block: served from the cache
+    docstore.search(second)
+    docstore.search(first)          # Refreshes the first block
+    docstore.search(third)          # Evicts the second block (least recently used)
+    docstore.search(first)
+    docstore.search(second)
+
+    assert reads == [block_of[first], block_of[second], block_of[third], block_of[second]]
+    assert list(docstore._block_cache) == [block_of[first], block_of[second]]
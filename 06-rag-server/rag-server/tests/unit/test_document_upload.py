@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+
+import pytest
+from langchain.indexes.vectorstore import VectorStoreIndexWrapper
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import rag_backend  # noqa: E402
+import shared_index  # noqa: E402
+
+STARTUP_TEXT = "Employees get 24 days of paid leave."
+
+
+class TextFileLoader:
+    """Stands in for PyPDFLoader: the test "PDFs" are plain text files"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        with open(self.path) as text_file:
+            return [Document(page_content=text_file.read(), metadata={"source": self.path, "page": 0})]
+
+
+@pytest.fixture
+def docs_dir(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "startup.pdf").write_text(STARTUP_TEXT)
+    return docs
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch, docs_dir):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    startup_pdf = str(docs_dir / "startup.pdf")
+
+    def create_document_search_engine():
+        vectorstore = FAISS.from_texts([STARTUP_TEXT], embeddings, metadatas=[{"source": startup_pdf, "page": 0}])
+        return VectorStoreIndexWrapper(vectorstore=vectorstore)
+
+    monkeypatch.setattr(rag_backend, "create_embedding_model", lambda: embeddings)
+    monkeypatch.setattr(rag_backend, "create_document_search_engine", create_document_search_engine)
+    monkeypatch.setattr(rag_backend, "PyPDFLoader", TextFileLoader)
+    monkeypatch.setattr(rag_backend, "_rag_settings", {"chunk_size": 40, "chunk_overlap": 0, "top_k": 2})
+    monkeypatch.setattr(rag_backend, "_shared_search_engine", None)
+    monkeypatch.setattr(rag_backend, "_shared_generation", None)
+    return str(tmp_path / "index")
+
+
+def write_pdf(docs_dir, name, sentences):
+    path = docs_dir / name
+    path.write_text("\n\n".join(sentences))
+    return str(path)
+
+
+def indexed_texts(index_dir):
+    vectorstore = rag_backend.get_shared_search_engine(index_dir).vectorstore
+    return sorted(vectorstore.docstore.search(chunk_id).page_content
+                  for chunk_id in vectorstore.index_to_docstore_id.values())
+
+
+def wait_for_job(job_id, index_dir, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = rag_backend.get_upload_status(job_id, index_dir)
+        if job["stage"] in ("done", "unchanged", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Upload job {job_id} did not finish")
+
+
+def test_upload_appends_chunks_and_publishes_a_generation(index_dir, docs_dir):
+    pdf_path = write_pdf(docs_dir, "parental.pdf", ["Parental leave is 26 weeks.", "It can be split."])
+    progress = []
+
+    added = rag_backend.add_document_to_index(pdf_path, index_dir, lambda *update: progress.append(update))
+
+    assert added == 2
+    assert progress[0] == ("parsing", 0, 1)
+    assert progress[-1] == ("done", 2, 2)
+    assert shared_index.read_generation(index_dir) == 2
+    assert indexed_texts(index_dir) == sorted([STARTUP_TEXT, "Parental leave is 26 weeks.", "It can be split."])
+    documents = shared_index.read_documents(index_dir)
+    assert set(documents) == {"startup.pdf", "parental.pdf"}
+    assert documents["parental.pdf"]["sha256"] == rag_backend.file_sha256(pdf_path)
+
+
+def test_reuploading_the_same_content_adds_nothing(index_dir, docs_dir):
+    pdf_path = write_pdf(docs_dir, "parental.pdf", ["Parental leave is 26 weeks."])
+    rag_backend.add_document_to_index(pdf_path, index_dir)
+    copy_path = write_pdf(docs_dir, "parental-copy.pdf", ["Parental leave is 26 weeks."])
+    progress = []
+
+    assert rag_backend.add_document_to_index(pdf_path, index_dir) == 0
+    assert rag_backend.add_document_to_index(copy_path, index_dir, lambda *update: progress.append(update)) == 0
+    assert progress == [("unchanged", 0, 0)]
+    assert shared_index.read_generation(index_dir) == 2
+    assert len(indexed_texts(index_dir)) == 2
+
+
+def test_files_from_the_startup_build_are_recognized(index_dir, docs_dir):
+    rag_backend.get_shared_search_engine(index_dir)
+
+    assert rag_backend.add_document_to_index(str(docs_dir / "startup.pdf"), index_dir) == 0
+    assert indexed_texts(index_dir) == [STARTUP_TEXT]
+
+
+def test_new_version_of_a_file_replaces_its_chunks(index_dir, docs_dir):
+    rag_backend.add_document_to_index(write_pdf(docs_dir, "parental.pdf", ["Parental leave is 26 weeks."]), index_dir)
+
+    added = rag_backend.add_document_to_index(
+        write_pdf(docs_dir, "parental.pdf", ["Parental leave is 30 weeks.", "It can be split."]), index_dir
+    )
+
+    assert added == 2
+    assert indexed_texts(index_dir) == sorted([STARTUP_TEXT, "Parental leave is 30 weeks.", "It can be split."])
+    assert len(shared_index.read_documents(index_dir)["parental.pdf"]["chunk_ids"]) == 2
+
+
+def test_job_status_is_shared_through_the_index_directory(index_dir, docs_dir):
+    pdf_path = write_pdf(docs_dir, "parental.pdf", ["Parental leave is 26 weeks."])
+
+    job_id = rag_backend.start_document_upload(pdf_path, index_dir)
+    job = wait_for_job(job_id, index_dir)
+
+    assert job["stage"] == "done"
+    assert job["chunks_added"] == 1
+    assert job["file_name"] == "parental.pdf"
+    # Any worker can read it: the status lives in a file, not in this process
+    assert os.path.exists(os.path.join(index_dir, rag_backend.UPLOAD_JOBS_DIR, f"{job_id}.json"))
+    assert rag_backend.pending_uploads() == 0
+
+    job = wait_for_job(rag_backend.start_document_upload(pdf_path, index_dir), index_dir)
+    assert (job["stage"], job["chunks_added"]) == ("unchanged", 0)
+
+
+def test_failed_uploads_report_the_error(index_dir, docs_dir, monkeypatch):
+    def broken_loader(path):
+        raise ValueError("not a PDF")
+
+    monkeypatch.setattr(rag_backend, "PyPDFLoader", broken_loader)
+    job = wait_for_job(rag_backend.start_document_upload(write_pdf(docs_dir, "bad.pdf", ["x"]), index_dir), index_dir)
+
+    assert (job["stage"], job["error"]) == ("failed", "not a PDF")
+    assert rag_backend.pending_uploads() == 0
+
+
+def test_unknown_job_ids_are_not_found(index_dir):
+    assert rag_backend.get_upload_status("0" * 32, index_dir) is None
+    assert rag_backend.get_upload_status("../generation", index_dir) is None
+
+
+def test_old_job_files_are_purged(index_dir, docs_dir, monkeypatch):
+    pdf_path = write_pdf(docs_dir, "parental.pdf", ["Parental leave is 26 weeks."])
+    old_job = wait_for_job(rag_backend.start_document_upload(pdf_path, index_dir), index_dir)["job_id"]
+    old_path = os.path.join(index_dir, rag_backend.UPLOAD_JOBS_DIR, f"{old_job}.json")
+    os.utime(old_path, (time.time() - 2 * rag_backend.UPLOAD_JOB_TTL_SECONDS,) * 2)
+
+    wait_for_job(rag_backend.start_document_upload(pdf_path, index_dir), index_dir)
+
+    assert rag_backend.get_upload_status(old_job, index_dir) is None
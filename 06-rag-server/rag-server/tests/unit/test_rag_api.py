@@ -0,0 +1,164 @@
+import asyncio
+import io
+import os
+import sys
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import rag_api  # noqa: E402
+import rag_backend  # noqa: E402
+import warmup  # noqa: E402
+
+PDF_BYTES = b"%PDF-1.4 fake" * 100
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # One event loop for the whole test (the request slots belong to it); no Bedrock warm-up
+    monkeypatch.setattr(warmup, "warm_up", lambda: None)
+    monkeypatch.setattr(warmup, "build_index_in_background", lambda: None)
+    with TestClient(rag_api.app) as client:
+        yield client
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """Fake search engine and answers; one request slot and short timeouts"""
+    monkeypatch.setattr(rag_backend, "get_shared_search_engine", lambda: "engine")
+    monkeypatch.setattr(rag_backend, "get_rag_answer",
+                        lambda engine, question, top_k=None: f"{engine} answered {question!r} (top_k={top_k})")
+    monkeypatch.setattr(rag_backend, "stream_rag_answer",
+                        lambda engine, question, top_k=None: iter(["Paid ", "leave ", "is 24 days."]))
+    monkeypatch.setattr(rag_api, "_request_slots", asyncio.Semaphore(1))
+    monkeypatch.setattr(rag_api, "QUEUE_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(rag_api, "REQUEST_TIMEOUT_SECONDS", 0.5)
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    """Runs in a temp dir with docs/; records the uploads handed to the backend"""
+    (tmp_path / "docs").mkdir()
+    monkeypatch.chdir(tmp_path)
+    started = []
+
+    def start_document_upload(pdf_path):
+        started.append(pdf_path)
+        return "job-1"
+
+    monkeypatch.setattr(rag_backend, "start_document_upload", start_document_upload)
+    monkeypatch.setattr(rag_backend, "pending_uploads", lambda: 0)
+    return started
+
+
+def test_upload_is_saved_to_docs_and_queued(client, uploads, tmp_path):
+    response = client.post("/documents", files={"file": ("policy.pdf", PDF_BYTES, "application/pdf")})
+
+    assert response.status_code == 202
+    assert response.json() == {"job_id": "job-1"}
+    assert uploads == [os.path.join("docs", "policy.pdf")]
+    assert os.listdir(tmp_path / "docs") == ["policy.pdf"]
+    assert (tmp_path / "docs" / "policy.pdf").read_bytes() == PDF_BYTES
+
+
+def test_only_pdfs_are_accepted(client, uploads):
+    response = client.post("/documents", files={"file": ("notes.txt", b"text", "text/plain")})
+    assert response.status_code == 415
+    assert uploads == []
+
+
+def test_oversized_uploads_are_rejected(client, uploads, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_api, "MAX_UPLOAD_BYTES", len(PDF_BYTES) - 1)
+
+    response = client.post("/documents", files={"file": ("policy.pdf", PDF_BYTES, "application/pdf")})
+
+    assert response.status_code == 413
+    assert uploads == []
+    assert os.listdir(tmp_path / "docs") == []
+
+
+def test_save_upload_stops_at_the_size_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_api, "MAX_UPLOAD_BYTES", 10)
+    monkeypatch.setattr(rag_api, "UPLOAD_BLOCK_BYTES", 4)
+    target = tmp_path / "policy.pdf"
+
+    assert rag_api.save_upload(io.BytesIO(b"x" * 11), str(target)) is False
+    assert os.listdir(tmp_path) == []
+    assert rag_api.save_upload(io.BytesIO(b"x" * 10), str(target)) is True
+    assert os.listdir(tmp_path) == ["policy.pdf"]
+
+
+def test_upload_backlog_is_capped(client, uploads, monkeypatch):
+    monkeypatch.setattr(rag_backend, "pending_uploads", lambda: rag_api.MAX_QUEUED_UPLOADS)
+
+    response = client.post("/documents", files={"file": ("policy.pdf", PDF_BYTES, "application/pdf")})
+
+    assert response.status_code == 503
+    assert uploads == []
+
+
+def test_upload_status(client, monkeypatch):
+    monkeypatch.setattr(rag_backend, "get_upload_status", lambda job_id: {"job_id": job_id, "stage": "done"})
+    assert client.get("/documents/abc").json() == {"job_id": "abc", "stage": "done"}
+
+    monkeypatch.setattr(rag_backend, "get_upload_status", lambda job_id: None)
+    assert client.get("/documents/abc").status_code == 404
+
+
+def test_query_returns_the_answer(client, answers):
+    response = client.post("/query", json={"question": "How much leave?", "top_k": 3})
+
+    assert response.status_code == 200
+    assert response.json() == {"question": "How much leave?", "answer": "engine answered 'How much leave?' (top_k=3)"}
+
+
+@pytest.mark.parametrize("body", [
+    {"question": "   "},
+    {"question": "How much leave?", "top_k": 0},
+    {"question": "How much leave?", "top_k": rag_api.MAX_TOP_K + 1},
+])
+def test_invalid_questions_are_rejected(client, answers, body):
+    assert client.post("/query", json=body).status_code == 422
+    assert client.post("/query/stream", json=body).status_code == 422
+
+
+def test_query_stream_sends_the_answer_in_pieces(client, answers):
+    for _ in range(2):  # The second request only gets the one slot if the first released it
+        response = client.post("/query/stream", json={"question": "How much leave?"})
+        assert response.status_code == 200
+        assert response.text == "Paid leave is 24 days."
+
+
+def test_slow_stream_is_truncated(client, answers, monkeypatch):
+    def slow_answer(engine, question, top_k=None):
+        yield "Paid "
+        time.sleep(1)
+        yield "leave"
+
+    monkeypatch.setattr(rag_backend, "stream_rag_answer", slow_answer)
+    monkeypatch.setattr(rag_api, "REQUEST_TIMEOUT_SECONDS", 0.2)
+
+    response = client.post("/query/stream", json={"question": "How much leave?"})
+    assert response.text == "Paid \n[answer truncated: request timeout]"
+
+
+def test_slow_answer_times_out_and_frees_its_slot_when_done(client, answers, monkeypatch):
+    monkeypatch.setattr(rag_backend, "get_rag_answer", lambda engine, question, top_k=None: time.sleep(0.3))
+    monkeypatch.setattr(rag_api, "REQUEST_TIMEOUT_SECONDS", 0.1)
+
+    assert client.post("/query", json={"question": "How much leave?"}).status_code == 504
+    # The Bedrock thread still holds the slot until it finishes
+    assert client.post("/query", json={"question": "How much leave?"}).status_code == 503
+    time.sleep(0.3)
+    monkeypatch.setattr(rag_backend, "get_rag_answer", lambda engine, question, top_k=None: "ok")
+    assert client.post("/query", json={"question": "How much leave?"}).json()["answer"] == "ok"
+
+
+def test_requests_get_503_when_every_slot_is_busy(client, answers, monkeypatch):
+    monkeypatch.setattr(rag_api, "_request_slots", asyncio.Semaphore(0))
+
+    assert client.post("/query", json={"question": "How much leave?"}).status_code == 503
+    assert client.post("/query/stream", json={"question": "How much leave?"}).status_code == 503
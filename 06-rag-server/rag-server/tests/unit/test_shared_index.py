@@ -0,0 +1,92 @@
+import os
+import sys
+
+import pytest
+from langchain.indexes.vectorstore import VectorStoreIndexWrapper
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "..", "source"))
+
+import rag_backend  # noqa: E402
+import shared_index  # noqa: E402
+from compressed_docstore import CompressedDocstore  # noqa: E402
+
+TEXTS = ["Employees get 24 days of paid leave.", "Sick leave needs a doctor's note.", "Holidays follow the calendar."]
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=8)
+
+
+@pytest.fixture
+def backend(monkeypatch, embeddings):
+    """rag_backend with fake embeddings, a fake startup build and a clean process-wide cache"""
+    builds = []
+
+    def create_document_search_engine():
+        builds.append(1)
+        return VectorStoreIndexWrapper(vectorstore=FAISS.from_texts(TEXTS, embeddings))
+
+    monkeypatch.setattr(rag_backend, "create_embedding_model", lambda: embeddings)
+    monkeypatch.setattr(rag_backend, "create_document_search_engine", create_document_search_engine)
+    monkeypatch.setattr(rag_backend, "_shared_search_engine", None)
+    monkeypatch.setattr(rag_backend, "_shared_generation", None)
+    monkeypatch.setattr(rag_backend, "builds", builds, raising=False)
+    return rag_backend
+
+
+def test_save_and_load_round_trip(tmp_path, embeddings):
+    vectorstore = FAISS.from_texts(TEXTS, embeddings, metadatas=[{"page": page} for page in range(3)])
+
+    with shared_index.index_lock(str(tmp_path)):
+        assert shared_index.save_shared_index(vectorstore, str(tmp_path)) == 1
+    assert shared_index.read_generation(str(tmp_path)) == 1
+    assert isinstance(vectorstore.docstore, CompressedDocstore)
+
+    with shared_index.index_lock(str(tmp_path), shared=True):
+        loaded = shared_index.load_shared_index(str(tmp_path), embeddings)
+    assert loaded.index.ntotal == 3
+    hit = loaded.similarity_search(TEXTS[1], k=1)[0]
+    assert hit.page_content == TEXTS[1]
+    assert hit.metadata == {"page": 1}
+
+
+def test_generation_is_missing_until_an_index_is_published(tmp_path):
+    assert shared_index.read_generation(str(tmp_path)) is None
+    (tmp_path / shared_index.GENERATION_FILE).write_text("not a number")
+    assert shared_index.read_generation(str(tmp_path)) is None
+
+
+def test_every_save_bumps_the_generation(tmp_path, embeddings):
+    vectorstore = FAISS.from_texts(TEXTS, embeddings)
+    with shared_index.index_lock(str(tmp_path)):
+        generations = [shared_index.save_shared_index(vectorstore, str(tmp_path)) for _ in range(3)]
+    assert generations == [1, 2, 3]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_index_is_built_once_and_cached(tmp_path, backend):
+    first = backend.get_shared_search_engine(str(tmp_path))
+    second = backend.get_shared_search_engine(str(tmp_path))
+
+    assert first is second
+    assert backend.builds == [1]
+    assert first.vectorstore.similarity_search(TEXTS[0], k=1)[0].page_content == TEXTS[0]
+
+
+def test_workers_reattach_when_the_generation_changes(tmp_path, backend, embeddings):
+    engine = backend.get_shared_search_engine(str(tmp_path))
+
+    # Another process appends a chunk and publishes a new generation
+    with shared_index.index_lock(str(tmp_path)):
+        vectorstore = shared_index.load_shared_index(str(tmp_path), embeddings, writable=True)
+        vectorstore.add_texts(["Parental leave is 26 weeks."])
+        shared_index.save_shared_index(vectorstore, str(tmp_path))
+
+    reattached = backend.get_shared_search_engine(str(tmp_path))
+    assert reattached is not engine
+    assert reattached.vectorstore.index.ntotal == 4
+    assert engine.vectorstore.index.ntotal == 3     # Old readers keep their consistent snapshot
+    assert backend.builds == [1]
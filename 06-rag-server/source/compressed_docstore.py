@@ -0,0 +1,161 @@
+# Compressed Docstore: Keep chunk text on disk, fetch only the search hits
+#
+# The default LangChain docstore keeps every chunk's text and metadata in Python
+# objects, although a question only ever reads the top-k chunks. This docstore:
+#   1. Groups chunks into blocks and compresses each block with zstd
+#   2. Appends the blocks to a single file on disk
+#   3. Keeps only a small offset index in memory (chunk id -> block location)
+#   4. Reads + decompresses just the blocks that contain the search hits
+#
+# The vectors stay in memory (FAISS), only the text moves to disk.
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import zstandard
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+CHUNKS_PER_BLOCK = 16       # Chunks compressed together (bigger = better ratio, slower hits)
+COMPRESSION_LEVEL = 9       # zstd level - written once, read many times
+BLOCK_CACHE_SIZE = 32       # Recently decompressed blocks kept per process
+
+
+class CompressedDocstore(Docstore, AddableMixin):
+    """
+    Append-only, zstd-compressed docstore backed by a single file
+
+    Only the offset index is pickled with the vectorstore, so every worker
+    process shares the same chunk file instead of its own copy of the text.
+    """
+
+    def __init__(self, path, offsets=None):
+        """
+        Args:
+            path: Chunk file (created if missing)
+            offsets: Existing offset index {chunk_id: (block_offset, block_length, position)}
+        """
+        self.path = path
+        self.offsets = dict(offsets or {})
+        self._open()
+
+    def _open(self):
+        # Keep one descriptor open: a rebuilt file replaced via os.replace() does
+        # not affect readers that still use the previous offset index
+        open(self.path, "ab").close()
+        self._fd = os.open(self.path, os.O_RDONLY)
+        self._write_lock = threading.Lock()
+        self._block_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def close(self):
+        """Close the chunk file descriptor (safe to call more than once)"""
+        fd, self._fd = getattr(self, "_fd", None), None
+        if fd is not None:
+            os.close(fd)
+
+    def __del__(self):
+        # An old docstore is dropped on every re-attach - don't leak its descriptor
+        self.close()
+
+    def __getstate__(self):
+        # Only the path and the (small) offset index travel with the pickle
+        return {"path": self.path, "offsets": self.offsets}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self.offsets = state["offsets"]
+        self._open()
+
+    @classmethod
+    def create(cls, path, documents):
+        """
+        Write a brand-new chunk file from {chunk_id: Document}
+
+        The file is written next to `path` and renamed into place, so processes
+        still reading the previous file are not disturbed.
+        """
+        temp_path = f"{path}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        docstore = cls(temp_path)
+        docstore.add(documents)
+        docstore.close()
+        os.replace(temp_path, path)
+        return cls(path, docstore.offsets)
+
+    def add(self, texts):
+        """
+        Append documents as compressed blocks
+
+        Args:
+            texts: Dict of {chunk_id: Document}
+        """
+        overlapping = set(texts).intersection(self.offsets)
+        if overlapping:
+            raise ValueError(f"Tried to add ids that already exist: {overlapping}")
+
+        items = list(texts.items())
+        compressor = zstandard.ZstdCompressor(level=COMPRESSION_LEVEL)
+        new_offsets = {}
+
+        with self._write_lock, open(self.path, "ab") as chunk_file:
+            for start in range(0, len(items), CHUNKS_PER_BLOCK):
+                block_items = items[start:start + CHUNKS_PER_BLOCK]
+                records = [
+                    {"page_content": document.page_content, "metadata": document.metadata}
+                    for _, document in block_items
+                ]
+                block = compressor.compress(json.dumps(records, default=str).encode("utf-8"))
+
+                block_offset = chunk_file.tell()
+                chunk_file.write(block)
+                for position, (chunk_id, _) in enumerate(block_items):
+                    new_offsets[chunk_id] = (block_offset, len(block), position)
+
+            chunk_file.flush()
+            os.fsync(chunk_file.fileno())
+
+        # Publish offsets only after the bytes are on disk
+        self.offsets.update(new_offsets)
+
+    def delete(self, ids):
+        """Forget chunks (space in the file is not reclaimed until the next rebuild)"""
+        missing = set(ids).difference(self.offsets)
+        if missing:
+            raise ValueError(f"Tried to delete ids that does not exist: {missing}")
+        for chunk_id in ids:
+            del self.offsets[chunk_id]
+
+    def search(self, search):
+        """
+        Fetch one chunk by id (called by FAISS for each search hit)
+
+        Returns:
+            Document, or an error string like the in-memory docstore
+        """
+        location = self.offsets.get(search)
+        if location is None:
+            return f"ID {search} not found."
+
+        block_offset, block_length, position = location
+        record = self._read_block(block_offset, block_length)[position]
+        return Document(id=search, page_content=record["page_content"], metadata=record["metadata"])
+
+    def _read_block(self, block_offset, block_length):
+        with self._cache_lock:
+            records = self._block_cache.get(block_offset)
+            if records is not None:
+                self._block_cache.move_to_end(block_offset)
+                return records
+
+        block = os.pread(self._fd, block_length, block_offset)
+        records = json.loads(zstandard.ZstdDecompressor().decompress(block))
+
+        with self._cache_lock:
+            self._block_cache[block_offset] = records
+            while len(self._block_cache) > BLOCK_CACHE_SIZE:
+                self._block_cache.popitem(last=False)
+        return records
@@ -0,0 +1,207 @@
+"""
+RAG HTTP/JSON API - Headless access to the RAG backend
+
+Runs next to the Streamlit UI in the same container (see start.sh) and attaches
+to the same shared index (get_shared_search_engine), so other services can ask
+questions and upload documents without going through the UI.
+
+Endpoints:
+    GET  /health                  Liveness + current index generation
+    POST /query                   {"question": "...", "top_k": 4} -> {"answer": "..."}
+    POST /query/stream            Same body, answer streamed as plain text
+    POST /documents               Multipart PDF upload -> {"job_id": "..."} (202, 413 if too large)
+    GET  /documents/{job_id}      Upload progress
+
+Run:
+    uvicorn rag_api:app --host 0.0.0.0 --port 8000
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import iterate_in_threadpool
+
+import rag_backend as rag_system
+import shared_index
+import warmup
+
+# Limits - protect Bedrock and the 0.5 vCPU task from request bursts
+MAX_CONCURRENT_REQUESTS = int(os.getenv('RAG_API_MAX_CONCURRENCY', '8'))    # Questions answered at the same time
+QUEUE_TIMEOUT_SECONDS = float(os.getenv('RAG_API_QUEUE_TIMEOUT', '10'))      # Max wait for a free slot (then 503)
+REQUEST_TIMEOUT_SECONDS = float(os.getenv('RAG_API_TIMEOUT', '60'))          # Max time per answer (then 504)
+MAX_TOP_K = int(os.getenv('RAG_API_MAX_TOP_K', '20'))                        # Upper bound for top_k (prompt size)
+MAX_UPLOAD_BYTES = int(os.getenv('RAG_API_MAX_UPLOAD_MB', '50')) * 1024 * 1024  # Larger PDFs are rejected (413)
+MAX_QUEUED_UPLOADS = int(os.getenv('RAG_API_MAX_QUEUED_UPLOADS', '4'))       # Uploads waiting per worker (then 503)
+UPLOAD_BLOCK_BYTES = 1024 * 1024
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # uvicorn only accepts requests once this has run, so the first caller gets warm clients
+    await asyncio.to_thread(warmup.warm_up)
+    warmup.build_index_in_background()
+    yield
+
+
+# Warm-up and first-answer timings go to the container log
+logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+app = FastAPI(title="RAG API", description="Document Q&A over the shared RAG index", lifespan=lifespan)
+_request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+_receiving_uploads = 0      # Uploads being copied to docs/ (not counted by pending_uploads() yet)
+
+
+class QuestionRequest(BaseModel):
+    question: str
+    top_k: int | None = Field(None, ge=1, le=MAX_TOP_K)
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that frees the request slot however the response ends
+
+    The body generator may never start (client gone before the first byte),
+    so releasing in its finally block is not enough.
+    """
+
+    def __init__(self, content, release, **kwargs):
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+async def acquire_slot():
+    """Wait (bounded) for a free request slot, or tell the caller to back off"""
+    try:
+        await asyncio.wait_for(_request_slots.acquire(), QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Too many concurrent requests, retry later")
+
+
+def save_upload(source, pdf_path):
+    """
+    Copy an uploaded file to pdf_path - runs in a worker thread, the file I/O would block the event loop
+
+    The copy goes to a temp file that is renamed into place, so a rejected or
+    broken upload never lands in docs/.
+
+    Returns:
+        False (and keeps nothing) if the upload is larger than MAX_UPLOAD_BYTES
+    """
+    temp_path = f"{pdf_path}.{uuid.uuid4().hex}.part"
+    size = 0
+    try:
+        with open(temp_path, 'wb') as pdf_file:
+            while block := source.read(UPLOAD_BLOCK_BYTES):
+                size += len(block)
+                if size > MAX_UPLOAD_BYTES:
+                    return False
+                pdf_file.write(block)
+        os.replace(temp_path, pdf_path)
+        return True
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def validate_question(request):
+    if not request.question.strip():
+        raise HTTPException(status_code=422, detail="Question must not be empty")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "index_generation": shared_index.read_generation(rag_system.RAG_INDEX_DIR)}
+
+
+@app.post("/query")
+async def query(request: QuestionRequest):
+    validate_question(request)
+    await acquire_slot()
+
+    def answer():
+        search_engine = rag_system.get_shared_search_engine()
+        return rag_system.get_rag_answer(search_engine, request.question, top_k=request.top_k)
+
+    # The Bedrock call blocks, so it runs in a worker thread. The slot is only
+    # released when that thread finishes, even if the client already got a 504.
+    work = asyncio.ensure_future(asyncio.to_thread(answer))
+    work.add_done_callback(lambda _: _request_slots.release())
+    try:
+        rag_answer = await asyncio.wait_for(asyncio.shield(work), REQUEST_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Answer generation timed out")
+
+    return {"question": request.question, "answer": rag_answer}
+
+
+@app.post("/query/stream")
+async def query_stream(request: QuestionRequest):
+    validate_question(request)
+    await acquire_slot()
+
+    async def answer_stream():
+        deadline = time.monotonic() + REQUEST_TIMEOUT_SECONDS
+        search_engine = await asyncio.to_thread(rag_system.get_shared_search_engine)
+        answer_chunks = iterate_in_threadpool(
+            rag_system.stream_rag_answer(search_engine, request.question, top_k=request.top_k)
+        )
+        while True:
+            # Bound every wait, including the one for the first token
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError
+                answer_chunk = await asyncio.wait_for(answer_chunks.__anext__(), remaining)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                yield "\n[answer truncated: request timeout]"
+                break
+            yield answer_chunk
+
+    return SlotStreamingResponse(answer_stream(), _request_slots.release, media_type="text/plain; charset=utf-8")
+
+
+@app.post("/documents", status_code=202)
+async def upload_document(file: UploadFile):
+    global _receiving_uploads
+
+    if not (file.filename or "").lower().endswith(".pdf"):
+        raise HTTPException(status_code=415, detail="Only PDF files are supported")
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"PDF is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+    # Uploads are indexed one at a time - refuse instead of queueing without bound
+    if rag_system.pending_uploads() + _receiving_uploads >= MAX_QUEUED_UPLOADS:
+        raise HTTPException(status_code=503, detail="Too many uploads in progress, retry later")
+
+    _receiving_uploads += 1
+    try:
+        # Keep the file in docs/ so it is also part of any future full rebuild
+        pdf_path = os.path.join('docs', os.path.basename(file.filename))
+        if not await asyncio.to_thread(save_upload, file.file, pdf_path):
+            raise HTTPException(status_code=413, detail=f"PDF is larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB")
+        job_id = await asyncio.to_thread(rag_system.start_document_upload, pdf_path)
+    finally:
+        _receiving_uploads -= 1
+    return {"job_id": job_id}
+
+
+@app.get("/documents/{job_id}")
+async def upload_status(job_id: str):
+    job = rag_system.get_upload_status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    return job
@@ -1,108 +1,513 @@
-# RAG Backend: Document Processing and Question Answering System
-# This file handles: PDF loading → Text chunking → Embeddings → Vector search → LLM response
-
-import os
-from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_aws import BedrockEmbeddings, ChatBedrock
-from langchain_community.vectorstores import FAISS
-from langchain.indexes import VectorstoreIndexCreator
-
-def create_document_search_engine():
-    """
-    PHASE 1: Document Processing (Runs once at startup)
-    
-    This function creates a "search engine" from PDF documents:
-    1. Loads all PDFs from docs/ folder
-    2. Splits text into small chunks (1000 characters each)
-    3. Converts text chunks to numerical vectors using Amazon Titan
-    4. Stores vectors in FAISS database for fast similarity search
-    5. Returns a complete search engine that remembers everything
-    """
-    
-    # Step 1: Load all PDF files from the docs/ folder
-    pdf_loader = DirectoryLoader('docs/', glob="*.pdf", loader_cls=PyPDFLoader)
-    
-    # Step 2: Split long documents into smaller, manageable chunks
-    # Why? LLMs work better with smaller pieces of context
-    text_splitter = RecursiveCharacterTextSplitter(
-        separators=["\n\n", "\n", " ", ""],  # Split on paragraphs, then lines, then words
-        chunk_size=1000,    # Each chunk = 1000 characters
-        chunk_overlap=20    # 20 characters overlap between chunks (prevents losing context)
-    )
-    
-    # Step 3: Create embedding model connection to Amazon Titan
-    # This model converts text to 1536 numerical values (vectors)
-    embedding_model = BedrockEmbeddings(
-        region_name=os.getenv('AWS_REGION', 'us-east-1'),
-        model_id=os.getenv('BEDROCK_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1'),  # Amazon's text-to-vector model
-    )
-    
-    # Step 4: Create the complete search engine
-    # This combines: text splitter + embedding model + vector database
-    search_engine_creator = VectorstoreIndexCreator(
-        text_splitter=text_splitter,
-        embedding=embedding_model,      # Titan model for converting text to vectors
-        vectorstore_cls=FAISS          # Fast vector similarity search database
-    )
-    
-    # Step 5: Process all documents and create the searchable index
-    # This does the heavy work: loads PDFs → splits text → creates embeddings → stores in FAISS
-    document_search_engine = search_engine_creator.from_loaders([pdf_loader])
-    
-    # Return the complete search engine (contains documents, vectors, and search capability)
-    return document_search_engine
-
-def create_answer_generator():
-    """
-    Creates the AI model that will generate answers based on retrieved context
-    
-    Uses Claude 3 Sonnet - Amazon's advanced language model
-    Temperature 0.1 = more focused, less creative responses
-    """
-    
-    answer_generator = ChatBedrock(
-        region_name=os.getenv('AWS_REGION', 'us-east-1'),
-        model_id=os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0'),  # Claude 3 Sonnet model
-        model_kwargs={
-            "max_tokens": 3000,    # Maximum response length
-            "temperature": 0.1,    # Low creativity (more factual)
-            "top_p": 0.9          # Focus on most likely words
-        }
-    )
-    
-    return answer_generator
-
-def get_rag_answer(search_engine, user_question):
-    """
-    PHASE 2: Question Answering (Runs every time user asks a question)
-    
-    This is where the RAG magic happens:
-    1. Takes user's question (text)
-    2. Converts question to vector using SAME Titan model from search_engine
-    3. Searches document vectors for most similar chunks
-    4. Combines question + relevant document chunks
-    5. Sends combined context to Claude 3 for answer generation
-    6. Returns AI-generated answer based on your documents
-    
-    Args:
-        search_engine: The document search engine created by create_document_search_engine()
-        user_question: The question typed by user (e.g., "What is leave policy?")
-    
-    Returns:
-        AI-generated answer based on relevant document content
-    """
-    
-    # Create the answer generator (Claude 3)
-    answer_generator = create_answer_generator()
-    
-    # The magic happens here! search_engine.query() does:
-    # 1. Converts user_question to vector using stored Titan model
-    # 2. Searches FAISS database for similar document vectors
-    # 3. Retrieves most relevant text chunks
-    # 4. Combines question + context and sends to Claude 3
-    # 5. Returns generated answer
-    rag_answer = search_engine.query(question=user_question, llm=answer_generator)
-    
-    return rag_answer
-
+# RAG Backend: Document Processing and Question Answering System
+# This file handles: PDF loading → Text chunking → Embeddings → Vector search → LLM response
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_aws import BedrockEmbeddings, ChatBedrock
+from langchain_community.vectorstores import FAISS
+from langchain.indexes import VectorstoreIndexCreator
+from langchain.indexes.vectorstore import VectorStoreIndexWrapper
+from langchain.chains.question_answering.stuff_prompt import PROMPT_SELECTOR
+
+import shared_index
+
+# Where the shared (memory-mapped) index lives - one copy for all worker processes
+RAG_INDEX_DIR = os.getenv('RAG_INDEX_DIR', '/tmp/rag-index')
+
+# Chunking / retrieval settings - tune_rag.py writes the best values to this file
+RAG_SETTINGS_FILE = os.getenv('RAG_SETTINGS_FILE', 'rag_settings.json')
+DEFAULT_RAG_SETTINGS = {
+    "chunk_size": 1000,    # Each chunk = 1000 characters
+    "chunk_overlap": 20,   # 20 characters overlap between chunks (prevents losing context)
+    "top_k": 4             # Chunks sent to the LLM per question (LangChain retriever default)
+}
+_rag_settings = None
+
+# Process-wide search engine, shared by every Streamlit session in this process
+_shared_search_engine = None
+_shared_generation = None
+_shared_lock = threading.Lock()
+
+# Live uploads run one at a time in the background (appends to the index are serialized anyway).
+# Job status is written next to the index, so any worker process can answer a status poll
+_upload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rag-upload")
+_pending_uploads = 0        # Uploads queued or running in this process
+_upload_jobs_lock = threading.Lock()
+UPLOAD_JOBS_DIR = "upload-jobs"     # Job status files, inside the index directory
+UPLOAD_JOB_TTL_SECONDS = int(os.getenv('RAG_UPLOAD_JOB_TTL_SECONDS', '86400'))  # Old job files are removed
+EMBEDDING_BATCH_SIZE = 16   # Chunks embedded per progress update
+
+# Answer generator shared by every question (connection pool stays open, see warmup.py)
+_answer_generator = None
+_first_answer_logged = False
+
+logger = logging.getLogger(__name__)
+
+def create_embedding_model():
+    """
+    Creates the embedding model connection to Amazon Titan
+
+    This model converts text to 1536 numerical values (vectors).
+    The SAME model must be used for documents and for questions.
+    """
+    return BedrockEmbeddings(
+        region_name=os.getenv('AWS_REGION', 'us-east-1'),
+        model_id=os.getenv('BEDROCK_EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1'),  # Amazon's text-to-vector model
+    )
+
+def get_rag_settings():
+    """
+    Returns chunk_size / chunk_overlap / top_k
+
+    Priority: RAG_CHUNK_SIZE / RAG_CHUNK_OVERLAP / RAG_TOP_K environment variables,
+    then RAG_SETTINGS_FILE (written by tune_rag.py), then DEFAULT_RAG_SETTINGS.
+    """
+    global _rag_settings
+    if _rag_settings is None:
+        settings = dict(DEFAULT_RAG_SETTINGS)
+        if os.path.exists(RAG_SETTINGS_FILE):
+            with open(RAG_SETTINGS_FILE) as settings_file:
+                tuned = json.load(settings_file)
+            settings.update({name: int(tuned[name]) for name in DEFAULT_RAG_SETTINGS if name in tuned})
+        for name in DEFAULT_RAG_SETTINGS:
+            env_value = os.getenv(f'RAG_{name.upper()}')
+            if env_value:
+                settings[name] = int(env_value)
+        _rag_settings = settings
+    return _rag_settings
+
+def create_text_splitter(chunk_size=None, chunk_overlap=None):
+    """
+    Creates the text splitter used for every document (startup build AND live uploads)
+
+    Args:
+        chunk_size: Characters per chunk (default: from get_rag_settings())
+        chunk_overlap: Characters shared by neighbouring chunks (default: from get_rag_settings())
+    """
+    settings = get_rag_settings()
+    return RecursiveCharacterTextSplitter(
+        separators=["\n\n", "\n", " ", ""],  # Split on paragraphs, then lines, then words
+        chunk_size=chunk_size or settings["chunk_size"],
+        chunk_overlap=settings["chunk_overlap"] if chunk_overlap is None else chunk_overlap
+    )
+
+def create_document_search_engine():
+    """
+    PHASE 1: Document Processing (Runs once at startup)
+    
+    This function creates a "search engine" from PDF documents:
+    1. Loads all PDFs from docs/ folder
+    2. Splits text into small chunks (1000 characters each by default)
+    3. Converts text chunks to numerical vectors using Amazon Titan
+    4. Stores vectors in FAISS database for fast similarity search
+    5. Returns a complete search engine that remembers everything
+    """
+    
+    # Step 1: Load all PDF files from the docs/ folder
+    pdf_loader = DirectoryLoader('docs/', glob="*.pdf", loader_cls=PyPDFLoader)
+    
+    # Step 2: Split long documents into smaller, manageable chunks
+    # Why? LLMs work better with smaller pieces of context
+    text_splitter = create_text_splitter()
+    
+    # Step 3: Create embedding model connection to Amazon Titan
+    # This model converts text to 1536 numerical values (vectors)
+    embedding_model = create_embedding_model()
+    
+    # Step 4: Create the complete search engine
+    # This combines: text splitter + embedding model + vector database
+    search_engine_creator = VectorstoreIndexCreator(
+        text_splitter=text_splitter,
+        embedding=embedding_model,      # Titan model for converting text to vectors
+        vectorstore_cls=FAISS          # Fast vector similarity search database
+    )
+    
+    # Step 5: Process all documents and create the searchable index
+    # This does the heavy work: loads PDFs → splits text → creates embeddings → stores in FAISS
+    document_search_engine = search_engine_creator.from_loaders([pdf_loader])
+    
+    # Return the complete search engine (contains documents, vectors, and search capability)
+    return document_search_engine
+
+def get_shared_search_engine(index_dir=RAG_INDEX_DIR):
+    """
+    PHASE 1 (multi-worker): Build the index once, share it across processes
+
+    Use this instead of create_document_search_engine() when several Streamlit
+    processes run in the same task:
+    1. The first process takes a file lock and builds + saves the index
+    2. Other processes wait on the lock, then skip straight to loading
+    3. Every process memory-maps the same index file (read-only), so memory
+       stays roughly constant as workers are added
+    4. Within a process the search engine is cached and shared by all sessions
+
+    Args:
+        index_dir: Directory shared by all workers (default: RAG_INDEX_DIR)
+
+    Returns:
+        Search engine with the same interface as create_document_search_engine()
+    """
+    global _shared_search_engine, _shared_generation
+
+    with _shared_lock:
+        generation = shared_index.read_generation(index_dir)
+
+        # Build the index if no worker has done it yet
+        if generation is None:
+            with shared_index.index_lock(index_dir):
+                generation = shared_index.read_generation(index_dir)
+                if generation is None:
+                    document_search_engine = create_document_search_engine()
+                    generation = shared_index.save_shared_index(
+                        document_search_engine.vectorstore, index_dir
+                    )
+
+        # (Re)attach when this process has no engine yet or the index was rewritten.
+        # The shared lock keeps a writer from swapping files halfway through the load
+        if _shared_search_engine is None or generation != _shared_generation:
+            with shared_index.index_lock(index_dir, shared=True):
+                generation = shared_index.read_generation(index_dir)
+                vectorstore = shared_index.load_shared_index(index_dir, create_embedding_model())
+            _shared_search_engine = VectorStoreIndexWrapper(vectorstore=vectorstore)
+            _shared_generation = generation
+
+    return _shared_search_engine
+
+def create_answer_generator():
+    """
+    Creates the AI model that will generate answers based on retrieved context
+    
+    Uses Claude 3 Sonnet - Amazon's advanced language model
+    Temperature 0.1 = more focused, less creative responses
+    """
+    
+    answer_generator = ChatBedrock(
+        region_name=os.getenv('AWS_REGION', 'us-east-1'),
+        model_id=os.getenv('BEDROCK_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0'),  # Claude 3 Sonnet model
+        model_kwargs={
+            "max_tokens": 3000,    # Maximum response length
+            "temperature": 0.1,    # Low creativity (more factual)
+            "top_p": 0.9          # Focus on most likely words
+        }
+    )
+    
+    return answer_generator
+
+def get_answer_generator():
+    """
+    Returns the shared answer generator (created on first use)
+
+    Creating a client per question meant a new boto3 client, credential lookup
+    and TLS handshake every time. One shared client reuses its connections.
+    """
+    global _answer_generator
+    if _answer_generator is None:
+        _answer_generator = create_answer_generator()
+    return _answer_generator
+
+def _log_first_answer(start):
+    """Log how long the first question of this process took (shows whether warm-up worked)"""
+    global _first_answer_logged
+    if not _first_answer_logged:
+        _first_answer_logged = True
+        logger.info("First RAG answer in this process took %.2fs", time.perf_counter() - start)
+
+def get_rag_answer(search_engine, user_question, top_k=None):
+    """
+    PHASE 2: Question Answering (Runs every time user asks a question)
+    
+    This is where the RAG magic happens:
+    1. Takes user's question (text)
+    2. Converts question to vector using SAME Titan model from search_engine
+    3. Searches document vectors for most similar chunks
+    4. Combines question + relevant document chunks
+    5. Sends combined context to Claude 3 for answer generation
+    6. Returns AI-generated answer based on your documents
+    
+    Args:
+        search_engine: The document search engine created by create_document_search_engine()
+        user_question: The question typed by user (e.g., "What is leave policy?")
+        top_k: Number of chunks to send to Claude 3 (default: from get_rag_settings())
+    
+    Returns:
+        AI-generated answer based on relevant document content
+    """
+    
+    start = time.perf_counter()
+
+    # Get the answer generator (Claude 3)
+    answer_generator = get_answer_generator()
+    
+    # The magic happens here! search_engine.query() does:
+    # 1. Converts user_question to vector using stored Titan model
+    # 2. Searches FAISS database for similar document vectors
+    # 3. Retrieves most relevant text chunks
+    # 4. Combines question + context and sends to Claude 3
+    # 5. Returns generated answer
+    rag_answer = search_engine.query(
+        question=user_question,
+        llm=answer_generator,
+        retriever_kwargs={"search_kwargs": {"k": top_k or get_rag_settings()["top_k"]}}
+    )
+    _log_first_answer(start)
+    
+    return rag_answer
+
+def stream_rag_answer(search_engine, user_question, top_k=None):
+    """
+    PHASE 2 (streaming): Same as get_rag_answer(), but yields the answer as it is generated
+
+    Uses the same retrieval and the same prompt as search_engine.query(), so both
+    paths give the same answers - this one just doesn't wait for the last token.
+
+    Args:
+        search_engine: The document search engine created by create_document_search_engine()
+        user_question: The question typed by user
+        top_k: Number of chunks to send to Claude 3 (default: from get_rag_settings())
+
+    Yields:
+        Pieces of the answer text, in order
+    """
+    start = time.perf_counter()
+    answer_generator = get_answer_generator()
+
+    # Step 1: Find the most relevant chunks
+    relevant_chunks = search_engine.vectorstore.similarity_search(
+        user_question, k=top_k or get_rag_settings()["top_k"]
+    )
+
+    # Step 2: Build the same "stuff" prompt RetrievalQA uses
+    prompt = PROMPT_SELECTOR.get_prompt(answer_generator).format_prompt(
+        context="\n\n".join(chunk.page_content for chunk in relevant_chunks),
+        question=user_question
+    )
+
+    # Step 3: Stream Claude 3's answer token by token
+    for answer_chunk in answer_generator.stream(prompt.to_messages()):
+        if answer_chunk.content:
+            yield answer_chunk.content
+    _log_first_answer(start)
+
+def file_sha256(path):
+    """Content hash of a file (identifies re-uploads of the same document)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as document_file:
+        for block in iter(lambda: document_file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _indexed_documents(vectorstore, index_dir):
+    """
+    Manifest of the indexed files: {file_name: {"sha256": ..., "chunk_ids": [...]}}
+
+    An index built at startup has no manifest yet, so the first upload builds
+    one from the chunks' "source" metadata (hashing the files still in docs/).
+    """
+    documents = shared_index.read_documents(index_dir)
+    if documents is not None:
+        return documents
+
+    documents = {}
+    for chunk_id in vectorstore.index_to_docstore_id.values():
+        source = vectorstore.docstore.search(chunk_id).metadata.get("source")
+        if not source:
+            continue
+        if os.path.basename(source) not in documents:
+            documents[os.path.basename(source)] = {
+                "sha256": file_sha256(source) if os.path.exists(source) else None,
+                "chunk_ids": [],
+            }
+        documents[os.path.basename(source)]["chunk_ids"].append(chunk_id)
+    return documents
+
+def add_document_to_index(pdf_path, index_dir=RAG_INDEX_DIR, progress_callback=None):
+    """
+    PHASE 3: Live Document Upload (no restart, no full rebuild)
+
+    Appends ONE new PDF to the shared index:
+    1. Skips the PDF if the same content is already indexed (re-upload)
+    2. Loads and splits the PDF with the same text splitter as the startup build
+    3. Converts the new chunks to vectors with Amazon Titan (in small batches)
+    4. Takes the shared index lock and appends the vectors + chunk text; a new
+       version of an already indexed file name replaces that file's old chunks
+    5. Publishes a new index generation - every worker re-attaches on its next
+       question, so queries see the new content as soon as it is committed
+
+    Args:
+        pdf_path: Path to the uploaded PDF
+        index_dir: Shared index directory (default: RAG_INDEX_DIR)
+        progress_callback: Optional fn(stage, done, total) for progress reporting
+
+    Returns:
+        Number of chunks added to the index (0 if the content was already indexed)
+    """
+
+    def report(stage, done, total):
+        if progress_callback is not None:
+            progress_callback(stage, done, total)
+
+    file_name = os.path.basename(pdf_path)
+    content_hash = file_sha256(pdf_path)
+
+    def already_indexed(documents):
+        return any(entry["sha256"] == content_hash for entry in (documents or {}).values())
+
+    # Make sure there is an index to append to
+    get_shared_search_engine(index_dir)
+
+    # Step 1: Same content uploaded before - skip the Titan calls
+    if already_indexed(shared_index.read_documents(index_dir)):
+        report("unchanged", 0, 0)
+        return 0
+
+    # Step 2: Load + chunk (same settings as the startup build)
+    report("parsing", 0, 1)
+    document_chunks = create_text_splitter().split_documents(PyPDFLoader(pdf_path).load())
+    if not document_chunks:
+        report("done", 0, 0)
+        return 0
+
+    # Step 3: Embed outside the lock - this is the slow part (one Titan call per chunk)
+    embedding_model = create_embedding_model()
+    texts = [chunk.page_content for chunk in document_chunks]
+    vectors = []
+    for start in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        vectors.extend(embedding_model.embed_documents(texts[start:start + EMBEDDING_BATCH_SIZE]))
+        report("embedding", len(vectors), len(texts))
+
+    # Step 4 + 5: Append and publish while holding the cross-process lock
+    report("committing", len(texts), len(texts))
+    with shared_index.index_lock(index_dir):
+        vectorstore = shared_index.load_shared_index(index_dir, embedding_model, writable=True)
+        documents = _indexed_documents(vectorstore, index_dir)
+        if already_indexed(documents):
+            # Another upload of the same content was committed while this one was embedding
+            report("unchanged", 0, 0)
+            return 0
+
+        # A new version of a file that is already indexed replaces its old chunks
+        replaced = documents.pop(file_name, None)
+        if replaced is not None:
+            current_ids = set(vectorstore.index_to_docstore_id.values())
+            stale_ids = [chunk_id for chunk_id in replaced["chunk_ids"] if chunk_id in current_ids]
+            if stale_ids:
+                vectorstore.delete(stale_ids)
+
+        chunk_ids = vectorstore.add_embeddings(
+            text_embeddings=list(zip(texts, vectors)),
+            metadatas=[chunk.metadata for chunk in document_chunks]
+        )
+        documents[file_name] = {"sha256": content_hash, "chunk_ids": chunk_ids}
+        shared_index.save_shared_index(vectorstore, index_dir)
+        shared_index.write_documents(index_dir, documents)
+
+    report("done", len(texts), len(texts))
+    return len(texts)
+
+def _job_path(index_dir, job_id):
+    """Status file of one upload job, or None for ids this module never hands out"""
+    if not re.fullmatch(r"[0-9a-f]{32}", job_id or ""):
+        return None
+    return os.path.join(index_dir, UPLOAD_JOBS_DIR, f"{job_id}.json")
+
+def _write_job(index_dir, job):
+    """Atomically replace the job's status file, so pollers never read half a file"""
+    path = _job_path(index_dir, job["job_id"])
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as job_file:
+        json.dump(job, job_file)
+    os.replace(temp_path, path)
+
+def _purge_old_jobs(index_dir):
+    """Remove job status files nobody has updated for UPLOAD_JOB_TTL_SECONDS"""
+    jobs_dir = os.path.join(index_dir, UPLOAD_JOBS_DIR)
+    cutoff = time.time() - UPLOAD_JOB_TTL_SECONDS
+    for name in os.listdir(jobs_dir):
+        try:
+            if os.path.getmtime(os.path.join(jobs_dir, name)) < cutoff:
+                os.remove(os.path.join(jobs_dir, name))
+        except FileNotFoundError:
+            pass    # Removed by another worker
+
+def start_document_upload(pdf_path, index_dir=RAG_INDEX_DIR):
+    """
+    Runs add_document_to_index() in the background
+
+    The job's status is kept in a file in the index directory (not in this
+    process), so every worker sharing the index can report its progress.
+
+    Args:
+        pdf_path: Path to the uploaded PDF
+        index_dir: Shared index directory (default: RAG_INDEX_DIR)
+
+    Returns:
+        Job id to pass to get_upload_status()
+    """
+    global _pending_uploads
+
+    os.makedirs(os.path.join(index_dir, UPLOAD_JOBS_DIR), exist_ok=True)
+    _purge_old_jobs(index_dir)
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "job_id": job_id,
+        "file_name": os.path.basename(pdf_path),
+        "stage": "queued",
+        "done": 0,
+        "total": 0,
+        "chunks_added": None,
+        "error": None,
+    }
+    _write_job(index_dir, job)
+    with _upload_jobs_lock:
+        _pending_uploads += 1
+
+    def update_progress(stage, done, total):
+        job.update(stage=stage, done=done, total=total)
+        if stage in ("done", "unchanged"):
+            job["chunks_added"] = done
+        _write_job(index_dir, job)
+
+    def run_upload():
+        global _pending_uploads
+        try:
+            add_document_to_index(pdf_path, index_dir, update_progress)
+        except Exception as e:
+            job.update(stage="failed", error=str(e))
+            _write_job(index_dir, job)
+        finally:
+            with _upload_jobs_lock:
+                _pending_uploads -= 1
+
+    _upload_executor.submit(run_upload)
+    return job_id
+
+def pending_uploads():
+    """Uploads queued or running in this process (lets the API cap its backlog)"""
+    with _upload_jobs_lock:
+        return _pending_uploads
+
+def get_upload_status(job_id, index_dir=RAG_INDEX_DIR):
+    """
+    Returns a snapshot of one upload job (stage, done, total, chunks_added, error), or None
+
+    Stages: queued, parsing, embedding, committing, then done, unchanged
+    (same content already indexed) or failed.
+    """
+    path = _job_path(index_dir, job_id)
+    if path is None:
+        return None
+    try:
+        with open(path) as job_file:
+            return json.load(job_file)
+    except FileNotFoundError:
+        return None
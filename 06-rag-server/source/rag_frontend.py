@@ -7,6 +7,7 @@ This creates a simple web interface where users can:
 3. See the RAG (Retrieval-Augmented Generation) system in action
 """
 
+import os
 import streamlit as st 
 import rag_backend as rag_system  # Our document processing and AI backend
 
@@ -30,18 +31,19 @@ st.markdown("""
 - ✅ Get accurate, document-specific responses (not general knowledge)
 """)
 
-# PHASE 1: One-time setup - Create document search engine
-# This happens only once when the app starts or refreshes
-if 'document_search_engine' not in st.session_state:
-    with st.spinner("🔄 Processing documents... Creating search engine from your PDFs"):
-        # This calls create_document_search_engine() which:
-        # 1. Loads all PDFs from docs/ folder
-        # 2. Splits text into chunks
-        # 3. Converts chunks to vectors using Amazon Titan
-        # 4. Stores vectors in FAISS database
-        # 5. Returns complete search engine
-        st.session_state.document_search_engine = rag_system.create_document_search_engine()
-        st.success("✅ Document search engine ready! You can now ask questions.")
+# PHASE 1: One-time setup - Attach to the shared document search engine
+# The index is built once per task (by whichever worker starts first) and then
+# memory-mapped by every Streamlit process, so only the very first session waits
+with st.spinner("🔄 Processing documents... Creating search engine from your PDFs"):
+    # This calls get_shared_search_engine() which:
+    # 1. Builds the index once (load PDFs → chunk → Titan vectors → FAISS)
+    # 2. Saves it to RAG_INDEX_DIR for the other worker processes
+    # 3. Returns the process-wide search engine attached to the shared index
+    document_search_engine = rag_system.get_shared_search_engine()
+
+if 'search_engine_ready' not in st.session_state:
+    st.session_state.search_engine_ready = True
+    st.success("✅ Document search engine ready! You can now ask questions.")
 
 # PHASE 2: User interaction - Question and Answer
 st.subheader("💬 Ask a question about your documents:")
@@ -68,7 +70,7 @@ if ask_question_button and user_question.strip():
         # 5. Sends to Claude 3 for answer generation
         # 6. Returns AI-generated answer based on documents
         ai_answer = rag_system.get_rag_answer(
-            search_engine=st.session_state.document_search_engine, 
+            search_engine=document_search_engine, 
             user_question=user_question
         )
         
@@ -79,6 +81,45 @@ if ask_question_button and user_question.strip():
 elif ask_question_button and not user_question.strip():
     st.warning("⚠️ Please enter a question first!")
 
+# PHASE 3: Live document upload - add a PDF to the running index (no restart)
+st.subheader("📤 Add a document:")
+
+uploaded_pdf = st.file_uploader("Upload a PDF", type=["pdf"], label_visibility="collapsed")
+add_document_button = st.button("➕ Add to Search Engine", disabled=uploaded_pdf is None)
+
+if add_document_button and uploaded_pdf is not None:
+    # Keep the file in docs/ so it is also part of any future full rebuild
+    pdf_path = os.path.join('docs', os.path.basename(uploaded_pdf.name))
+    with open(pdf_path, 'wb') as pdf_file:
+        pdf_file.write(uploaded_pdf.getbuffer())
+
+    # This calls start_document_upload() which, in the background:
+    # 1. Splits the PDF into chunks and converts them to vectors (Titan)
+    # 2. Appends them to the shared index and publishes a new version
+    # Questions asked after that automatically include the new document
+    if 'upload_jobs' not in st.session_state:
+        st.session_state.upload_jobs = []
+    st.session_state.upload_jobs.append(rag_system.start_document_upload(pdf_path))
+
+@st.fragment(run_every=2)
+def show_upload_progress():
+    # Refreshes on its own every 2 seconds without rerunning the whole page
+    for job_id in st.session_state.get('upload_jobs', []):
+        job = rag_system.get_upload_status(job_id)
+        if job is None:
+            continue
+        if job['stage'] == 'failed':
+            st.error(f"❌ {job['file_name']}: {job['error']}")
+        elif job['stage'] == 'done':
+            st.success(f"✅ {job['file_name']}: {job['chunks_added']} chunks added - ready for questions")
+        elif job['stage'] == 'unchanged':
+            st.info(f"ℹ️ {job['file_name']}: already in the index, nothing added")
+        else:
+            progress = job['done'] / job['total'] if job['total'] else 0.0
+            st.progress(progress, text=f"🔄 {job['file_name']}: {job['stage']} ({job['done']}/{job['total']} chunks)")
+
+show_upload_progress()
+
 # Add helpful information in sidebar
 with st.sidebar:
     st.header("📋 System Info")
@@ -98,5 +139,6 @@ with st.sidebar:
     st.markdown("""
     - Ask specific questions about document content
     - The AI only knows what's in your PDFs
+    - Upload a new PDF anytime - no restart needed
     - For best results, ask clear, focused questions
     """)
\ No newline at end of file
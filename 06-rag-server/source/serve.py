@@ -0,0 +1,24 @@
+"""
+Streamlit launcher with a warm-up stage
+
+    python serve.py --server.port=8501 --server.address=0.0.0.0 --server.headless=true
+
+Runs warmup.warm_up() first, then starts Streamlit in the same process (a
+missing index is built in a background thread, outside the health check). The
+Streamlit health endpoint only answers once the server is up, so ECS/ALB send
+no traffic to the task before the clients are warm. The frontend's
+`import rag_backend` reuses the already-warm module.
+"""
+import logging
+import sys
+
+from streamlit.web import cli as stcli
+
+import warmup
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    warmup.warm_up()
+    warmup.build_index_in_background()
+    sys.argv = ["streamlit", "run", "rag_frontend.py", *sys.argv[1:]]
+    sys.exit(stcli.main())
@@ -0,0 +1,169 @@
+# Shared Index: Build the FAISS index once, memory-map it in every worker
+#
+# Several Streamlit processes can run in the same Fargate task. Without this
+# module every process would load the PDFs, call Titan for every chunk and keep
+# its own private copy of the vectors. Instead:
+#   1. The first process to start takes a file lock and builds the index
+#   2. It writes the FAISS index + compressed chunk store to RAG_INDEX_DIR
+#   3. Every process (including the builder) attaches to the index file through
+#      a read-only memory map, so the OS page cache holds ONE copy of the vectors
+#      no matter how many workers are running
+
+import fcntl
+import json
+import os
+import pickle
+from contextlib import contextmanager
+
+import faiss
+from langchain_community.vectorstores import FAISS
+
+from compressed_docstore import CompressedDocstore
+
+INDEX_FILE = "index.faiss"          # Raw FAISS vectors (memory-mapped by readers)
+CHUNKS_FILE = "chunks.zst"          # Compressed chunk text (read on demand for search hits)
+DOCSTORE_FILE = "docstore.pkl"      # Chunk offset index + FAISS position -> chunk id mapping
+GENERATION_FILE = "generation"      # Bumped on every write, written LAST (marks the index as ready)
+DOCUMENTS_FILE = "documents.json"   # Indexed files: content hash + chunk ids (used by live uploads)
+LOCK_FILE = ".lock"                 # Serializes builders/writers across processes
+
+# Read-only mmap of the flat vector codes (faiss >= 1.10). Older builds only
+# know IO_FLAG_MMAP, which still avoids copying inverted lists.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+@contextmanager
+def index_lock(index_dir, shared=False):
+    """
+    Cross-process lock on the shared index directory
+
+    Writers take it exclusively: workers block here while another process is
+    building or updating the index, then continue with the finished files.
+    Readers take it shared while loading, so they never combine a new
+    index.faiss with an old docstore.pkl (or the other way round).
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, LOCK_FILE), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def read_generation(index_dir):
+    """
+    Returns the current index generation, or None if no complete index exists yet
+    """
+    try:
+        with open(os.path.join(index_dir, GENERATION_FILE)) as generation_file:
+            return int(generation_file.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _replace_file(path, write):
+    """Write to a temp file then atomically rename, so readers never see half a file"""
+    temp_path = f"{path}.tmp"
+    write(temp_path)
+    os.replace(temp_path, path)
+
+
+def read_documents(index_dir):
+    """
+    Returns {file_name: {"sha256": ..., "chunk_ids": [...]}} for the indexed files,
+    or None if the index was never updated by a live upload (no manifest yet)
+    """
+    try:
+        with open(os.path.join(index_dir, DOCUMENTS_FILE)) as documents_file:
+            return json.load(documents_file)
+    except FileNotFoundError:
+        return None
+
+
+def write_documents(index_dir, documents):
+    """Replace the indexed-files manifest (call while holding index_lock(index_dir))"""
+    def write(path):
+        with open(path, "w") as documents_file:
+            json.dump(documents, documents_file)
+
+    _replace_file(os.path.join(index_dir, DOCUMENTS_FILE), write)
+
+
+def save_shared_index(vectorstore, index_dir):
+    """
+    Persist a LangChain FAISS vectorstore so other processes can attach to it
+
+    Must be called while holding index_lock(index_dir).
+
+    Args:
+        vectorstore: LangChain FAISS vectorstore (e.g. search_engine.vectorstore)
+        index_dir: Directory shared by all worker processes
+
+    Returns:
+        The new index generation number
+    """
+    os.makedirs(index_dir, exist_ok=True)
+
+    # Step 1: Vectors in FAISS' native on-disk format (this is what gets mmapped)
+    _replace_file(
+        os.path.join(index_dir, INDEX_FILE),
+        lambda path: faiss.write_index(vectorstore.index, path)
+    )
+
+    # Step 2: Chunk text goes to the compressed on-disk store (only the offsets stay in memory)
+    docstore = vectorstore.docstore
+    if not isinstance(docstore, CompressedDocstore):
+        documents = {
+            chunk_id: docstore.search(chunk_id)
+            for chunk_id in vectorstore.index_to_docstore_id.values()
+        }
+        docstore = CompressedDocstore.create(os.path.join(index_dir, CHUNKS_FILE), documents)
+        vectorstore.docstore = docstore
+
+    # Step 3: Offset index and the FAISS row -> chunk id mapping
+    def write_docstore(path):
+        with open(path, "wb") as docstore_file:
+            pickle.dump((docstore, vectorstore.index_to_docstore_id), docstore_file)
+
+    _replace_file(os.path.join(index_dir, DOCSTORE_FILE), write_docstore)
+
+    # Step 4: Publish - bumping the generation tells every worker to (re)attach
+    generation = (read_generation(index_dir) or 0) + 1
+
+    def write_generation(path):
+        with open(path, "w") as generation_file:
+            generation_file.write(str(generation))
+
+    _replace_file(os.path.join(index_dir, GENERATION_FILE), write_generation)
+    return generation
+
+
+def load_shared_index(index_dir, embedding_model, writable=False):
+    """
+    Attach to the shared index without copying the vectors into this process
+
+    Must be called while holding index_lock(index_dir) - shared is enough for
+    readers - because a writer replaces the files one after the other.
+
+    Args:
+        index_dir: Directory written by save_shared_index()
+        embedding_model: Same embedding model the index was built with
+                         (used to embed incoming questions)
+        writable: Load a private, appendable copy of the vectors instead of the
+                  read-only memory map (used while adding documents, under index_lock)
+
+    Returns:
+        LangChain FAISS vectorstore backed by a read-only memory map
+    """
+    index = faiss.read_index(os.path.join(index_dir, INDEX_FILE), 0 if writable else MMAP_FLAGS)
+
+    with open(os.path.join(index_dir, DOCSTORE_FILE), "rb") as docstore_file:
+        docstore, index_to_docstore_id = pickle.load(docstore_file)
+
+    return FAISS(
+        embedding_function=embedding_model,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id
+    )
@@ -0,0 +1,10 @@
+#!/bin/sh
+# Starts the headless RAG API and the Streamlit UI in the same container.
+# Both attach to the same shared index in RAG_INDEX_DIR (built once, memory-mapped).
+
+# HTTP/JSON API on port 8000 (background)
+uvicorn rag_api:app --host 0.0.0.0 --port 8000 --workers "${RAG_API_WORKERS:-1}" &
+
+# Streamlit UI on port 8501 (foreground - container stops when it stops)
+# serve.py warms up the index and Bedrock clients before Streamlit starts answering health checks
+exec python serve.py --server.port=8501 --server.address=0.0.0.0 --server.headless=true
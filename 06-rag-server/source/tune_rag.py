@@ -0,0 +1,247 @@
+"""
+RAG Auto-Tuner - sweep chunk_size / chunk_overlap / top_k on your own documents
+
+For every combination this script:
+1. Chunks the PDFs in --docs and builds a FAISS index (embeddings are cached,
+   so every distinct chunk is embedded only once across the whole sweep)
+2. Asks every question in --questions through the normal RAG chain, but with a
+   stub LLM that records the prompt instead of calling Claude
+3. Measures recall@k (did the retrieved chunks contain the gold passage?),
+   average prompt tokens, retrieval latency and index size
+4. Writes the best configuration to --output (read by rag_backend.get_rag_settings())
+
+Question file (JSON lines):
+    {"question": "How many sick leaves do I get?", "gold": "Employees are entitled to 12 days of sick leave"}
+    {"question": "...", "gold": ["passage one", "passage two"]}
+
+Usage:
+    python tune_rag.py --questions questions.jsonl
+    python tune_rag.py --questions questions.jsonl --embeddings hashing   # offline, no Bedrock calls
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import re
+import time
+
+import faiss
+from langchain_community.document_loaders import PyPDFLoader, DirectoryLoader
+from langchain_community.llms.fake import FakeListLLM
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from langchain.indexes.vectorstore import VectorStoreIndexWrapper
+from pydantic import Field
+
+import rag_backend
+
+CHARS_PER_TOKEN = 4     # Rough token estimate for English text
+
+
+class PromptRecordingLLM(FakeListLLM):
+    """Stub LLM: records every prompt the RAG chain builds and returns a fixed answer"""
+
+    prompts: list = Field(default_factory=list)
+
+    def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+        self.prompts.append(prompt)
+        return "stub answer"
+
+
+class CachingEmbeddings(Embeddings):
+    """Wraps an embedding model so each distinct text is embedded only once"""
+
+    def __init__(self, embedding_model):
+        self.embedding_model = embedding_model
+        self.cache = {}
+
+    def embed_documents(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if text not in self.cache]
+        if missing:
+            self.cache.update(zip(missing, self.embedding_model.embed_documents(missing)))
+        return [self.cache[text] for text in texts]
+
+    def embed_query(self, text):
+        if text not in self.cache:
+            self.cache[text] = self.embedding_model.embed_query(text)
+        return self.cache[text]
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline bag-of-words embeddings (no Bedrock calls) for quick local sweeps"""
+
+    def __init__(self, size=512):
+        self.size = size
+
+    def embed_query(self, text):
+        vector = [0.0] * self.size
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % self.size] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+
+def words(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def gold_is_retrieved(gold_passage, retrieved_chunks, min_coverage):
+    """A gold passage counts as found when the retrieved chunks cover enough of its words"""
+    gold_words = words(gold_passage)
+    if not gold_words:
+        return False
+    retrieved_words = set(words(" ".join(retrieved_chunks)))
+    covered = sum(1 for word in gold_words if word in retrieved_words)
+    return covered / len(gold_words) >= min_coverage
+
+
+def load_questions(path):
+    questions = []
+    with open(path) as questions_file:
+        for line in questions_file:
+            if line.strip():
+                item = json.loads(line)
+                gold = item["gold"]
+                questions.append({
+                    "question": item["question"],
+                    "gold": [gold] if isinstance(gold, str) else list(gold)
+                })
+    return questions
+
+
+def evaluate(documents, questions, embedding_model, chunk_size, chunk_overlap, top_k_values, min_coverage):
+    """
+    Builds one index for (chunk_size, chunk_overlap) and scores every top_k on it
+
+    Returns:
+        One result dict per top_k
+    """
+    text_splitter = rag_backend.create_text_splitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = text_splitter.split_documents(documents)
+
+    build_start = time.perf_counter()
+    vectorstore = FAISS.from_documents(chunks, embedding_model)
+    build_seconds = time.perf_counter() - build_start
+
+    index_bytes = len(faiss.serialize_index(vectorstore.index))
+    text_bytes = sum(len(chunk.page_content.encode("utf-8")) for chunk in chunks)
+    search_engine = VectorStoreIndexWrapper(vectorstore=vectorstore)
+
+    results = []
+    for top_k in top_k_values:
+        stub_llm = PromptRecordingLLM(responses=["stub answer"])
+        hits = 0
+        retrieval_seconds = 0.0
+
+        for item in questions:
+            # Retrieval only (what the user waits for before the LLM starts)
+            retrieval_start = time.perf_counter()
+            retrieved = vectorstore.similarity_search(item["question"], k=top_k)
+            retrieval_seconds += time.perf_counter() - retrieval_start
+
+            retrieved_text = [chunk.page_content for chunk in retrieved]
+            if any(gold_is_retrieved(gold, retrieved_text, min_coverage) for gold in item["gold"]):
+                hits += 1
+
+            # Full RAG chain with the stub LLM - records the exact prompt Claude would get
+            search_engine.query(
+                question=item["question"],
+                llm=stub_llm,
+                retriever_kwargs={"search_kwargs": {"k": top_k}}
+            )
+
+        prompt_tokens = [len(prompt) / CHARS_PER_TOKEN for prompt in stub_llm.prompts]
+        results.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "top_k": top_k,
+            "recall_at_k": hits / len(questions),
+            "avg_prompt_tokens": sum(prompt_tokens) / len(prompt_tokens),
+            "avg_retrieval_ms": 1000 * retrieval_seconds / len(questions),
+            "num_chunks": len(chunks),
+            "index_bytes": index_bytes + text_bytes,
+            "build_seconds": build_seconds,
+        })
+    return results
+
+
+def score(result, token_weight, latency_weight):
+    """Higher is better: recall first, then fewer prompt tokens, then lower latency"""
+    return (
+        result["recall_at_k"]
+        - token_weight * result["avg_prompt_tokens"] / 1000
+        - latency_weight * result["avg_retrieval_ms"] / 1000
+    )
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune chunk_size / chunk_overlap / top_k for the RAG server")
+    parser.add_argument("--docs", default="docs/", help="Folder with the PDF corpus")
+    parser.add_argument("--questions", required=True, help="JSON lines file with question + gold passage(s)")
+    parser.add_argument("--chunk-sizes", type=parse_int_list, default=[500, 1000, 1500])
+    parser.add_argument("--chunk-overlaps", type=parse_int_list, default=[0, 20, 100, 200])
+    parser.add_argument("--top-k", type=parse_int_list, default=[2, 4, 6])
+    parser.add_argument("--embeddings", choices=["bedrock", "hashing"], default="bedrock",
+                        help="bedrock = real Titan vectors, hashing = offline approximation")
+    parser.add_argument("--min-coverage", type=float, default=0.8,
+                        help="Fraction of gold passage words the retrieved chunks must contain")
+    parser.add_argument("--token-weight", type=float, default=0.05,
+                        help="Score penalty per 1000 prompt tokens")
+    parser.add_argument("--latency-weight", type=float, default=0.1,
+                        help="Score penalty per second of retrieval latency")
+    parser.add_argument("--output", default=rag_backend.RAG_SETTINGS_FILE,
+                        help="Where to write the best configuration")
+    args = parser.parse_args()
+
+    documents = DirectoryLoader(args.docs, glob="*.pdf", loader_cls=PyPDFLoader).load()
+    questions = load_questions(args.questions)
+    base_embeddings = rag_backend.create_embedding_model() if args.embeddings == "bedrock" else HashingEmbeddings()
+    embedding_model = CachingEmbeddings(base_embeddings)
+
+    results = []
+    for chunk_size, chunk_overlap in itertools.product(args.chunk_sizes, args.chunk_overlaps):
+        if chunk_overlap >= chunk_size:
+            continue
+        results.extend(evaluate(
+            documents, questions, embedding_model,
+            chunk_size, chunk_overlap, args.top_k, args.min_coverage
+        ))
+
+    if not results:
+        raise SystemExit("No valid (chunk_size, chunk_overlap) combinations to evaluate")
+
+    results.sort(key=lambda result: score(result, args.token_weight, args.latency_weight), reverse=True)
+
+    print(f"{'size':>6} {'overlap':>7} {'k':>3} {'recall@k':>9} {'tokens':>8} {'ret ms':>8} {'chunks':>7} {'index KB':>9} {'score':>7}")
+    for result in results:
+        print(
+            f"{result['chunk_size']:>6} {result['chunk_overlap']:>7} {result['top_k']:>3} "
+            f"{result['recall_at_k']:>9.2f} {result['avg_prompt_tokens']:>8.0f} "
+            f"{result['avg_retrieval_ms']:>8.1f} {result['num_chunks']:>7} "
+            f"{result['index_bytes'] / 1024:>9.0f} {score(result, args.token_weight, args.latency_weight):>7.3f}"
+        )
+
+    best = results[0]
+    best_settings = {
+        "chunk_size": best["chunk_size"],
+        "chunk_overlap": best["chunk_overlap"],
+        "top_k": best["top_k"],
+        "metrics": {name: value for name, value in best.items() if name not in rag_backend.DEFAULT_RAG_SETTINGS},
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(best_settings, output_file, indent=2)
+
+    print(f"\nBest: chunk_size={best['chunk_size']} chunk_overlap={best['chunk_overlap']} top_k={best['top_k']} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
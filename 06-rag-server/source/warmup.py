@@ -0,0 +1,94 @@
+"""
+Container start warm-up - runs BEFORE the app starts answering health checks
+
+Without it the first user after a deployment pays for:
+- attaching the shared FAISS index
+- boto3 client creation, endpoint resolution and credential lookup
+- the TLS handshake to bedrock-runtime
+
+warm_up() does all of that once, with two cheap authenticated calls (one
+embedding of "warm up", one 1-token Converse call), so the connections are in
+the clients' pools when the first real question arrives. It is used by
+serve.py (Streamlit UI) and by the API's startup hook (rag_api.py).
+
+Building the index (one Titan call per chunk) can take far longer than the
+container health check allows, so warm_up() only attaches an index that already
+exists. A missing index is built by build_index_in_background() once the app
+is up (or by the first request, whichever comes first - the index lock makes
+sure it is built only once).
+
+Set WARMUP_ENABLED=false to skip it (e.g. for local development without AWS).
+"""
+import logging
+import os
+import threading
+import time
+
+import rag_backend as rag_system
+import shared_index
+
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+
+logger = logging.getLogger(__name__)
+
+def ping_model(chat_model, model_id):
+    """Smallest authenticated call: one Converse request that generates a single token"""
+    chat_model.client.converse(
+        modelId=model_id,
+        messages=[{"role": "user", "content": [{"text": "ping"}]}],
+        inferenceConfig={"maxTokens": 1},
+    )
+
+def index_is_built():
+    return shared_index.read_generation(rag_system.RAG_INDEX_DIR) is not None
+
+def attach_index():
+    """Attach the shared index if it exists - never build it here (see module docstring)"""
+    if not index_is_built():
+        logger.info("Warm-up: no shared index yet, it is built in the background after start-up")
+        return
+    rag_system.get_shared_search_engine()
+
+def embed_warm_up():
+    if index_is_built():
+        embedding_model = rag_system.get_shared_search_engine().vectorstore.embeddings
+    else:
+        embedding_model = rag_system.create_embedding_model()
+    embedding_model.embed_query("warm up")
+
+def build_index_in_background():
+    """Build (or attach) the shared index in a daemon thread, outside the health gate"""
+    if not WARMUP_ENABLED or index_is_built():
+        return
+
+    def build():
+        started = time.perf_counter()
+        try:
+            rag_system.get_shared_search_engine()
+            logger.info("Shared index ready in %.2fs", time.perf_counter() - started)
+        except Exception as e:
+            logger.warning("Background index build failed (the first request will retry): %s", e)
+
+    threading.Thread(target=build, name="rag-index-build", daemon=True).start()
+
+def warm_up():
+    """Attach the index and open Bedrock connections; failures are logged, never fatal"""
+    if not WARMUP_ENABLED:
+        logger.info("Warm-up skipped (WARMUP_ENABLED=false)")
+        return
+
+    started = time.perf_counter()
+    steps = [
+        ("attach shared index", attach_index),
+        ("embedding model", embed_warm_up),
+        ("answer model", lambda: ping_model(rag_system.get_answer_generator(), rag_system.get_answer_generator().model_id)),
+    ]
+    for name, step in steps:
+        step_started = time.perf_counter()
+        try:
+            step()
+            logger.info("Warm-up: %s ready in %.2fs", name, time.perf_counter() - step_started)
+        except Exception as e:
+            # Still start the app - the first request will retry (and report the real error to the user)
+            logger.warning("Warm-up: %s failed after %.2fs: %s", name, time.perf_counter() - step_started, e)
+    logger.info("Warm-up finished in %.2fs", time.perf_counter() - started)
@@ -7,6 +7,7 @@ from aws_cdk import (
     aws_ec2 as ec2,
     aws_ecs as ecs,
     aws_logs,
+    aws_s3 as s3,
     aws_elasticloadbalancingv2 as elbv2
 )
 
@@ -79,6 +80,19 @@ class ImageGenerateEcsStack(Stack):
             )
         )
         
+        # Content-addressed cache of generated images (same prompt + settings = same image).
+        # Only a cache: the UI hands out 1-hour presigned links and refreshes entries before they expire
+        image_cache_ttl_days = 30
+        image_cache_bucket = s3.Bucket(
+            self, "ImageGeneratorCacheBucket",
+            removal_policy=aws_cdk.RemovalPolicy.DESTROY,
+            auto_delete_objects=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(prefix="cache/", expiration=Duration.days(image_cache_ttl_days))
+            ]
+        )
+        image_cache_bucket.grant_read_write(task_role)
+
         # Task Definition with proper CPU/Memory and roles
         task_definition = ecs.FargateTaskDefinition(
             self, "ImageGeneratorEcsTaskDef", 
@@ -98,6 +112,8 @@ class ImageGenerateEcsStack(Stack):
             # Environment variables from your docker-compose
             environment={
                 "AWS_DEFAULT_REGION": "us-east-1",
+                "IMAGE_CACHE_BUCKET": image_cache_bucket.bucket_name,
+                "IMAGE_CACHE_TTL_DAYS": str(image_cache_ttl_days),
             },
             # Logging configuration
             logging=ecs.LogDrivers.aws_logs(
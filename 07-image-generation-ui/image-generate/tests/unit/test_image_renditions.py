@@ -0,0 +1,61 @@
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "..", "source")
+sys.path.insert(0, SOURCE_DIR)
+
+import image_renditions  # noqa: E402
+
+
+@pytest.fixture
+def png_bytes():
+    """A 1024x1024 PNG, like Titan returns"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (1024, 1024), (200, 80, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def decode(rendition):
+    image = Image.open(io.BytesIO(rendition["bytes"]))
+    return image.format, image.size
+
+
+def test_display_renditions_are_small_webp(png_bytes):
+    renditions = image_renditions.make_renditions(png_bytes, names=image_renditions.DISPLAY)
+
+    assert set(renditions) == {"original", "thumbnail", "medium"}
+    assert renditions["original"]["bytes"] == png_bytes
+    assert decode(renditions["thumbnail"]) == ("WEBP", (256, 256))
+    assert decode(renditions["medium"]) == ("WEBP", (512, 512))
+    assert (renditions["medium"]["width"], renditions["medium"]["height"]) == (512, 512)
+    assert renditions["medium"]["mime"] == "image/webp"
+
+
+@pytest.mark.skipif(not image_renditions.can_write("AVIF"), reason="Pillow built without AVIF")
+def test_downloads_are_full_size(png_bytes):
+    renditions = image_renditions.make_renditions(png_bytes, names=image_renditions.DOWNLOADS)
+
+    assert decode(renditions["webp"]) == ("WEBP", (1024, 1024))
+    assert decode(renditions["avif"]) == ("AVIF", (1024, 1024))
+    assert (renditions["avif"]["mime"], renditions["avif"]["extension"]) == ("image/avif", "avif")
+    assert image_renditions.download_formats() == ["original", "webp", "avif"]
+
+
+def test_avif_is_skipped_without_an_encoder(png_bytes, monkeypatch):
+    monkeypatch.setattr(image_renditions, "can_write", lambda image_format: image_format != "AVIF")
+
+    renditions = image_renditions.make_renditions(png_bytes)
+
+    assert set(renditions) == {"original", "thumbnail", "medium", "webp"}
+    assert image_renditions.download_formats() == ["original", "webp"]
+
+
+def test_copy_matches_the_bg_remover_app():
+    other = os.path.join(SOURCE_DIR, "..", "..", "08-image-generate-bg-remover",
+                         "source", "image_generator", "image_renditions.py")
+    with open(image_renditions.__file__) as ours, open(other) as theirs:
+        assert ours.read() == theirs.read()
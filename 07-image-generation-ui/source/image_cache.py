@@ -0,0 +1,170 @@
+"""
+Content-addressed S3 cache for Titan image generation results.
+
+Every request pins all generation parameters (prompt, size, cfgScale and a
+fixed seed), so the same model id + request body always produces the same image.
+Images are stored under a key derived from a hash of exactly those inputs; a
+repeat request is served from S3 without invoking Bedrock.
+
+Smaller renditions (image_renditions.py) are stored next to the original,
+with a small JSON manifest describing them:
+
+    cache/ab/cd/<sha>.png               original
+    cache/ab/cd/<sha>.medium.webp       rendition (thumbnail, medium)
+    cache/ab/cd/<sha>.renditions.json   {name: {key, mime, extension, width, height, size}}
+
+Enabled when IMAGE_CACHE_BUCKET is set. Hit/miss counts are logged and shown in
+the UI sidebar (stats()).
+
+Retention: the bucket expires cache/ objects CACHE_TTL_DAYS (30) after they
+were last written, and the UI links to them through presigned URLs valid for
+URL_EXPIRES_SECONDS (1 hour). A manifest old enough that a new link could
+outlive its objects counts as a miss, and storing the renditions again
+rewrites every object (original included), which restarts their lifetime.
+Nothing here is kept for good: downloads are the user's copy.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+
+import boto3
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+CACHE_BUCKET = os.environ.get('IMAGE_CACHE_BUCKET', '')
+CACHE_PREFIX = os.environ.get('IMAGE_CACHE_PREFIX', 'cache/')
+CACHE_TTL_DAYS = int(os.environ.get('IMAGE_CACHE_TTL_DAYS', '30'))  # Same as the bucket lifecycle rule
+URL_EXPIRES_SECONDS = 3600  # Presigned links handed to the browser
+
+s3_client = boto3.client('s3') if CACHE_BUCKET else None
+
+_lock = threading.Lock()
+_hits = 0
+_misses = 0
+
+
+def canonical_body(body):
+    """Same JSON regardless of key order or whitespace."""
+    return json.dumps(json.loads(body), sort_keys=True, separators=(',', ':'))
+
+
+def cache_key(model_id, body):
+    """S3 key for a request: sha256 of model id + canonical body, sharded by the first hash bytes."""
+    digest = hashlib.sha256(f"{model_id}\n{canonical_body(body)}".encode('utf-8')).hexdigest()
+    return f"{CACHE_PREFIX}{digest[:2]}/{digest[2:4]}/{digest}.png"
+
+
+def _read(key, max_age_seconds=None):
+    """Object bytes, or None if missing (or written more than max_age_seconds ago)."""
+    try:
+        response = s3_client.get_object(Bucket=CACHE_BUCKET, Key=key)
+    except ClientError as err:
+        if err.response["Error"]["Code"] not in ("NoSuchKey", "404"):
+            logger.warning("Image cache lookup failed: %s", err)
+        return None
+    if max_age_seconds is not None:
+        age = (datetime.now(timezone.utc) - response["LastModified"]).total_seconds()
+        if age > max_age_seconds:
+            return None
+    return response["Body"].read()
+
+
+def read(key):
+    """Bytes of an object a rendition manifest points to, or None (not counted as a lookup)."""
+    return _read(key)
+
+
+def _record(hit):
+    global _hits, _misses
+    with _lock:
+        if hit:
+            _hits += 1
+        else:
+            _misses += 1
+        hits, total = _hits, _hits + _misses
+    logger.info("Image cache %s (hit rate %d/%d)", "hit" if hit else "miss", hits, total)
+
+
+def get(key):
+    """Cached image bytes, or None on a miss (or when the cache is disabled)."""
+    if s3_client is None:
+        return None
+    image_bytes = _read(key)
+    _record(image_bytes is not None)
+    return image_bytes
+
+
+def put(key, image_bytes):
+    """Store a generated image (a failed write only costs a future cache hit)."""
+    if s3_client is None:
+        return
+    try:
+        s3_client.put_object(Bucket=CACHE_BUCKET, Key=key, Body=image_bytes, ContentType='image/png')
+    except ClientError as err:
+        logger.warning("Image cache write failed: %s", err)
+
+
+def rendition_key(key, name, extension):
+    """cache/ab/cd/<sha>.png -> cache/ab/cd/<sha>.<name>.<extension> (or <sha>.webp for the full-size "webp")"""
+    base = key.rsplit('.', 1)[0]
+    return f"{base}.{extension}" if name == extension else f"{base}.{name}.{extension}"
+
+
+def get_renditions(key):
+    """
+    Rendition manifest of a cached image (no image bytes are downloaded), or None.
+
+    A manifest that is about to expire is treated as missing, so presigned
+    links never outlive the objects they point to.
+    """
+    if s3_client is None:
+        return None
+    max_age = CACHE_TTL_DAYS * 86400 - URL_EXPIRES_SECONDS - 86400  # Lifecycle rules run once a day
+    manifest = _read(rendition_key(key, "renditions", "json"), max_age_seconds=max_age)
+    if manifest is None:
+        return None  # The caller falls back to get(), which counts the lookup
+    _record(True)
+    return json.loads(manifest)
+
+
+def put_renditions(key, renditions):
+    """
+    Store the renditions and the original (rewritten, so all of them share a
+    fresh lifetime) plus their manifest.
+    Returns the manifest, or None when the cache is disabled.
+    """
+    if s3_client is None:
+        return None
+    manifest = {}
+    try:
+        for name, rendition in renditions.items():
+            target = key if name == "original" else rendition_key(key, name, rendition["extension"])
+            s3_client.put_object(Bucket=CACHE_BUCKET, Key=target, Body=rendition["bytes"],
+                                 ContentType=rendition["mime"])
+            manifest[name] = {field: value for field, value in rendition.items() if field != "bytes"}
+            manifest[name].update(key=target, size=len(rendition["bytes"]))
+        s3_client.put_object(Bucket=CACHE_BUCKET, Key=rendition_key(key, "renditions", "json"),
+                             Body=json.dumps(manifest).encode("utf-8"), ContentType="application/json")
+    except ClientError as err:
+        logger.warning("Image cache write failed: %s", err)
+        return None
+    return manifest
+
+
+def presigned_url(key, expires_in=URL_EXPIRES_SECONDS):
+    """Temporary download link for a cached image."""
+    return s3_client.generate_presigned_url(
+        'get_object', Params={'Bucket': CACHE_BUCKET, 'Key': key}, ExpiresIn=expires_in
+    )
+
+
+def stats():
+    """Lookups served from the cache since this process started."""
+    with _lock:
+        total = _hits + _misses
+        return {"enabled": s3_client is not None, "hits": _hits, "misses": _misses,
+                "hit_rate": _hits / total if total else 0.0}
@@ -7,10 +7,15 @@ import json
 import logging
 import boto3
 import os
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from botocore.exceptions import ClientError
 import datetime
 
+import image_cache
+import image_renditions
+
 # Initialize bedrock client once for better performance
 bedrock_client = boto3.client(service_name='bedrock-runtime')
 
@@ -25,14 +30,48 @@ logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
-def generate_image(model_id, body):
+MODEL_ID = 'amazon.titan-image-generator-v1'
+MAX_IMAGES_PER_CALL = 5  # Titan Image Generator G1 limit for numberOfImages
+BATCH_MAX_WORKERS = int(os.environ.get('IMAGE_BATCH_MAX_WORKERS', '4'))  # Parallel Bedrock calls per batch
+BATCH_MAX_PROMPTS = int(os.environ.get('IMAGE_BATCH_MAX_PROMPTS', '50'))  # Same limit as the batch job API
+
+# Preview mode: small, standard-quality images with random seeds to iterate on a prompt;
+# finalize_image() regenerates the chosen one at full size with the same prompt and seed
+PREVIEW_SIZE = 512  # Smallest square size Titan G1 supports (billed at the lower resolution tier)
+PREVIEW_COUNT = max(1, int(os.environ.get('IMAGE_PREVIEW_COUNT', '1')))  # At least one preview
+MAX_SEED = 2147483646
+
+
+def build_request_body(prompt, number_of_images=1, seed=0, size=1024, quality=None):
+    """
+    Titan text-to-image request for one prompt (square, cfgScale 8).
+    """
+    config = {
+        "numberOfImages": number_of_images,
+        "height": size,
+        "width": size,
+        "cfgScale": 8.0,
+        "seed": seed
+    }
+    if quality:
+        config["quality"] = quality
+    return json.dumps({
+        "taskType": "TEXT_IMAGE",
+        "textToImageParams": {
+            "text": prompt
+        },
+        "imageGenerationConfig": config
+    })
+
+
+def generate_images(model_id, body):
     """
-    Generate an image using Amazon Titan Image Generator G1 model on demand.
+    Generate images using Amazon Titan Image Generator G1 model on demand.
     Args:
         model_id (str): The model ID to use.
         body (str) : The request body to use.
     Returns:
-        image_bytes (bytes): The image generated by the model.
+        images (list): The images (bytes) generated by the model.
     """
 
     logger.info(
@@ -47,22 +86,21 @@ def generate_image(model_id, body):
         )
         response_body = json.loads(response.get("body").read())
 
+        finish_reason = response_body.get("error")
+        if finish_reason is not None:
+            raise ImageError(f"Image generation error. Error is {finish_reason}")
+
         # Improved error handling for response parsing
         if "images" not in response_body or not response_body["images"]:
             raise ImageError("No images returned in response")
-            
-        base64_image = response_body["images"][0]
-        base64_bytes = base64_image.encode('ascii')
-        image_bytes = base64.b64decode(base64_bytes)
 
-        finish_reason = response_body.get("error")
-        if finish_reason is not None:
-            raise ImageError(f"Image generation error. Error is {finish_reason}")
+        images = [base64.b64decode(base64_image.encode('ascii')) for base64_image in response_body["images"]]
 
         logger.info(
-            "Successfully generated image with Amazon Titan Image Generator G1 model %s", model_id)
+            "Successfully generated %d image(s) with Amazon Titan Image Generator G1 model %s",
+            len(images), model_id)
 
-        return image_bytes
+        return images
         
     except json.JSONDecodeError as e:
         raise ImageError(f"Failed to parse response: {str(e)}")
@@ -70,6 +108,28 @@ def generate_image(model_id, body):
         raise ImageError(f"Invalid response format: {str(e)}")
 
 
+def generate_image(model_id, body):
+    """
+    Generate one image (the first one returned).
+    Returns:
+        image_bytes (bytes): The image generated by the model.
+    """
+    return generate_images(model_id, body)[0]
+
+
+def generate_image_cached(model_id, body):
+    """
+    generate_image() behind the content-addressed S3 cache (image_cache.py).
+    Identical model + body means an identical image, so repeats skip Bedrock.
+    """
+    key = image_cache.cache_key(model_id, body)
+    image_bytes = image_cache.get(key)
+    if image_bytes is None:
+        image_bytes = generate_image(model_id=model_id, body=body)
+        image_cache.put(key, image_bytes)
+    return image_bytes
+
+
 def generate_image_from_prompt(prompt):
     """
     Simplified function to generate image from text prompt for frontend use.
@@ -78,29 +138,169 @@ def generate_image_from_prompt(prompt):
     Returns:
         bytes: The generated image as bytes.
     """
-    model_id = 'amazon.titan-image-generator-v1'
+    model_id = MODEL_ID
     
-    body = json.dumps({
-        "taskType": "TEXT_IMAGE",
-        "textToImageParams": {
-            "text": prompt
-        },
-        "imageGenerationConfig": {
-            "numberOfImages": 1,
-            "height": 1024,
-            "width": 1024,
-            "cfgScale": 8.0,
-            "seed": 0
-        }
-    })
+    body = build_request_body(prompt)
     
     try:
-        return generate_image(model_id=model_id, body=body)
+        return generate_image_cached(model_id=model_id, body=body)
     except Exception as e:
         logger.error(f"Error generating image: {str(e)}")
         raise
 
 
+def generate_image_renditions(prompt, seed=0):
+    """
+    Generate an image plus the small renditions the UI displays (thumbnail, medium).
+    Full-size download formats are added on request by add_rendition().
+
+    With the S3 cache enabled, the renditions are stored next to the original
+    and a repeated prompt only fetches their (tiny) manifest - the UI loads the
+    images straight from S3 through presigned URLs, size by size.
+    Args:
+        prompt (str): Text description of the image to generate.
+        seed (int): Titan seed (finalize_image() passes the chosen preview's).
+    Returns:
+        dict: rendition name -> {"mime", "extension", "width", "height", "size",
+              plus "url" (cache enabled) and/or "bytes" (freshly generated)}
+    """
+    body = build_request_body(prompt, seed=seed)
+    key = image_cache.cache_key(MODEL_ID, body)
+
+    manifest = image_cache.get_renditions(key)
+    if manifest is None:
+        image_bytes = generate_image_cached(model_id=MODEL_ID, body=body)
+        renditions = image_renditions.make_renditions(image_bytes, names=image_renditions.DISPLAY)
+        manifest = image_cache.put_renditions(key, renditions)
+        if manifest is None:
+            for rendition in renditions.values():
+                rendition["size"] = len(rendition["bytes"])
+            return renditions
+        for name, rendition in manifest.items():
+            rendition["bytes"] = renditions[name]["bytes"]
+
+    for rendition in manifest.values():
+        rendition["url"] = image_cache.presigned_url(rendition["key"])
+    return manifest
+
+
+def add_rendition(renditions, name):
+    """
+    Encode one more rendition ("webp", "avif") of a generated image, once.
+    A cached image's original is read back from S3 first.
+    Args:
+        renditions (dict): Result of generate_image_renditions(), updated in place.
+        name (str): Rendition to add.
+    Raises:
+        ImageError: The cached original has expired.
+    Returns:
+        dict: The rendition.
+    """
+    if name not in renditions:
+        original = renditions["original"]
+        png_bytes = original["bytes"] if "bytes" in original else image_cache.read(original["key"])
+        if png_bytes is None:
+            raise ImageError("The cached image has expired, please generate it again")
+        rendition = image_renditions.make_renditions(png_bytes, names=(name,))[name]
+        rendition["size"] = len(rendition["bytes"])
+        renditions[name] = rendition
+    return renditions[name]
+
+
+def generate_previews(prompt, count=PREVIEW_COUNT):
+    """
+    Generate a few small previews of a prompt, each with its own random seed.
+    One call per preview (in parallel), so every preview can be reproduced
+    at full size from its seed. Previews are not cached.
+    Raises:
+        ValueError: count is less than 1.
+    Returns:
+        list: [{"seed": int, "image_bytes": bytes}]
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    seeds = random.sample(range(MAX_SEED + 1), count)
+
+    def generate(seed):
+        body = build_request_body(prompt, seed=seed, size=PREVIEW_SIZE, quality="standard")
+        return {"seed": seed, "image_bytes": generate_image(model_id=MODEL_ID, body=body)}
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(generate, seeds))
+
+
+def finalize_image(prompt, seed):
+    """
+    Regenerate a chosen preview at full size (1024x1024): same prompt, same seed.
+    Returns the renditions, like generate_image_renditions().
+    """
+    return generate_image_renditions(prompt, seed=seed)
+
+
+def generate_batch(prompts, variants=1, max_workers=BATCH_MAX_WORKERS):
+    """
+    Generate several variants for each of several prompts.
+
+    Titan returns up to 5 images per call, so each prompt's variants are split
+    into calls of at most 5 images, and the calls run in parallel on a bounded
+    thread pool. Every call gets its own random seed (distinct within a prompt).
+    The images of one call share that seed, so each image records the seed,
+    number_of_images and its image_index in the call's response - together with
+    the prompt they reproduce it.
+    Args:
+        prompts (list): Text descriptions, one per product/scene.
+        variants (int): Images to generate per prompt.
+    Raises:
+        ValueError: More than BATCH_MAX_PROMPTS prompts.
+    Returns:
+        list: A manifest, one entry per prompt:
+            {"prompt": str, "images": [{"seed": int, "number_of_images": int, "image_index": int,
+                                        "variant": int, "image_bytes": bytes, "thumbnail_bytes": bytes}],
+             "errors": [str]}
+    """
+    if len(prompts) > BATCH_MAX_PROMPTS:
+        raise ValueError(f"At most {BATCH_MAX_PROMPTS} prompts per batch")
+
+    calls = []
+    for prompt_index, prompt in enumerate(prompts):
+        first_variants = range(0, variants, MAX_IMAGES_PER_CALL)
+        seeds = random.sample(range(MAX_SEED + 1), len(first_variants))
+        for first_variant, seed in zip(first_variants, seeds):
+            calls.append((prompt_index, first_variant, min(MAX_IMAGES_PER_CALL, variants - first_variant), seed))
+
+    manifest = [{"prompt": prompt, "images": [], "errors": []} for prompt in prompts]
+    logger.info("Generating %d prompts x %d variants in %d calls", len(prompts), variants, len(calls))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls)))) as pool:
+        futures = {
+            pool.submit(generate_images, MODEL_ID,
+                        build_request_body(prompts[prompt_index], number_of_images=count, seed=seed)):
+                (prompt_index, first_variant, count, seed)
+            for prompt_index, first_variant, count, seed in calls
+        }
+        for future in as_completed(futures):
+            prompt_index, first_variant, count, seed = futures[future]
+            entry = manifest[prompt_index]
+            try:
+                images = future.result()
+            except ImageError as err:
+                entry["errors"].append(err.message)
+                continue
+            except ClientError as err:
+                entry["errors"].append(err.response["Error"]["Message"])
+                continue
+            entry["images"].extend(
+                {"seed": seed, "number_of_images": count, "image_index": i, "variant": first_variant + i,
+                 "image_bytes": image_bytes,
+                 "thumbnail_bytes": image_renditions.make_renditions(image_bytes, names=["thumbnail"])["thumbnail"]["bytes"]}
+                for i, image_bytes in enumerate(images)
+            )
+
+    for entry in manifest:
+        entry["images"].sort(key=lambda image: image["variant"])
+    return manifest
+
+
 def index(event, context):
     """
     Entrypoint for Amazon Titan Image Generator G1 example.
@@ -109,26 +309,14 @@ def index(event, context):
     logging.basicConfig(level=logging.INFO,
                         format="%(levelname)s: %(message)s")
 
-    model_id = 'amazon.titan-image-generator-v1'
+    model_id = MODEL_ID
 
     prompt = event['prompt']
 
-    body = json.dumps({
-        "taskType": "TEXT_IMAGE",
-        "textToImageParams": {
-            "text": prompt
-        },
-        "imageGenerationConfig": {
-            "numberOfImages": 1,
-            "height": 1024,
-            "width": 1024,
-            "cfgScale": 8.0,
-            "seed": 0
-        }
-    })
+    body = build_request_body(prompt)
 
     try:
-        image_bytes = generate_image(model_id=model_id, body=body)
+        image_bytes = generate_image_cached(model_id=model_id, body=body)
         print("Image generated successfully.")
         
         return {
@@ -9,8 +9,10 @@ This creates a simple web interface where users can:
 
 import streamlit as st 
 import image_generate_backend as image_gen
+import image_renditions
 import io
-from PIL import Image
+import json
+import zipfile
 
 # Configure the web page
 st.set_page_config(
@@ -35,6 +37,10 @@ st.markdown("""
 # Initialize session state for generated image
 if 'generated_image' not in st.session_state:
     st.session_state.generated_image = None
+if 'batch_manifest' not in st.session_state:
+    st.session_state.batch_manifest = None
+if 'previews' not in st.session_state:
+    st.session_state.previews = None
 
 # User input section
 st.subheader("✍️ Describe the image you want to generate:")
@@ -47,18 +53,31 @@ user_prompt = st.text_area(
     label_visibility="collapsed"
 )
 
+# Preview mode: a few quick 512x512 drafts first, then finalize the one you like
+preview_mode = st.toggle("⚡ Preview first (cheaper, faster drafts)", value=False)
+
 # Generate button
 generate_button = st.button("🎨 Generate Image", type="primary")
 
 # Process prompt when button is clicked
-if generate_button and user_prompt.strip():
+if generate_button and user_prompt.strip() and preview_mode:
+    with st.spinner("⚡ Generating previews..."):
+        try:
+            st.session_state.previews = {
+                "prompt": user_prompt,
+                "images": image_gen.generate_previews(user_prompt)
+            }
+        except Exception as e:
+            st.error(f"❌ Error generating previews: {str(e)}")
+
+elif generate_button and user_prompt.strip():
     with st.spinner("🎨 Generating your image... This may take a few moments..."):
         try:
-            # Generate image using backend
-            image_bytes = image_gen.generate_image_from_prompt(user_prompt)
+            # Generate image (plus thumbnail/medium renditions; download formats are encoded on request)
+            renditions = image_gen.generate_image_renditions(user_prompt)
             
             # Store in session state
-            st.session_state.generated_image = image_bytes
+            st.session_state.generated_image = renditions
             
             st.success("✅ Image generated successfully!")
             
@@ -68,24 +87,106 @@ if generate_button and user_prompt.strip():
 elif generate_button and not user_prompt.strip():
     st.warning("⚠️ Please enter a description first!")
 
+# Previews: pick one to regenerate at full size (same prompt and seed)
+if st.session_state.previews:
+    st.subheader("⚡ Previews:")
+    columns = st.columns(len(st.session_state.previews["images"]))
+    for column, preview in zip(columns, st.session_state.previews["images"]):
+        column.image(preview["image_bytes"], caption=f"Seed {preview['seed']}", use_container_width=True)
+        if column.button("✅ Finalize this one", key=f"finalize_{preview['seed']}"):
+            with st.spinner("🎨 Generating the full-size image..."):
+                try:
+                    st.session_state.generated_image = image_gen.finalize_image(
+                        st.session_state.previews["prompt"], preview["seed"]
+                    )
+                    st.session_state.previews = None
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"❌ Error generating image: {str(e)}")
+
 # Display generated image if available
 if st.session_state.generated_image:
     st.subheader("🖼️ Generated Image:")
     
-    # Convert bytes to PIL Image for display
-    image = Image.open(io.BytesIO(st.session_state.generated_image))
+    renditions = st.session_state.generated_image
     
-    # Display image
-    st.image(image, caption="Your AI-generated image", use_container_width=True)
+    # Display the medium rendition (a few KB of WebP instead of the 1024x1024 PNG);
+    # with the S3 cache the browser loads it straight from S3
+    preview = renditions.get("medium", renditions["original"])
+    st.image(preview.get("url") or preview["bytes"], caption="Your AI-generated image", use_container_width=True)
     
-    # Download button
-    st.download_button(
-        label="💾 Download Image",
-        data=st.session_state.generated_image,
-        file_name="ai_generated_image.png",
-        mime="image/png",
-        type="secondary"
+    # Download in the format of your choice (only the picked one is encoded, once)
+    download_format = st.selectbox(
+        "Download format", image_renditions.download_formats(),
+        format_func=lambda name: "PNG (original)" if name == "original" else name.upper()
     )
+    try:
+        choice = image_gen.add_rendition(renditions, download_format)
+        st.caption(f"{choice['width']}x{choice['height']} · {choice['size'] // 1024} KB")
+    except image_gen.ImageError as e:
+        st.error(f"❌ {e.message}")
+        choice = None
+    if choice and "bytes" in choice:
+        st.download_button(
+            label="💾 Download Image",
+            data=choice["bytes"],
+            file_name=f"ai_generated_image.{choice['extension']}",
+            mime=choice["mime"],
+            type="secondary"
+        )
+    elif choice:
+        st.link_button("💾 Download Image", choice["url"])
+        st.caption(f"Link valid for {image_gen.image_cache.URL_EXPIRES_SECONDS // 60} minutes - "
+                   f"cached images are removed after {image_gen.image_cache.CACHE_TTL_DAYS} days")
+
+# Batch generation - many prompts, several variants each, generated in parallel
+with st.expander("📦 Batch generation"):
+    batch_prompts = st.text_area(
+        "One prompt per line",
+        placeholder="A red ceramic mug on a white background\nA blue ceramic mug on a white background",
+        height=120
+    )
+    batch_variants = st.number_input("Variants per prompt", min_value=1, max_value=10, value=3)
+    
+    if st.button("📦 Generate Batch"):
+        prompts = [line.strip() for line in batch_prompts.splitlines() if line.strip()]
+        if not prompts:
+            st.warning("⚠️ Please enter at least one prompt!")
+        elif len(prompts) > image_gen.BATCH_MAX_PROMPTS:
+            st.warning(f"⚠️ Please enter at most {image_gen.BATCH_MAX_PROMPTS} prompts per batch!")
+        else:
+            with st.spinner(f"🎨 Generating {len(prompts) * batch_variants} images..."):
+                st.session_state.batch_manifest = image_gen.generate_batch(prompts, variants=int(batch_variants))
+    
+    if st.session_state.batch_manifest:
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as zip_file:
+            manifest = []
+            for prompt_index, entry in enumerate(st.session_state.batch_manifest):
+                files = []
+                for image in entry["images"]:
+                    file_name = f"{prompt_index:03d}-{image['variant']:02d}.png"
+                    zip_file.writestr(file_name, image["image_bytes"])
+                    files.append({"file": file_name, "seed": image["seed"],
+                                  "number_of_images": image["number_of_images"], "image_index": image["image_index"]})
+                manifest.append({"prompt": entry["prompt"], "images": files, "errors": entry["errors"]})
+            zip_file.writestr("manifest.json", json.dumps(manifest, indent=2))
+        
+        st.download_button(
+            label="💾 Download All (zip + manifest)",
+            data=archive.getvalue(),
+            file_name="ai_generated_batch.zip",
+            mime="application/zip"
+        )
+        
+        for entry in st.session_state.batch_manifest:
+            st.markdown(f"**{entry['prompt']}**")
+            for error in entry["errors"]:
+                st.error(f"❌ {error}")
+            if entry["images"]:
+                columns = st.columns(min(len(entry["images"]), 5))
+                for i, image in enumerate(entry["images"]):
+                    columns[i % len(columns)].image(image["thumbnail_bytes"], caption=f"Variant {image['variant'] + 1}")
 
 # Add helpful information in sidebar
 with st.sidebar:
@@ -102,6 +203,14 @@ with st.sidebar:
     - 🎯 High-quality image generation
     """)
     
+    # Repeated prompts are served from the S3 image cache (if IMAGE_CACHE_BUCKET is set)
+    cache_stats = image_gen.image_cache.stats()
+    if cache_stats["enabled"]:
+        st.caption(
+            f"🗄️ Image cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+            f"({cache_stats['hit_rate']:.0%} hit rate)"
+        )
+    
     st.header("💡 Tips for Better Images")
     st.markdown("""
     - Be specific and descriptive in your prompts
@@ -19,6 +19,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'bg_remover'))
 # Import backend modules
 try:
     import image_generate_backend as image_gen
+    import image_renditions
     import bg_remover_backend as bg_remover
 except ImportError as e:
     st.error(f"Import error: {e}")
@@ -57,8 +58,8 @@ with tab1:
         if image_prompt.strip():
             with st.spinner("🎨 Generating image..."):
                 try:
-                    image_bytes = image_gen.generate_image_from_prompt(image_prompt)
-                    st.session_state.generated_image = image_bytes
+                    # The image plus its thumbnail/medium renditions (download formats are encoded on request)
+                    st.session_state.generated_image = image_gen.generate_image_renditions(image_prompt)
                     st.success("✅ Image generated successfully!")
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
@@ -68,14 +69,22 @@ with tab1:
     # Display generated image
     if st.session_state.generated_image:
         st.subheader("🖼️ Generated Image:")
-        image = Image.open(io.BytesIO(st.session_state.generated_image))
-        st.image(image, use_container_width=True)
+        renditions = st.session_state.generated_image
+        # Display the 512 px WebP rendition instead of the full 1024x1024 PNG
+        st.image(renditions.get("medium", renditions["original"])["bytes"], use_container_width=True)
         
+        # Only the picked format is encoded (once, kept with the image)
+        download_format = st.selectbox(
+            "Download format", image_renditions.download_formats(),
+            format_func=lambda name: "PNG (original)" if name == "original" else name.upper()
+        )
+        choice = image_gen.add_rendition(renditions, download_format)
+        st.caption(f"{choice['width']}x{choice['height']} · {choice['size'] // 1024} KB")
         st.download_button(
             label="💾 Download Image",
-            data=st.session_state.generated_image,
-            file_name="ai_generated_image.png",
-            mime="image/png"
+            data=choice["bytes"],
+            file_name=f"ai_generated_image.{choice['extension']}",
+            mime=choice["mime"]
         )
 
 # Background Remover Tab
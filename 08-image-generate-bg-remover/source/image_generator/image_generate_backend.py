@@ -11,6 +11,8 @@ import os
 from botocore.exceptions import ClientError
 import datetime
 
+import image_renditions
+
 # Initialize bedrock client once for better performance
 bedrock_client = boto3.client(service_name='bedrock-runtime')
 
@@ -101,6 +103,40 @@ def generate_image_from_prompt(prompt):
         raise
 
 
+def generate_image_renditions(prompt):
+    """
+    Generate an image plus the small renditions the UI displays.
+    Full-size download formats are added on request by add_rendition().
+    Args:
+        prompt (str): Text description of the image to generate.
+    Returns:
+        dict: rendition name ("original", "thumbnail", "medium")
+              -> {"bytes", "mime", "extension", "width", "height", "size"}
+    """
+    renditions = image_renditions.make_renditions(
+        generate_image_from_prompt(prompt), names=image_renditions.DISPLAY
+    )
+    for rendition in renditions.values():
+        rendition["size"] = len(rendition["bytes"])
+    return renditions
+
+
+def add_rendition(renditions, name):
+    """
+    Encode one more rendition ("webp", "avif") of a generated image, once.
+    Args:
+        renditions (dict): Result of generate_image_renditions(), updated in place.
+        name (str): Rendition to add.
+    Returns:
+        dict: The rendition.
+    """
+    if name not in renditions:
+        rendition = image_renditions.make_renditions(renditions["original"]["bytes"], names=(name,))[name]
+        rendition["size"] = len(rendition["bytes"])
+        renditions[name] = rendition
+    return renditions[name]
+
+
 def index(event, context):
     """
     Entrypoint for Amazon Titan Image Generator G1 example.
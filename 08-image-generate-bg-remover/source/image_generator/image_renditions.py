@@ -0,0 +1,82 @@
+"""
+Smaller renditions of a generated image.
+
+Titan returns a 1024x1024 PNG (1-2 MB). Previews don't need that, so every
+generated image is also encoded as:
+
+- thumbnail: 256 px WebP
+- medium:    512 px WebP (what the UI displays)
+
+Full-size downloads are only encoded when picked:
+
+- webp:      full size, lossy WebP
+- avif:      full size, lossy AVIF (only if this Pillow build can write AVIF)
+
+The original PNG is kept for "download original".
+"""
+import io
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS = {
+    "thumbnail": {"size": 256, "format": "WEBP", "quality": 80},
+    "medium": {"size": 512, "format": "WEBP", "quality": 82},
+    "webp": {"size": None, "format": "WEBP", "quality": 85},
+    "avif": {"size": None, "format": "AVIF", "quality": 60},
+}
+
+DISPLAY = ("thumbnail", "medium")   # Encoded for every generated image
+DOWNLOADS = ("webp", "avif")        # Encoded on request
+
+FORMATS = {
+    "PNG": {"mime": "image/png", "extension": "png"},
+    "WEBP": {"mime": "image/webp", "extension": "webp"},
+    "AVIF": {"mime": "image/avif", "extension": "avif"},
+}
+
+
+def can_write(image_format):
+    """True if Pillow has an encoder for the format (AVIF needs Pillow 11.2+ or pillow-avif-plugin)."""
+    Image.init()
+    return image_format in Image.SAVE
+
+
+def download_formats():
+    """Download choices: the original PNG plus every full-size rendition this Pillow build can write."""
+    return ["original", *(name for name in DOWNLOADS if can_write(RENDITIONS[name]["format"]))]
+
+
+def _encode(image, spec):
+    if spec["size"] and max(image.size) > spec["size"]:
+        image = image.copy()
+        image.thumbnail((spec["size"], spec["size"]), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format=spec["format"], quality=spec["quality"])
+    return buffer.getvalue(), image.size
+
+
+def make_renditions(png_bytes, names=None):
+    """
+    Encode every rendition this Pillow build supports (or only the given names).
+    Returns:
+        dict: name -> {"bytes", "mime", "extension", "width", "height"}, including "original" (the PNG).
+    """
+    image = Image.open(io.BytesIO(png_bytes))
+    image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+    renditions = {"original": {"bytes": png_bytes, **FORMATS["PNG"], "width": image.width, "height": image.height}}
+    for name, spec in RENDITIONS.items():
+        if names is not None and name not in names:
+            continue
+        if not can_write(spec["format"]):
+            continue
+        data, (width, height) = _encode(image, spec)
+        renditions[name] = {"bytes": data, **FORMATS[spec["format"]], "width": width, "height": height}
+
+    logger.debug("Renditions: %s", ", ".join(f"{name} {len(r['bytes']) // 1024} KB" for name, r in renditions.items()))
+    return renditions